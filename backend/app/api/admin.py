@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.core.config import settings
+from app.core.profiler import ProfilerBusyError, start_profiler, stop_profiler
+from app.core.security import get_current_user
+from app.core.tracing import TracedRoute, skip_slow_log, slow_traces
+from app.models.user import Role, Usuario
+
+router = APIRouter(route_class=TracedRoute)
+
+@router.get("/traces")
+def read_slow_traces(
+    limit: int = Query(10, ge=1, le=100),
+    route: Optional[str] = Query(None, description="Route template, e.g. /api/clients/{client_id}"),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Slowest recent traced requests over TRACE_SLOW_MS, slowest first, each
+    with its span tree and SQL text. Only the last TRACE_RECENT_SIZE slow
+    requests are kept in memory; the full history is in TRACE_LOG_FILE.
+    """
+    if current_user.role != Role.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return {
+        "sample_rate": settings.TRACE_SAMPLE_RATE,
+        "slow_ms": settings.TRACE_SLOW_MS,
+        "traces": slow_traces.slowest(limit, route),
+    }
+
+@router.get("/profile")
+async def profile(
+    seconds: float = Query(10, gt=0, le=300),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    route: Optional[str] = Query(
+        None, description="Only requests whose route template or path matches this pattern, e.g. /api/valoraciones/*"
+    ),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    idle: bool = Query(False, description="Include threads parked in a wait"),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Sample the running server's stacks for `seconds` and return them as
+    collapsed stacks (flamegraph.pl, inferno, speedscope) or speedscope JSON.
+    With `route`, only samples taken inside matching requests are kept.
+    One profile at a time (409 while another one runs).
+    """
+    if current_user.role != Role.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    # It sleeps for `seconds` on purpose: not a slow request
+    skip_slow_log()
+    try:
+        profiler = start_profiler(interval_ms / 1000, idle=idle, route=route)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        # Joining the sampler and rendering stay off the event loop
+        await run_in_threadpool(stop_profiler, profiler)
+
+    name = f"profile-{datetime.now():%Y%m%d-%H%M%S}"
+    headers = {"X-Profile-Samples": str(profiler.ticks)}
+    if route is not None:
+        headers["X-Profile-Requests"] = str(profiler.requests)
+    if format == "speedscope":
+        headers["Content-Disposition"] = f'attachment; filename="{name}.speedscope.json"'
+        return JSONResponse(await run_in_threadpool(profiler.speedscope, name), headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="{name}.collapsed.txt"'
+    return PlainTextResponse(await run_in_threadpool(profiler.collapsed), headers=headers)
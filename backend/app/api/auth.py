@@ -1,37 +1,85 @@
 from datetime import timedelta
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session, select
 
-from app.core.db import get_session
-from app.core.security import create_access_token, verify_password
+from app.core.db import get_async_session, get_session
+from app.core.security import (
+    create_access_token, verify_password_async, get_password_hash_async, password_needs_rehash
+)
 from app.core.config import settings
+from app.core.tracing import TracedRoute
 from app.models.user import Usuario, Token, Role
 
-router = APIRouter()
+if TYPE_CHECKING:  # imported only under DB_ASYNC (see app.core.db)
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     session: Session = Depends(get_session)
 ):
+    # async so that waiting on bcrypt (which runs on its own executor) doesn't
+    # hold a request threadpool thread; the DB calls still go to the threadpool.
     # Find user by email (username field in form)
     statement = select(Usuario).where(Usuario.email == form_data.username)
-    user = session.exec(statement).first()
+    user = await run_in_threadpool(lambda: session.exec(statement).first())
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
+        raise _incorrect_credentials()
     
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
+    # Transparent upgrade when BCRYPT_ROUNDS changed since the hash was made
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash_async(form_data.password)
+        session.add(user)
+        await run_in_threadpool(session.commit)
+
+    return _token_for(user)
+
+def _incorrect_credentials() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Incorrect email or password",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _token_for(user: Usuario) -> dict:
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         subject=user.email, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
+
+# --- Async variant (DB_ASYNC) ---
+# Same contract as `login_for_access_token`, with the user lookup and the
+# rehash commit on the aiosqlite engine instead of the threadpool.
+
+async_router = APIRouter(route_class=TracedRoute)
+
+@async_router.post("/login", response_model=Token)
+async def login_for_access_token_async(
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    session: "AsyncSession" = Depends(get_async_session)
+):
+    statement = select(Usuario).where(Usuario.email == form_data.username)
+    user = (await session.exec(statement)).first()
+
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
+        raise _incorrect_credentials()
+
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash_async(form_data.password)
+        session.add(user)
+        await session.commit()
+
+    return _token_for(user)
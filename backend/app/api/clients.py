@@ -1,39 +1,24 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+import csv
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
 from sqlmodel import Session, select
-from app.core.db import get_session
-from app.models.client import ClienteGym, ClienteGymCreate, ClienteGymRead, ClienteGymUpdate
+from app.core.db import get_session, get_read_session, get_async_read_session
+from app.core.http_cache import conditional, row_version, row_version_async, table_version, table_version_async
+from app.core.pagination import keyset_page, finish_page, count_rows, count_rows_async, TOTAL_COUNT_HEADER
+from app.models.client import (
+    ClienteGym, ClienteGymCreate, ClienteGymRead, ClienteGymUpdate, ClientImportResult, TipoUsuario
+)
 from app.models.user import Usuario
-# from app.api.auth import get_current_active_user # Removed unused import
+from app.core.security import get_current_user, get_current_user_async
+from app.core.tabular import ImportFileError, read_rows
+from app.core.tracing import TracedRoute
+from app.services.client_import import import_clients as run_import
 
-router = APIRouter()
+if TYPE_CHECKING:  # imported only under DB_ASYNC (see app.core.db)
+    from sqlmodel.ext.asyncio.session import AsyncSession
 
-# Dependency placeholder if not exported from auth.py
-from app.api.auth import login_for_access_token # Just to ensure module loaded
-from fastapi.security import OAuth2PasswordBearer
-from app.core.security import verify_password
-from app.core.config import settings
-from jose import jwt, JWTError
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
-
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    user = session.exec(select(Usuario).where(Usuario.email == username)).first()
-    if user is None:
-        raise credentials_exception
-    return user
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("/", response_model=ClienteGymRead)
 def create_client(
@@ -51,22 +36,101 @@ def create_client(
     session.refresh(db_client)
     return db_client
 
+@router.post("/import", response_model=ClientImportResult)
+def import_clients(
+    file: UploadFile = File(..., description="CSV or XLSX with a header row using ClienteGymCreate field names"),
+    dry_run: bool = Query(False, description="Validate and report without inserting"),
+    session: Session = Depends(get_session),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Bulk-create clients from a spreadsheet, in batches, with a per-row error report.
+
+    Invalid rows and duplicate emails (in the file or already registered) are
+    skipped and listed in `errors`; every other row is imported.
+    """
+    entrenador_id = current_user.id if current_user.role == "admin" else None
+    try:
+        rows = read_rows(file.file, file.filename)
+        return run_import(session, rows, entrenador_id=entrenador_id, dry_run=dry_run)
+    except ImportFileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read file: {e}")
+
+CLIENT_SORT_COLUMNS = {
+    "id": ClienteGym.id,
+    "apellido": ClienteGym.apellido,
+    "fecha_inicio": ClienteGym.fecha_inicio,
+}
+
 @router.get("/", response_model=List[ClienteGymRead])
 def read_clients(
-    offset: int = 0,
-    limit: int = 100,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor. Ignored when cursor is given"),
+    limit: int = Query(100, ge=1, le=500),
+    tipo_usuario: Optional[TipoUsuario] = None,
+    activo: Optional[bool] = None,
+    entrenador_id: Optional[int] = None,
+    sort: str = Query("id", pattern="^(id|apellido|fecha_inicio)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    include_total: bool = Query(False, description="Also return X-Total-Count for the filtered set"),
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user)
 ):
-    clients = session.exec(select(ClienteGym).offset(offset).limit(limit)).all()
+    """List clients with keyset pagination.
+
+    The next page's cursor is returned in the `X-Next-Cursor` header (absent on
+    the last page), so the body stays a plain list. Answers 304 when the client
+    table hasn't changed since the caller's ETag.
+    """
+    cached = conditional(request, response, table_version(session, ClienteGym, ClienteGym.updated_at))
+    if cached:
+        return cached
+
+    criteria = _client_criteria(tipo_usuario, activo, entrenador_id)
+    statement = _clients_page(criteria, cursor, offset, limit, sort, order)
+    clients = finish_page(session.exec(statement).all(), limit, response, sort)
+
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(count_rows(session, ClienteGym, *criteria))
     return clients
 
+def _client_criteria(tipo_usuario: Optional[TipoUsuario], activo: Optional[bool], entrenador_id: Optional[int]) -> list:
+    criteria = []
+    if tipo_usuario is not None:
+        criteria.append(ClienteGym.tipo_usuario == tipo_usuario)
+    if activo is not None:
+        criteria.append(ClienteGym.activo == activo)
+    if entrenador_id is not None:
+        criteria.append(ClienteGym.entrenador_id == entrenador_id)
+    return criteria
+
+def _clients_page(criteria: list, cursor: Optional[str], offset: int, limit: int, sort: str, order: str):
+    statement = keyset_page(
+        select(ClienteGym).where(*criteria),
+        CLIENT_SORT_COLUMNS[sort], ClienteGym.id, cursor, limit, descending=(order == "desc")
+    )
+    if offset and not cursor:
+        statement = statement.offset(offset)
+    return statement
+
 @router.get("/{client_id}", response_model=ClienteGymRead)
 def read_client(
     client_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user)
 ):
+    version = row_version(session, ClienteGym.updated_at, ClienteGym.id == client_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+    cached = conditional(request, response, version)
+    if cached:
+        return cached
+
     client = session.get(ClienteGym, client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
@@ -86,6 +150,7 @@ def update_client(
     client_data = client_update.dict(exclude_unset=True)
     for key, value in client_data.items():
         setattr(db_client, key, value)
+    db_client.updated_at = datetime.utcnow()
         
     session.add(db_client)
     session.commit()
@@ -106,3 +171,58 @@ def delete_client(
     session.delete(db_client)
     session.commit()
     return None
+
+# --- Async variants (DB_ASYNC) ---
+# Same contract as the handlers above; main.py mounts this router ahead of
+# `router` so these answer the hot read paths without a threadpool thread.
+
+async_router = APIRouter(route_class=TracedRoute)
+
+@async_router.get("/", response_model=List[ClienteGymRead])
+async def read_clients_async(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor. Ignored when cursor is given"),
+    limit: int = Query(100, ge=1, le=500),
+    tipo_usuario: Optional[TipoUsuario] = None,
+    activo: Optional[bool] = None,
+    entrenador_id: Optional[int] = None,
+    sort: str = Query("id", pattern="^(id|apellido|fecha_inicio)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    include_total: bool = Query(False, description="Also return X-Total-Count for the filtered set"),
+    session: "AsyncSession" = Depends(get_async_read_session),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    """List clients with keyset pagination (async driver, see `read_clients`)"""
+    cached = conditional(request, response, await table_version_async(session, ClienteGym, ClienteGym.updated_at))
+    if cached:
+        return cached
+
+    criteria = _client_criteria(tipo_usuario, activo, entrenador_id)
+    statement = _clients_page(criteria, cursor, offset, limit, sort, order)
+    clients = finish_page((await session.exec(statement)).all(), limit, response, sort)
+
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(await count_rows_async(session, ClienteGym, *criteria))
+    return clients
+
+@async_router.get("/{client_id}", response_model=ClienteGymRead)
+async def read_client_async(
+    client_id: int,
+    request: Request,
+    response: Response,
+    session: "AsyncSession" = Depends(get_async_read_session),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    version = await row_version_async(session, ClienteGym.updated_at, ClienteGym.id == client_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+    cached = conditional(request, response, version)
+    if cached:
+        return cached
+
+    client = await session.get(ClienteGym, client_id)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+    return client
@@ -1,18 +1,27 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import TYPE_CHECKING, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from sqlmodel import Session, select
 from datetime import datetime
 
-from app.core.db import get_session
-from app.core.security import get_current_user
-from app.models.usuario import Usuario
+from app.core.db import get_session, get_read_session, get_async_read_session
+from app.core.http_cache import conditional, table_version, table_version_async
+from app.core.security import get_current_user, get_current_user_async
+from app.core.tracing import TracedRoute
+from app.models.user import Usuario
+from app.models.client import ClienteGym
+from app.services.catalogo import get_catalogo, reconstruir_catalogo
+from app.services.rutinas import eliminar_rutinas, insertar_rutinas, ejercicios_inexistentes
 from app.models.entrenamiento import (
     Ejercicio, EjercicioCreate, EjercicioRead,
-    Rutina, RutinaCreate, RutinaRead, RutinaReadWithDetails,
-    DiaRutina, DetalleRutina, DetalleRutinaBase
+    Rutina, RutinaBase, RutinaCreate, RutinaRead, RutinaReadWithDetails,
+    DiaRutina, DetalleRutina, DetalleRutinaBase,
+    DiaRutinaRead, DetalleRutinaRead
 )
 
-router = APIRouter()
+if TYPE_CHECKING:  # solo se importa con DB_ASYNC (ver app.core.db)
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+router = APIRouter(route_class=TracedRoute)
 
 # --- EJERCICIOS (CATÁLOGO) ---
 
@@ -23,24 +32,45 @@ router = APIRouter()
     description="Obtiene una lista de todos los ejercicios disponibles. Permite filtrar por grupo muscular y buscar por nombre."
 )
 def get_ejercicios(
+    request: Request,
+    response: Response,
     grupo_muscular: Optional[str] = Query(None, description="Filtrar por grupo muscular (ej: Pecho, Espalda)"),
+    equipo_necesario: Optional[str] = Query(None, description="Filtrar por equipo (ej: Barra, Máquina)"),
     search: Optional[str] = Query(None, description="Buscar por nombre del ejercicio"),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
-    Devuelve el catálogo de ejercicios.
+    Devuelve el catálogo de ejercicios desde el índice en memoria.
     
-    - **grupo_muscular**: Filtro opcional.
-    - **search**: Búsqueda de texto parcial en el nombre.
+    - **grupo_muscular** / **equipo_necesario**: Filtros opcionales (sin distinguir tildes).
+    - **search**: Búsqueda por palabras o prefijos, sin tildes ni mayúsculas, ordenada por relevancia.
+
+    Responde con un `ETag` de la versión del catálogo; con `If-None-Match` vigente devuelve 304.
     """
-    query = select(Ejercicio)
-    if grupo_muscular:
-        query = query.where(Ejercicio.grupo_muscular == grupo_muscular)
-    if search:
-        query = query.where(Ejercicio.nombre.contains(search))
-    
-    return session.exec(query).all()
+    catalogo = get_catalogo(session)
+    no_modificado = conditional(request, response, f"catalogo-{catalogo.version}")
+    if no_modificado:
+        return no_modificado
+    return catalogo.buscar(search, grupo_muscular, equipo_necesario)
+
+@router.get(
+    "/ejercicios/facetas",
+    summary="Conteos del catálogo por grupo y equipo",
+    description="Cantidad de ejercicios por grupo muscular y por equipo, opcionalmente sobre los resultados de una búsqueda."
+)
+def get_facetas_ejercicios(
+    request: Request,
+    response: Response,
+    search: Optional[str] = Query(None, description="Buscar por nombre del ejercicio"),
+    session: Session = Depends(get_read_session),
+    current_user: Usuario = Depends(get_current_user)
+):
+    catalogo = get_catalogo(session)
+    no_modificado = conditional(request, response, f"catalogo-{catalogo.version}")
+    if no_modificado:
+        return no_modificado
+    return catalogo.facetas(search)
 
 @router.post(
     "/ejercicios/", 
@@ -58,6 +88,7 @@ def create_ejercicio(
     session.add(db_ejercicio)
     session.commit()
     session.refresh(db_ejercicio)
+    reconstruir_catalogo(session)
     return db_ejercicio
 
 # --- RUTINAS ---
@@ -70,47 +101,89 @@ def create_ejercicio(
 )
 def get_rutinas_cliente(
     cliente_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    activo: Optional[bool] = Query(None, description="Filtrar por rutinas activas/inactivas"),
+    limit: Optional[int] = Query(None, ge=1, description="Máximo de rutinas a devolver (las más recientes primero)"),
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user)
 ):
-    # Obtener rutinas activas primero
-    rutinas = session.exec(
-        select(Rutina)
-        .where(Rutina.cliente_id == cliente_id)
-        .order_by(Rutina.fecha_inicio.desc())
-    ).all()
-    
-    # Construir respuesta anidada (esto podría optimizarse con joins, pero por simplicidad iteramos)
-    result = []
-    for rutina in rutinas:
-        rutina_read = RutinaReadWithDetails.from_orm(rutina)
-        dias_read = []
-        
-        # Cargar dias
-        dias = session.exec(select(DiaRutina).where(DiaRutina.rutina_id == rutina.id).order_by(DiaRutina.orden)).all()
-        
-        for dia in dias:
-            dia_obj = {"id": dia.id, "nombre": dia.nombre, "orden": dia.orden, "ejercicios": []}
-            
-            # Cargar detalles (ejercicios del día)
-            detalles = session.exec(
-                select(DetalleRutina, Ejercicio.nombre)
-                .join(Ejercicio)
-                .where(DetalleRutina.dia_rutina_id == dia.id)
-                .order_by(DetalleRutina.orden)
-            ).all()
-            
-            for det, nombre_ejercicio in detalles:
-                det_dict = det.dict()
-                det_dict["ejercicio_nombre"] = nombre_ejercicio
-                dia_obj["ejercicios"].append(det_dict)
-            
-            dias_read.append(dia_obj)
-        
-        rutina_read.dias = dias_read
-        result.append(rutina_read)
-        
-    return result
+    """
+    Devuelve las rutinas del cliente con sus días y ejercicios.
+
+    Se resuelve con dos consultas fijas sin importar el tamaño del historial:
+    una para las cabeceras y otra (join ordenado) para todos sus días y detalles,
+    que luego se agrupan en Python.
+
+    Las rutinas solo se crean o eliminan (nunca se editan), así que el conteo y
+    el id máximo del cliente bastan como validador para responder 304.
+    """
+    cacheado = conditional(
+        request, response, table_version(session, Rutina, Rutina.id, Rutina.cliente_id == cliente_id)
+    )
+    if cacheado:
+        return cacheado
+
+    rutinas = session.exec(_consulta_rutinas(cliente_id, activo, limit)).all()
+    if not rutinas:
+        return []
+    filas = session.exec(_consulta_dias_y_detalles([r.id for r in rutinas])).all()
+    return _armar_rutinas(rutinas, filas)
+
+def _consulta_rutinas(cliente_id: int, activo: Optional[bool], limit: Optional[int]):
+    query = select(Rutina).where(Rutina.cliente_id == cliente_id)
+    if activo is not None:
+        query = query.where(Rutina.activo == activo)
+    query = query.order_by(Rutina.fecha_inicio.desc(), Rutina.id.desc())
+    if limit:
+        query = query.limit(limit)
+    return query
+
+def _consulta_dias_y_detalles(rutina_ids: List[int]):
+    """Días y ejercicios de todas las rutinas en un solo join ordenado"""
+    return (
+        select(
+            DiaRutina.rutina_id, DiaRutina.id, DiaRutina.nombre, DiaRutina.orden,
+            DetalleRutina.id, DetalleRutina.orden, DetalleRutina.series,
+            DetalleRutina.repeticiones, DetalleRutina.peso_sugerido,
+            DetalleRutina.descanso_segundos, DetalleRutina.notas,
+            Ejercicio.nombre,
+        )
+        .outerjoin(DetalleRutina, DetalleRutina.dia_rutina_id == DiaRutina.id)
+        .outerjoin(Ejercicio, Ejercicio.id == DetalleRutina.ejercicio_id)
+        .where(DiaRutina.rutina_id.in_(rutina_ids))
+        .order_by(DiaRutina.rutina_id, DiaRutina.orden, DiaRutina.id, DetalleRutina.orden, DetalleRutina.id)
+    )
+
+def _armar_rutinas(rutinas, filas) -> List[RutinaReadWithDetails]:
+    # Agrupar filas planas en rutina -> días -> ejercicios
+    dias_por_rutina = {}
+    dias = {}
+    for (rutina_id, dia_id, dia_nombre, dia_orden, det_id, det_orden, series,
+         repeticiones, peso_sugerido, descanso, notas, ejercicio_nombre) in filas:
+        dia = dias.get(dia_id)
+        if dia is None:
+            dia = DiaRutinaRead(id=dia_id, nombre=dia_nombre, orden=dia_orden, ejercicios=[])
+            dias[dia_id] = dia
+            dias_por_rutina.setdefault(rutina_id, []).append(dia)
+        # Días sin ejercicios o detalles con ejercicio borrado no aportan detalle
+        if det_id is not None and ejercicio_nombre is not None:
+            dia.ejercicios.append(DetalleRutinaRead(
+                id=det_id,
+                orden=det_orden,
+                series=series,
+                repeticiones=repeticiones,
+                peso_sugerido=peso_sugerido,
+                descanso_segundos=descanso,
+                notas=notas,
+                ejercicio_nombre=ejercicio_nombre,
+            ))
+
+    # model_dump() solo toma columnas, así que no dispara la carga perezosa de `dias`
+    return [
+        RutinaReadWithDetails(**rutina.model_dump(), dias=dias_por_rutina.get(rutina.id, []))
+        for rutina in rutinas
+    ]
 
 # Esquema complejo para crear rutina completa
 from pydantic import BaseModel, Field
@@ -149,47 +222,86 @@ def create_rutina_completa(
     2. **Días**: Lista de días de entrenamiento.
     3. **Ejercicios**: Detalles de cada ejercicio por día.
     """
-    # 1. Crear Rutina Base
-    nueva_rutina = Rutina(
-        nombre=rutina_data.nombre,
-        descripcion=rutina_data.descripcion,
-        objetivo=rutina_data.objetivo,
-        nivel=rutina_data.nivel,
-        duracion_semanas=rutina_data.duracion_semanas,
-        cliente_id=rutina_data.cliente_id,
-        entrenador_id=current_user.id, # Asignar al usuario actual
-        active=True
+    _validar_ejercicios(session, rutina_data)
+
+    # Mismo escritor por lotes que la asignación masiva: 3 INSERT sin importar el tamaño del árbol
+    rutina_id, = insertar_rutinas(
+        session, rutina_data, [rutina_data.cliente_id], entrenador_id=current_user.id
     )
-    session.add(nueva_rutina)
-    session.flush() # Para obtener ID
-    
-    # 2. Iterar Días
-    for dia_in in rutina_data.dias:
-        nuevo_dia = DiaRutina(
-            rutina_id=nueva_rutina.id,
-            nombre=dia_in.nombre,
-            orden=dia_in.orden
+    session.commit()
+    return session.get(Rutina, rutina_id)
+
+class BulkRutinaAssign(RutinaBase):
+    dias: List[DiaRoutineInput]
+    cliente_ids: List[int] = Field(..., min_length=1, description="Clientes a los que se asigna la rutina")
+
+class ResultadoAsignacion(BaseModel):
+    cliente_id: int
+    ok: bool
+    rutina_id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkRutinaResult(BaseModel):
+    creadas: int
+    resultados: List[ResultadoAsignacion]
+
+def _validar_ejercicios(session: Session, plantilla) -> None:
+    ejercicio_ids = {ejer.ejercicio_id for dia in plantilla.dias for ejer in dia.ejercicios}
+    faltantes = ejercicios_inexistentes(session, ejercicio_ids)
+    if faltantes:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ejercicios no encontrados en el catálogo: {sorted(faltantes)}"
         )
-        session.add(nuevo_dia)
-        session.flush() # ID del día
-        
-        # 3. Iterar Ejercicios
-        for idx, ejer_in in enumerate(dia_in.ejercicios):
-            nuevo_detalle = DetalleRutina(
-                dia_rutina_id=nuevo_dia.id,
-                ejercicio_id=ejer_in.ejercicio_id,
-                orden=idx + 1,
-                series=ejer_in.series,
-                repeticiones=ejer_in.repeticiones,
-                peso_sugerido=ejer_in.peso_sugerido,
-                descanso_segundos=ejer_in.descanso_segundos,
-                notas=ejer_in.notas
-            )
-            session.add(nuevo_detalle)
-            
+
+@router.post(
+    "/rutinas/asignacion-masiva",
+    response_model=BulkRutinaResult,
+    summary="Asignar una rutina a muchos clientes",
+    description="Crea una copia de la misma rutina (días y ejercicios) para cada cliente indicado, en una sola transacción con inserciones por lotes.",
+    status_code=status.HTTP_201_CREATED
+)
+def asignar_rutina_masiva(
+    data: BulkRutinaAssign,
+    session: Session = Depends(get_session),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Asigna una rutina a varios clientes a la vez.
+
+    Los ejercicios se validan una sola vez al inicio (si falta alguno no se crea
+    nada). Cada cliente obtiene su propio resultado: los inexistentes o repetidos
+    se reportan como error y el resto se inserta en la misma transacción.
+    """
+    _validar_ejercicios(session, data)
+
+    existentes = set(session.exec(
+        select(ClienteGym.id).where(ClienteGym.id.in_(set(data.cliente_ids)))
+    ).all())
+
+    resultados = []
+    validos = []
+    vistos = set()
+    for cliente_id in data.cliente_ids:
+        if cliente_id in vistos:
+            resultados.append(ResultadoAsignacion(cliente_id=cliente_id, ok=False, error="Cliente repetido en la solicitud"))
+        elif cliente_id not in existentes:
+            resultados.append(ResultadoAsignacion(cliente_id=cliente_id, ok=False, error="Cliente no encontrado"))
+        else:
+            resultado = ResultadoAsignacion(cliente_id=cliente_id, ok=True)
+            resultados.append(resultado)
+            validos.append(resultado)
+        vistos.add(cliente_id)
+
+    rutina_ids = insertar_rutinas(
+        session, data, [r.cliente_id for r in validos], entrenador_id=current_user.id
+    )
     session.commit()
-    session.refresh(nueva_rutina)
-    return nueva_rutina
+
+    for resultado, rutina_id in zip(validos, rutina_ids):
+        resultado.rutina_id = rutina_id
+
+    return BulkRutinaResult(creadas=len(rutina_ids), resultados=resultados)
 
 @router.delete("/rutinas/{rutina_id}")
 def delete_rutina(
@@ -205,6 +317,40 @@ def delete_rutina(
     if current_user.role != "admin" and rutina.entrenador_id != current_user.id:
          raise HTTPException(status_code=403, detail="No tienes permiso para eliminar esta rutina")
          
-    session.delete(rutina)
+    eliminar_rutinas(session, [rutina_id])
     session.commit()
     return {"message": "Rutina eliminada correctamente"}
+
+# --- Variantes async (DB_ASYNC) ---
+# Mismo contrato que `get_rutinas_cliente`; main.py monta este router antes que
+# `router`, así que atiende la consulta sin ocupar un hilo del threadpool.
+
+async_router = APIRouter(route_class=TracedRoute)
+
+@async_router.get(
+    "/rutinas/cliente/{cliente_id}",
+    response_model=List[RutinaReadWithDetails],
+    summary="Obtener rutinas de un cliente",
+    description="Devuelve el historial completo de rutinas asignadas a un cliente específico, incluyendo los detalles de días y ejercicios."
+)
+async def get_rutinas_cliente_async(
+    cliente_id: int,
+    request: Request,
+    response: Response,
+    activo: Optional[bool] = Query(None, description="Filtrar por rutinas activas/inactivas"),
+    limit: Optional[int] = Query(None, ge=1, description="Máximo de rutinas a devolver (las más recientes primero)"),
+    session: "AsyncSession" = Depends(get_async_read_session),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    cacheado = conditional(
+        request, response,
+        await table_version_async(session, Rutina, Rutina.id, Rutina.cliente_id == cliente_id)
+    )
+    if cacheado:
+        return cacheado
+
+    rutinas = (await session.exec(_consulta_rutinas(cliente_id, activo, limit))).all()
+    if not rutinas:
+        return []
+    filas = (await session.exec(_consulta_dias_y_detalles([r.id for r in rutinas]))).all()
+    return _armar_rutinas(rutinas, filas)
@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.core.security import get_current_user
+from app.core.tracing import TracedRoute
+from app.models.user import Role, Usuario
+from app.services.exportacion import (
+    PARQUET_DISPONIBLE, columnas, consulta_exportacion, generar_csv, generar_parquet, iterar_lotes
+)
+
+router = APIRouter(route_class=TracedRoute)
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+@router.get("/{entidad}")
+def exportar(
+    entidad: str,
+    formato: str = Query("csv", pattern="^(csv|parquet)$"),
+    desde: Optional[datetime] = Query(None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha máxima (exclusiva)"),
+    cliente_id: Optional[int] = None,
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Exportar `clientes`, `valoraciones` o `rutinas` (una fila por ejercicio)
+    en CSV o Parquet. La respuesta se transmite por lotes, así que la memoria
+    no crece con el tamaño de la tabla. Solo administradores.
+    """
+    if current_user.role != Role.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    try:
+        statement = consulta_exportacion(entidad, desde, hasta, cliente_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    if formato == "parquet":
+        if not PARQUET_DISPONIBLE:
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail="Exportación Parquet no disponible: instale pyarrow"
+            )
+        contenido = generar_parquet(statement, iterar_lotes(statement))
+    else:
+        contenido = generar_csv(columnas(statement), iterar_lotes(statement))
+
+    archivo = f"{entidad}_{datetime.now():%Y%m%d_%H%M%S}.{formato}"
+    return StreamingResponse(
+        contenido,
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{archivo}"'},
+    )
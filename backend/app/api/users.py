@@ -1,12 +1,13 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlmodel import Session, select
-from app.core.db import get_session
+from app.core.db import get_session, get_read_session
+from app.core.pagination import keyset_page, finish_page, count_rows, TOTAL_COUNT_HEADER
 from app.models.user import Usuario, UsuarioCreate, UsuarioRead, UsuarioUpdate, Role
-from app.core.security import get_password_hash
-from app.api.clients import get_current_user  # Reuse auth dependency
+from app.core.security import get_password_hash, get_current_user, invalidate_user_cache
+from app.core.tracing import TracedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 @router.post("/", response_model=UsuarioRead, status_code=status.HTTP_201_CREATED)
 def create_user(
@@ -37,18 +38,45 @@ def create_user(
     session.refresh(db_user)
     return db_user
 
+USER_SORT_COLUMNS = {
+    "id": Usuario.id,
+    "full_name": Usuario.full_name,
+}
+
 @router.get("/", response_model=List[UsuarioRead])
 def read_users(
-    offset: int = 0,
-    limit: int = 100,
-    session: Session = Depends(get_session),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor. Ignored when cursor is given"),
+    limit: int = Query(100, ge=1, le=500),
+    role: Optional[Role] = None,
+    is_active: Optional[bool] = None,
+    sort: str = Query("id", pattern="^(id|full_name)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    include_total: bool = Query(False, description="Also return X-Total-Count for the filtered set"),
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user)
 ):
-    """Get list of users (admin only)"""
+    """Get list of users (admin only), keyset-paginated like the client list"""
     if current_user.role != Role.ADMIN:
         raise HTTPException(status_code=403, detail="Not authorized")
-    
-    users = session.exec(select(Usuario).offset(offset).limit(limit)).all()
+
+    criteria = []
+    if role is not None:
+        criteria.append(Usuario.role == role)
+    if is_active is not None:
+        criteria.append(Usuario.is_active == is_active)
+
+    statement = keyset_page(
+        select(Usuario).where(*criteria),
+        USER_SORT_COLUMNS[sort], Usuario.id, cursor, limit, descending=(order == "desc")
+    )
+    if offset and not cursor:
+        statement = statement.offset(offset)
+    users = finish_page(session.exec(statement).all(), limit, response, sort)
+
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(count_rows(session, Usuario, *criteria))
     return users
 
 @router.get("/me", response_model=UsuarioRead)
@@ -59,7 +87,7 @@ def read_current_user(current_user: Usuario = Depends(get_current_user)):
 @router.get("/{user_id}", response_model=UsuarioRead)
 def read_user(
     user_id: int,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user)
 ):
     """Get a specific user by ID (admin only)"""
@@ -99,6 +127,8 @@ def update_user(
     session.add(db_user)
     session.commit()
     session.refresh(db_user)
+    # Role/activation/password changes must apply to already-issued tokens
+    invalidate_user_cache(user_id)
     return db_user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -121,4 +151,5 @@ def delete_user(
     
     session.delete(db_user)
     session.commit()
+    invalidate_user_cache(user_id)
     return None
@@ -1,55 +1,230 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import json
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import or_, select as sa_select
 from sqlmodel import Session, select
-from typing import List
-from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional
+from datetime import datetime, timedelta
 
-from app.core.db import get_session
-from app.core.security import get_current_user
+from app.core.db import async_read_engine, get_async_read_session, get_session, get_read_session, read_engine
+from app.core.fields import parse_fields, partial_response
+from app.core.http_cache import conditional, row_version, table_version, table_version_async
+from app.core.pagination import keyset_page, finish_page
+from app.core.security import get_current_user, get_current_user_async
+from app.core.tabular import ImportFileError, read_rows
+from app.core.tracing import TracedRoute
 from app.models.valoracion import (
     ValoracionFisica,
     ValoracionFisicaCreate,
     ValoracionFisicaRead,
-    ValoracionFisicaUpdate
+    ValoracionFisicaUpdate,
+    UltimaValoracion,
+    UltimaValoracionRead,
+    ResultadoIngesta
 )
+from app.models.client import ClienteGym
 from app.models.user import Usuario
+from app.services.ultima_valoracion import (
+    SNAPSHOT_METRICAS, registrar_creacion, registrar_actualizacion, registrar_eliminacion
+)
+from app.services.ingesta_bascula import DISPOSICIONES, DisposicionBascula, ingerir_valoraciones
+from app.services.progreso import METRICAS, calcular_progreso, serie_progreso, invalidar_cliente
+
+if TYPE_CHECKING:  # solo se importa con DB_ASYNC (ver app.core.db)
+    from sqlmodel.ext.asyncio.session import AsyncSession
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 def calcular_imc(peso: float, altura: float) -> float:
     """Calcula el Índice de Masa Corporal (IMC)"""
     altura_metros = altura / 100  # Convertir cm a metros
     return round(peso / (altura_metros ** 2), 2)
 
+CAMPOS_VALORACION = list(ValoracionFisicaRead.model_fields)
+CAMPOS_DESCRIPCION = "Campos separados por coma (proyección en el SELECT); por defecto todos"
+
+def _columnas(campos: Optional[List[str]]):
+    """Columnas a seleccionar: solo las pedidas, o la tabla completa"""
+    if campos is None:
+        return [ValoracionFisica.__table__]
+    return [ValoracionFisica.__table__.c[c] for c in campos]
+
 @router.get("/", response_model=List[ValoracionFisicaRead])
 def get_valoraciones(
-    cliente_id: int = None,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    cliente_id: Optional[int] = None,
+    desde: Optional[datetime] = Query(None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha máxima (exclusiva)"),
+    cursor: Optional[str] = Query(None, description="Cursor del encabezado X-Next-Cursor de la página anterior"),
+    limit: int = Query(100, ge=1, le=1000),
+    formato: str = Query("json", pattern="^(json|ndjson)$", description="ndjson transmite todo el rango filtrado por partes"),
+    fields: Optional[str] = Query(None, description=CAMPOS_DESCRIPCION),
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user)
 ):
-    """Obtener todas las valoraciones físicas, opcionalmente filtradas por cliente"""
-    statement = select(ValoracionFisica)
-    
+    """
+    Obtener valoraciones físicas (más recientes primero), opcionalmente filtradas
+    por cliente y rango de fechas.
+
+    - **json**: página de `limit` filas; el cursor de la siguiente página va en
+      el encabezado `X-Next-Cursor`.
+    - **ndjson**: una valoración por línea, leída y escrita en bloques para que la
+      memoria no crezca con el historial. Ignora `limit`.
+
+    Con `fields=peso,imc` solo esas columnas (más `id` y `fecha`) se leen de
+    la base y se envían. En json responde 304 si las valoraciones filtradas no
+    cambiaron desde el ETag del cliente.
+    """
+    campos = parse_fields(fields, CAMPOS_VALORACION, always=("id", "fecha"))
+    columnas = _columnas(campos)
+
+    criterios = _criterios_valoraciones(cliente_id, desde, hasta)
+
+    if formato == "ndjson":
+        statement = _pagina_valoraciones(sa_select(*columnas), criterios, cursor, None)
+        return StreamingResponse(_stream_ndjson(statement), media_type="application/x-ndjson")
+
+    cacheado = conditional(
+        request, response,
+        table_version(session, ValoracionFisica, ValoracionFisica.updated_at, *criterios)
+    )
+    if cacheado:
+        return cacheado
+
+    if campos:
+        statement = _pagina_valoraciones(sa_select(*columnas), criterios, cursor, limit)
+        filas = finish_page(session.execute(statement).all(), limit, response, "fecha")
+        return partial_response([fila._asdict() for fila in filas], response)
+
+    statement = _pagina_valoraciones(select(ValoracionFisica), criterios, cursor, limit)
+    return finish_page(session.exec(statement).all(), limit, response, "fecha")
+
+def _criterios_valoraciones(cliente_id: Optional[int], desde: Optional[datetime], hasta: Optional[datetime]) -> list:
+    criterios = []
     if cliente_id:
-        statement = statement.where(ValoracionFisica.cliente_id == cliente_id)
-    
-    statement = statement.order_by(ValoracionFisica.fecha.desc())
-    valoraciones = session.exec(statement).all()
-    return valoraciones
+        criterios.append(ValoracionFisica.cliente_id == cliente_id)
+    if desde:
+        criterios.append(ValoracionFisica.fecha >= desde)
+    if hasta:
+        criterios.append(ValoracionFisica.fecha < hasta)
+    return criterios
+
+def _pagina_valoraciones(consulta, criterios: list, cursor: Optional[str], limit: Optional[int]):
+    """Más recientes primero, continuando después de `cursor`"""
+    return keyset_page(
+        consulta.where(*criterios), ValoracionFisica.fecha, ValoracionFisica.id, cursor, limit, descending=True
+    )
+
+@router.get("/ultimas", response_model=List[UltimaValoracionRead])
+def get_ultimas_valoraciones(
+    request: Request,
+    response: Response,
+    activo: Optional[bool] = Query(None, description="Filtrar clientes activos/inactivos"),
+    sin_valorar_dias: Optional[int] = Query(None, ge=1, description="Solo clientes sin valoración en los últimos N días (incluye los nunca valorados)"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    session: Session = Depends(get_read_session),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Última valoración de cada cliente, leída del snapshot `ultima_valoracion_cliente`
+    (una fila por cliente, sin recorrer el historial). Paginado por id de cliente.
+    """
+    # Con sin_valorar_dias el resultado depende de la hora actual, no solo de los datos
+    if not sin_valorar_dias:
+        cacheado = conditional(request, response, "-".join([
+            table_version(session, ClienteGym, ClienteGym.updated_at),
+            table_version(session, UltimaValoracion, UltimaValoracion.updated_at),
+        ]))
+        if cacheado:
+            return cacheado
+
+    U = UltimaValoracion
+    statement = (
+        select(
+            ClienteGym.id.label("cliente_id"), ClienteGym.nombre, ClienteGym.apellido,
+            U.valoracion_id, U.fecha, U.total_valoraciones,
+            *[getattr(U, m) for m in SNAPSHOT_METRICAS],
+        )
+        .select_from(ClienteGym)
+        .outerjoin(U, U.cliente_id == ClienteGym.id)
+    )
+    if activo is not None:
+        statement = statement.where(ClienteGym.activo == activo)
+    if sin_valorar_dias:
+        limite = datetime.utcnow() - timedelta(days=sin_valorar_dias)
+        statement = statement.where(or_(U.fecha.is_(None), U.fecha < limite))
+
+    statement = keyset_page(statement, ClienteGym.id, ClienteGym.id, cursor, limit)
+    filas = [
+        UltimaValoracionRead(**{**fila, "total_valoraciones": fila["total_valoraciones"] or 0})
+        for fila in session.execute(statement).mappings()
+    ]
+    return finish_page(filas, limit, response, "cliente_id", id_attr="cliente_id")
+
+STREAM_CHUNK_SIZE = 500
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value)!r}")
+
+def _stream_ndjson(statement):
+    """
+    Genera líneas NDJSON en bloques de STREAM_CHUNK_SIZE filas.
+
+    Usa su propia sesión de lectura porque el generador sigue corriendo después
+    de que el endpoint retorna, y lee filas de columnas (sin hidratar objetos ORM).
+    """
+    with Session(read_engine) as session:
+        result = session.execute(statement.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        for partition in result.mappings().partitions():
+            yield "".join(
+                json.dumps(dict(row), default=_json_default, ensure_ascii=False) + "\n"
+                for row in partition
+            )
+
+async def _stream_ndjson_async(statement):
+    """`_stream_ndjson` sobre el motor aiosqlite (DB_ASYNC)"""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    async with AsyncSession(async_read_engine) as session:
+        result = await session.stream(statement.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        async for partition in result.mappings().partitions():
+            yield "".join(
+                json.dumps(dict(row), default=_json_default, ensure_ascii=False) + "\n"
+                for row in partition
+            )
 
 @router.get("/{valoracion_id}", response_model=ValoracionFisicaRead)
 def get_valoracion(
     valoracion_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=CAMPOS_DESCRIPCION),
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user)
 ):
     """Obtener una valoración física específica"""
-    valoracion = session.get(ValoracionFisica, valoracion_id)
-    if not valoracion:
+    campos = parse_fields(fields, CAMPOS_VALORACION)
+    version = row_version(session, ValoracionFisica.updated_at, ValoracionFisica.id == valoracion_id)
+    if version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Valoración no encontrada"
         )
-    return valoracion
+    cacheado = conditional(request, response, version)
+    if cacheado:
+        return cacheado
+    if campos:
+        fila = session.execute(
+            sa_select(*_columnas(campos)).where(ValoracionFisica.id == valoracion_id)
+        ).one()
+        return partial_response(fila._asdict(), response)
+    return session.get(ValoracionFisica, valoracion_id)
 
 @router.post("/", response_model=ValoracionFisicaRead, status_code=status.HTTP_201_CREATED)
 def create_valoracion(
@@ -68,10 +243,45 @@ def create_valoracion(
     )
     
     session.add(valoracion)
+    session.flush()
+    registrar_creacion(session, valoracion)
     session.commit()
     session.refresh(valoracion)
+    invalidar_cliente(valoracion.cliente_id)
     return valoracion
 
+@router.post("/importar-bascula", response_model=ResultadoIngesta)
+def importar_bascula(
+    file: UploadFile = File(..., description="Exportación CSV o XLSX de la báscula"),
+    disposicion: str = Query("generica", description=f"Disposición predefinida: {', '.join(DISPOSICIONES)}"),
+    mapeo: Optional[str] = Form(None, description="DisposicionBascula en JSON; reemplaza a `disposicion`"),
+    session: Session = Depends(get_session),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Cargar valoraciones desde la exportación de una báscula de bioimpedancia.
+    Las filas ya cargadas (mismo cliente y fecha) se omiten, así que subir el
+    mismo archivo dos veces no duplica valoraciones.
+    """
+    if mapeo:
+        try:
+            layout = DisposicionBascula.model_validate_json(mapeo)
+        except ValidationError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Mapeo no válido: {[err['msg'] for err in e.errors()]}")
+    elif disposicion in DISPOSICIONES:
+        layout = DISPOSICIONES[disposicion]
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Disposición desconocida: {disposicion}"
+        )
+    try:
+        return ingerir_valoraciones(session, read_rows(file.file, file.filename), layout)
+    except ImportFileError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"No se pudo leer el archivo: {e}")
+
 @router.patch("/{valoracion_id}", response_model=ValoracionFisicaRead)
 def update_valoracion(
     valoracion_id: int,
@@ -99,8 +309,10 @@ def update_valoracion(
     valoracion.updated_at = datetime.utcnow()
     
     session.add(valoracion)
+    registrar_actualizacion(session, valoracion)
     session.commit()
     session.refresh(valoracion)
+    invalidar_cliente(valoracion.cliente_id)
     return valoracion
 
 @router.delete("/{valoracion_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -118,54 +330,102 @@ def delete_valoracion(
         )
     
     session.delete(valoracion)
+    registrar_eliminacion(session, valoracion)
     session.commit()
+    invalidar_cliente(valoracion.cliente_id)
     return None
 
 @router.get("/cliente/{cliente_id}/progreso", response_model=dict)
 def get_progreso_cliente(
     cliente_id: int,
-    session: Session = Depends(get_session),
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Métricas separadas por coma; por defecto todas"),
+    session: Session = Depends(get_read_session),
     current_user: Usuario = Depends(get_current_user)
 ):
-    """Obtener el progreso de un cliente (comparación entre valoraciones)"""
-    statement = select(ValoracionFisica).where(
-        ValoracionFisica.cliente_id == cliente_id
-    ).order_by(ValoracionFisica.fecha.asc())
-    
-    valoraciones = session.exec(statement).all()
-    
-    if len(valoraciones) < 2:
-        return {
-            "mensaje": "Se necesitan al menos 2 valoraciones para calcular el progreso",
-            "valoraciones_count": len(valoraciones)
-        }
-    
-    primera = valoraciones[0]
-    ultima = valoraciones[-1]
-    
-    progreso = {
-        "primera_valoracion": {
-            "fecha": primera.fecha,
-            "peso": primera.peso,
-            "imc": primera.imc,
-            "porcentaje_grasa": primera.porcentaje_grasa,
-            "masa_muscular": primera.masa_muscular
-        },
-        "ultima_valoracion": {
-            "fecha": ultima.fecha,
-            "peso": ultima.peso,
-            "imc": ultima.imc,
-            "porcentaje_grasa": ultima.porcentaje_grasa,
-            "masa_muscular": ultima.masa_muscular
-        },
-        "cambios": {
-            "peso": round(ultima.peso - primera.peso, 2),
-            "imc": round((ultima.imc or 0) - (primera.imc or 0), 2),
-            "porcentaje_grasa": round((ultima.porcentaje_grasa or 0) - (primera.porcentaje_grasa or 0), 2) if primera.porcentaje_grasa and ultima.porcentaje_grasa else None,
-            "masa_muscular": round((ultima.masa_muscular or 0) - (primera.masa_muscular or 0), 2) if primera.masa_muscular and ultima.masa_muscular else None
-        },
-        "total_valoraciones": len(valoraciones),
-        "dias_transcurridos": (ultima.fecha - primera.fecha).days
-    }
-    
-    return progreso
+    """
+    Obtener el progreso de un cliente: primer/último valor, mínimo, máximo,
+    cambio y tendencia por 30 días de todas las métricas numéricas (o solo
+    las de `fields`, que son las únicas que se agregan en SQL).
+    """
+    metricas = parse_fields(fields, METRICAS, always=())
+    cacheado = conditional(request, response, _version_cliente(session, cliente_id))
+    if cacheado:
+        return cacheado
+    return calcular_progreso(session, cliente_id, metricas)
+
+def _version_cliente(session: Session, cliente_id: int) -> str:
+    """Validador de todas las valoraciones de un cliente (conteo + último updated_at)"""
+    return table_version(
+        session, ValoracionFisica, ValoracionFisica.updated_at, ValoracionFisica.cliente_id == cliente_id
+    )
+
+METRICAS_SERIE_DEFECTO = "peso,imc,porcentaje_grasa,masa_muscular"
+
+@router.get("/cliente/{cliente_id}/progreso/serie", response_model=dict)
+def get_serie_progreso(
+    cliente_id: int,
+    request: Request,
+    response: Response,
+    metricas: str = Query(METRICAS_SERIE_DEFECTO, description="Métricas separadas por coma"),
+    bucket: str = Query("month", pattern="^(week|month)$"),
+    session: Session = Depends(get_read_session),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """Serie de progreso promediada por semana o mes, lista para graficar"""
+    solicitadas = [m.strip() for m in metricas.split(",") if m.strip()]
+    invalidas = [m for m in solicitadas if m not in METRICAS]
+    if invalidas or not solicitadas:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Métricas no válidas: {invalidas}"
+        )
+    cacheado = conditional(request, response, _version_cliente(session, cliente_id))
+    if cacheado:
+        return cacheado
+    return serie_progreso(session, cliente_id, solicitadas, bucket)
+
+# --- Variantes async (DB_ASYNC) ---
+# Mismo contrato que `get_valoraciones`; main.py monta este router antes que
+# `router`, así que atiende el listado sin ocupar un hilo del threadpool.
+
+async_router = APIRouter(route_class=TracedRoute)
+
+@async_router.get("/", response_model=List[ValoracionFisicaRead])
+async def get_valoraciones_async(
+    request: Request,
+    response: Response,
+    cliente_id: Optional[int] = None,
+    desde: Optional[datetime] = Query(None, description="Fecha mínima (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha máxima (exclusiva)"),
+    cursor: Optional[str] = Query(None, description="Cursor del encabezado X-Next-Cursor de la página anterior"),
+    limit: int = Query(100, ge=1, le=1000),
+    formato: str = Query("json", pattern="^(json|ndjson)$", description="ndjson transmite todo el rango filtrado por partes"),
+    fields: Optional[str] = Query(None, description=CAMPOS_DESCRIPCION),
+    session: "AsyncSession" = Depends(get_async_read_session),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    """Obtener valoraciones físicas con el driver async (ver `get_valoraciones`)"""
+    campos = parse_fields(fields, CAMPOS_VALORACION, always=("id", "fecha"))
+    columnas = _columnas(campos)
+    criterios = _criterios_valoraciones(cliente_id, desde, hasta)
+
+    if formato == "ndjson":
+        statement = _pagina_valoraciones(sa_select(*columnas), criterios, cursor, None)
+        return StreamingResponse(_stream_ndjson_async(statement), media_type="application/x-ndjson")
+
+    cacheado = conditional(
+        request, response,
+        await table_version_async(session, ValoracionFisica, ValoracionFisica.updated_at, *criterios)
+    )
+    if cacheado:
+        return cacheado
+
+    if campos:
+        statement = _pagina_valoraciones(sa_select(*columnas), criterios, cursor, limit)
+        filas = finish_page((await session.execute(statement)).all(), limit, response, "fecha")
+        return partial_response([fila._asdict() for fila in filas], response)
+
+    statement = _pagina_valoraciones(select(ValoracionFisica), criterios, cursor, limit)
+    return finish_page((await session.exec(statement)).all(), limit, response, "fecha")
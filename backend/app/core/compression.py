@@ -0,0 +1,145 @@
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # Optional: without it responses are only gzipped
+    import brotli
+except ImportError:
+    brotli = None
+
+# Only API payloads; the static bundle precompresses its own files
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/csv")
+
+def negotiate_encoding(accept_encoding: str, available) -> Optional[str]:
+    """Pick br over gzip among the codings the client accepts with q > 0"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(coding.strip().lower())
+    for coding in ("br", "gzip"):
+        if coding in available and (coding in accepted or "*" in accepted):
+            return coding
+    return None
+
+class _Compressor:
+    """Incremental gzip or brotli stream with the same two-call interface"""
+
+    def __init__(self, coding: str, gzip_level: int, brotli_quality: int):
+        if coding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+            self._gz = None
+        else:
+            self._br = None
+            # wbits=31: gzip container
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress and flush, so a streamed chunk reaches the client now"""
+        if self._br:
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self._br:
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_FINISH)
+
+class CompressionMiddleware:
+    """Negotiated gzip/brotli compression for JSON (and NDJSON/CSV) responses.
+
+    Like Starlette's GZipMiddleware, but also speaks brotli when the `brotli`
+    package is installed, and leaves alone anything that is already encoded,
+    partial (206) or bodiless. Whole responses below `minimum_size` are sent
+    as-is; streamed ones are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.available = {"gzip", "br"} if brotli is not None else {"gzip"}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.available)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, coding, send).run(self.app, scope, receive)
+
+class _CompressedResponder:
+    def __init__(self, middleware: CompressionMiddleware, coding: str, send: Send):
+        self.middleware = middleware
+        self.coding = coding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.active: Optional[bool] = None  # decided on the first body message
+        self.compressor: Optional[_Compressor] = None
+
+    async def run(self, app: ASGIApp, scope: Scope, receive: Receive) -> None:
+        await app(scope, receive, self.on_send)
+
+    def _eligible(self, headers: Headers) -> bool:
+        status = self.start["status"]
+        return (
+            200 <= status < 300 and status not in (204, 206)
+            and "content-encoding" not in headers
+            and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+        )
+
+    async def on_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.active is False:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.active is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            self.active = self._eligible(Headers(raw=self.start["headers"]))
+            if self.active and not more_body and len(body) < self.middleware.minimum_size:
+                self.active = False
+            if not self.active:
+                await self.send(self.start)
+                await self.send(message)
+                return
+
+            headers["Content-Encoding"] = self.coding
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers:
+                # A different representation needs a different (weak) validator
+                etag = headers["etag"]
+                headers["ETag"] = etag if etag.startswith("W/") else f"W/{etag}"
+            self.compressor = _Compressor(self.coding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            if more_body:
+                del headers["Content-Length"]
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": self.compressor.compress(body), "more_body": True})
+            else:
+                compressed = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        if more_body:
+            await self.send({"type": "http.response.body", "body": self.compressor.compress(body), "more_body": True})
+        else:
+            await self.send({"type": "http.response.body", "body": self.compressor.finish(body)})
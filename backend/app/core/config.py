@@ -6,4 +6,56 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7 # 7 Days for offline app convenience
 
+    # Authenticated-principal cache (token -> Usuario snapshot)
+    AUTH_CACHE_SIZE: int = 512
+    AUTH_CACHE_TTL_SECONDS: int = 300
+
+    # Password hashing: bcrypt cost factor and the dedicated executor that runs it.
+    # Changing BCRYPT_ROUNDS rehashes each user's password on their next login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+
+    # SQLite engine profile: "production" applies WAL + tuned pragmas,
+    # "legacy" keeps the bare pysqlite defaults (useful for comparisons).
+    DB_FILE: str = "gym.db"
+    DB_PROFILE: str = "production"
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    DB_CACHE_SIZE_KB: int = 16384
+    DB_MMAP_SIZE: int = 128 * 1024 * 1024
+    DB_TEMP_STORE: str = "MEMORY"
+    # Writer pool: SQLite has a single writer, so a few connections are enough
+    DB_POOL_SIZE: int = 4
+    DB_MAX_OVERFLOW: int = 4
+    DB_POOL_TIMEOUT: int = 30
+    # Read-only pool used by GET endpoints (WAL lets these run beside the writer)
+    DB_READ_POOL_SIZE: int = 8
+    DB_READ_MAX_OVERFLOW: int = 8
+    # Opt-in async stack (needs aiosqlite): the hot read endpoints and login run
+    # as async handlers on aiosqlite engines instead of holding threadpool
+    # threads. Scripts and the other endpoints keep using the sync engines.
+    DB_ASYNC: bool = False
+
+    # Prometheus-format /metrics (per-route HTTP histograms, SQL and pool stats)
+    METRICS_ENABLED: bool = True
+
+    # Per-request tracing: the fraction of requests traced (0 turns it off).
+    # Traced requests slower than TRACE_SLOW_MS are written, span tree and SQL
+    # included, to a rotating JSONL file (a relative path is taken from the
+    # database's directory); GET /api/admin/traces lists the slowest of the
+    # last TRACE_RECENT_SIZE.
+    TRACE_SAMPLE_RATE: float = 0.1
+    TRACE_SLOW_MS: float = 500
+    TRACE_LOG_FILE: str = "slow_requests.jsonl"
+    TRACE_LOG_MAX_BYTES: int = 5 * 1024 * 1024
+    TRACE_LOG_BACKUPS: int = 3
+    TRACE_RECENT_SIZE: int = 200
+
+    # Frontend files smaller than this are served uncompressed
+    STATIC_COMPRESS_MIN_BYTES: int = 1024
+    # Negotiated gzip/brotli for API responses (JSON, NDJSON, CSV)
+    RESPONSE_COMPRESS_MIN_BYTES: int = 1024
+    RESPONSE_GZIP_LEVEL: int = 6
+    RESPONSE_BROTLI_QUALITY: int = 4
+
 settings = Settings()
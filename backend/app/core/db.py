@@ -1,10 +1,97 @@
+import importlib.util
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import SQLModel, create_engine, Session
 
-sqlite_file_name = "gym.db"
+from app.core.config import settings
+
+# SQLAlchemy's asyncio extension (and greenlet, which it runs on) is only
+# imported once DB_ASYNC builds the async stack, so the sync server, the
+# scripts and the bundle work without them
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+sqlite_file_name = settings.DB_FILE
 sqlite_url = f"sqlite:///{sqlite_file_name}"
+async_sqlite_url = f"sqlite+aiosqlite:///{sqlite_file_name}"
+
+ASYNC_DRIVER_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in ("aiosqlite", "greenlet"))
 
 connect_args = {"check_same_thread": False}
-engine = create_engine(sqlite_url, connect_args=connect_args)
+
+def _apply_pragmas(dbapi_connection, read_only: bool) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        if not read_only:
+            # journal_mode is persistent in the file; only the writer sets it
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.DB_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.DB_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.DB_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA temp_store={settings.DB_TEMP_STORE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+def build_engine(url: str = sqlite_url, profile: str = None, read_only: bool = False) -> Engine:
+    """Create a SQLite engine for the given profile.
+
+    - "production": WAL journal, synchronous=NORMAL, busy_timeout, page cache,
+      mmap and in-memory temp store on every connection, with a sized pool.
+    - "legacy": plain pysqlite defaults (the original behaviour).
+    """
+    profile = profile or settings.DB_PROFILE
+    if profile == "legacy":
+        return create_engine(url, connect_args=connect_args)
+    if profile != "production":
+        raise ValueError(f"Unknown DB_PROFILE: {profile}")
+
+    new_engine = create_engine(url, connect_args=connect_args, **_pool_args(read_only))
+
+    @event.listens_for(new_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, read_only)
+
+    return new_engine
+
+def build_async_engine(url: str = async_sqlite_url, profile: str = None, read_only: bool = False) -> "AsyncEngine":
+    """aiosqlite counterpart of `build_engine`, with the same profiles, pools and pragmas"""
+    if not ASYNC_DRIVER_AVAILABLE:
+        raise RuntimeError("DB_ASYNC requires the aiosqlite driver and greenlet: pip install aiosqlite greenlet")
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    profile = profile or settings.DB_PROFILE
+    if profile == "legacy":
+        return create_async_engine(url)
+    if profile != "production":
+        raise ValueError(f"Unknown DB_PROFILE: {profile}")
+
+    new_engine = create_async_engine(url, **_pool_args(read_only))
+
+    # aiosqlite's adapted connection accepts the same synchronous cursor calls here
+    @event.listens_for(new_engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, read_only)
+
+    return new_engine
+
+def _pool_args(read_only: bool) -> dict:
+    if read_only:
+        pool_size, max_overflow = settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW
+    else:
+        pool_size, max_overflow = settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    return {"pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": settings.DB_POOL_TIMEOUT}
+
+engine = build_engine()
+read_engine = build_engine(read_only=True)
+
+# Only built when the async stack is enabled, so aiosqlite stays optional
+async_engine = build_async_engine() if settings.DB_ASYNC else None
+async_read_engine = build_async_engine(read_only=True) if settings.DB_ASYNC else None
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
@@ -12,3 +99,35 @@ def create_db_and_tables():
 def get_session():
     with Session(engine) as session:
         yield session
+
+def get_read_session():
+    """Session on the read-only pool, for GET endpoints.
+
+    Connections run with `query_only`, so any accidental write fails loudly
+    instead of contending for the writer lock.
+    """
+    with Session(read_engine) as session:
+        yield session
+
+async def get_async_session():
+    """Async session on the writer pool (DB_ASYNC only).
+
+    `expire_on_commit=False` because reloading expired attributes would need
+    implicit I/O, which async sessions can't do.
+    """
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+async def get_async_read_session():
+    """Async session on the read-only pool (DB_ASYNC only)"""
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    async with AsyncSession(async_read_engine, expire_on_commit=False) as session:
+        yield session
+
+async def dispose_async_engines() -> None:
+    for async_db in (async_engine, async_read_engine):
+        if async_db is not None:
+            await async_db.dispose()
@@ -0,0 +1,28 @@
+from typing import Iterable, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], always: Sequence[str] = ("id",)) -> Optional[List[str]]:
+    """Parse a `fields=a,b,c` sparse fieldset.
+
+    Returns the requested names (with `always` prepended, deduplicated, in
+    request order), or None when no projection was asked for. Unknown names
+    are a 400 so typos don't silently return empty objects.
+    """
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    allowed = set(allowed)
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*always, *requested]))
+
+def partial_response(content, response: Response) -> JSONResponse:
+    """Return a projected body, bypassing `response_model` (which would demand
+    every field) but keeping headers already set on the injected `response`
+    (ETag, X-Next-Cursor, ...)."""
+    headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
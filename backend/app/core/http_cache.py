@@ -0,0 +1,69 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func, select as sa_select
+
+# Browsers must revalidate, but a matching ETag makes that a bodiless 304
+REVALIDATE = "private, no-cache"
+
+def make_etag(version: str) -> str:
+    return f'W/"{version}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already holds `etag` (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+def set_validators(response: Response, etag: str, cache_control: str = REVALIDATE) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+def not_modified(etag: str, cache_control: str = REVALIDATE) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def conditional(request: Request, response: Response, version: str) -> Optional[Response]:
+    """Set the validators on `response`; return a 304 response if the client is current"""
+    etag = make_etag(version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
+    return None
+
+def table_version(session, model, column, *criteria) -> str:
+    """Cheap validator for a set of rows: COUNT(*) plus MAX(column).
+
+    `column` should be a monotonic, indexed column (updated_at, or the id for
+    append-only tables) so MAX is an index seek. The count catches deletions.
+    """
+    count, latest = session.execute(_table_version_query(model, column, criteria)).one()
+    return _digest(model.__tablename__, count, latest)
+
+async def table_version_async(session, model, column, *criteria) -> str:
+    """`table_version` on an AsyncSession"""
+    count, latest = (await session.execute(_table_version_query(model, column, criteria))).one()
+    return _digest(model.__tablename__, count, latest)
+
+def row_version(session, column, *criteria) -> Optional[str]:
+    """Validator for a single row (e.g. its updated_at); None if the row doesn't exist"""
+    value = session.execute(sa_select(column).where(*criteria)).scalar_one_or_none()
+    return None if value is None else _digest(column.key, value)
+
+async def row_version_async(session, column, *criteria) -> Optional[str]:
+    """`row_version` on an AsyncSession"""
+    value = (await session.execute(sa_select(column).where(*criteria))).scalar_one_or_none()
+    return None if value is None else _digest(column.key, value)
+
+def _table_version_query(model, column, criteria):
+    statement = sa_select(func.count(), func.max(column)).select_from(model)
+    if criteria:
+        statement = statement.where(*criteria)
+    return statement
+
+def _digest(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,292 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+A small registry instead of prometheus_client: the app runs as a single
+process (also inside the PyInstaller bundle), so counters and histograms are
+plain dicts guarded by a lock, and values that already live elsewhere (pool
+occupancy, cache stats) are read only when `/metrics` is scraped.
+
+- `MetricsMiddleware` records per-route request counts, latency and
+  response-size histograms and in-flight requests. The route label is the
+  path template (`/api/clients/{client_id}`), never the concrete path, so
+  the number of series stays bounded.
+- `instrument_engine` hooks SQLAlchemy engine events for query counts and
+  time, and times pool checkouts (the wait for a free connection).
+
+Recording a request costs a few microseconds (a perf_counter pair, a bisect
+per histogram and one lock per metric); each SQL statement adds about 3 µs,
+mostly SQLAlchemy's event dispatch. METRICS_ENABLED=0 removes all of it.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+POOL_WAIT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class _Value(_Metric):
+    """A value per label set, or a callback read at scrape time (`collect` yields (labels, value))"""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 collect: Optional[Callable[[], Iterable[Tuple[LabelValues, float]]]] = None):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def _add(self, amount: float, label_values: LabelValues) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        if self._collect is not None:
+            items = list(self._collect())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, values)} {_format_value(v)}" for values, v in items
+        ]
+
+class Counter(_Value):
+    kind = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._add(amount, label_values)
+
+class Gauge(_Value):
+    kind = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def add(self, amount: float, *label_values: str) -> None:
+        self._add(amount, label_values)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(values, list(counts), total) for values, (counts, total) in self._series.items()]
+        lines = self.header()
+        for values, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by method, route template and status code", ("method", "route", "status")
+))
+http_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte", ("method", "route")
+))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size as sent (after compression)", ("method", "route"), SIZE_BUCKETS
+))
+http_in_flight = registry.register(Gauge("http_requests_in_flight", "Requests currently being served"))
+http_in_flight.set(0)
+
+db_queries = registry.register(Counter("db_queries_total", "SQL statements executed", ("engine",)))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Statement execution time (cursor execute)", ("engine",), QUERY_BUCKETS
+))
+db_pool_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time to get a pooled connection (waiting for one or opening it)",
+    ("engine",), POOL_WAIT_BUCKETS,
+))
+db_pool_timeouts = registry.register(Counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ("engine",)
+))
+
+_instrumented_pools: Dict[str, object] = {}
+
+def _pool_stats() -> Iterable[Tuple[LabelValues, float]]:
+    for name, pool in list(_instrumented_pools.items()):
+        # QueuePool (and its async adaptation); the legacy profile's pools may lack these
+        for state, getter in (("checked_out", "checkedout"), ("idle", "checkedin"), ("overflow", "overflow")):
+            if hasattr(pool, getter):
+                yield (name, state), getattr(pool, getter)()
+
+registry.register(Gauge(
+    "db_pool_connections", "Pooled connections by state (overflow can be negative: unused overflow slots)",
+    ("engine", "state"), collect=_pool_stats,
+))
+
+_process_start = time.time()
+registry.register(Gauge(
+    "process_start_time_seconds", "Unix time the process started", collect=lambda: [((), _process_start)]
+))
+
+def register_cache(name: str, cache) -> None:
+    """Expose a `TTLCache`'s hit/miss counters and size (read from `stats()` at scrape time)"""
+    for suffix, key, kind, help in (
+        ("hits_total", "hits", Counter, "lookups served from the cache"),
+        ("misses_total", "misses", Counter, "lookups that missed or found an expired entry"),
+        ("entries", "size", Gauge, "entries currently held"),
+    ):
+        registry.register(kind(
+            f"{name}_cache_{suffix}", f"{name} cache: {help}", collect=lambda key=key: [((), cache.stats()[key])]
+        ))
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Count and time every statement and pool checkout of `engine` (sync or `AsyncEngine.sync_engine`)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        db_queries.inc(name)
+        db_query_duration.observe(time.perf_counter() - context._metrics_started, name)
+
+    # No pool event fires before a checkout starts waiting, so the pool's own
+    # connect() is timed instead (Engine.raw_connection calls it)
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        except PoolTimeoutError:
+            db_pool_timeouts.inc(name)
+            raise
+        finally:
+            db_pool_wait.observe(time.perf_counter() - started, name)
+
+    pool.connect = timed_connect
+    _instrumented_pools[name] = pool
+
+# id(route) -> include prefix (routes live as long as the app)
+_route_prefixes: Dict[int, str] = {}
+
+def route_template(scope: Scope) -> str:
+    """Path template of the matched route, prefix included, or "unmatched"
+
+    The route in the scope may carry only its path within its router (without
+    the include prefix), so the prefix is taken from the request path the
+    first time each route is hit.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return "unmatched"
+    prefix = _route_prefixes.get(id(route))
+    if prefix is None:
+        path = scope["path"]
+        prefix = ""
+        regex = getattr(route, "path_regex", None)
+        if regex is not None and not regex.match(path):
+            for index in (i for i, char in enumerate(path) if char == "/" and i):
+                if regex.match(path[index:]):
+                    prefix = path[:index]
+                    break
+        _route_prefixes[id(route)] = prefix
+    return prefix + path_format
+
+class MetricsMiddleware:
+    """Per-route request metrics; add it last so it wraps every other middleware"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.add(1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.add(-1)
+            method, route = scope["method"], route_template(scope)
+            http_requests.inc(method, route, str(status))
+            http_duration.observe(elapsed, method, route)
+            http_response_size.observe(size, method, route)
@@ -0,0 +1,86 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import func, select as sa_select, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Opaque keyset cursor for the row (sort_value, id)"""
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort_column) -> Tuple[Any, int]:
+    """Inverse of `encode_cursor`, converting the value back to the column's Python type"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(sort_value, str):
+            python_type = _python_type(sort_column)
+            if python_type is datetime:
+                sort_value = datetime.fromisoformat(sort_value)
+            elif python_type is date:
+                sort_value = date.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:  # e.g. sqlmodel's AutoString
+        return str
+
+def keyset_page(statement, sort_column, id_column, cursor: Optional[str], limit: Optional[int], descending: bool = False):
+    """Order `statement` by (sort_column, id) and continue after `cursor`.
+
+    The comparison uses a row value, `(sort, id) > (:v, :id)`, which SQLite
+    resolves as a range seek on a matching (sort, id) index, so the cost of a
+    page does not depend on how deep it is. Fetches `limit + 1` rows so the
+    caller can tell whether there is a next page; `limit=None` leaves the
+    statement unbounded (for streaming).
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort_column)
+        key = tuple_(sort_column, id_column)
+        bound = tuple_(sort_value, row_id)
+        statement = statement.where(key < bound if descending else key > bound)
+    if sort_column is id_column:
+        order = [id_column.desc() if descending else id_column.asc()]
+    elif descending:
+        order = [sort_column.desc(), id_column.desc()]
+    else:
+        order = [sort_column.asc(), id_column.asc()]
+    statement = statement.order_by(*order)
+    if limit is not None:
+        statement = statement.limit(limit + 1)
+    return statement
+
+def finish_page(rows, limit: int, response: Response, sort_attr: str, id_attr: str = "id") -> list:
+    """Trim the look-ahead row and expose the next cursor as a response header"""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_attr), getattr(last, id_attr))
+    return rows
+
+def count_rows(session, model, *criteria) -> int:
+    """COUNT(*) with the same filters as the page (answered from the filter index)"""
+    return session.execute(_count_query(model, criteria)).scalar_one()
+
+async def count_rows_async(session, model, *criteria) -> int:
+    """`count_rows` on an AsyncSession"""
+    return (await session.execute(_count_query(model, criteria))).scalar_one()
+
+def _count_query(model, criteria):
+    statement = sa_select(func.count()).select_from(model)
+    if criteria:
+        statement = statement.where(*criteria)
+    return statement
@@ -0,0 +1,307 @@
+"""On-demand statistical sampling profiler for the running server.
+
+While a profile is being taken, a daemon thread snapshots every thread's
+Python stack with `sys._current_frames()` each interval and counts identical
+stacks; nothing runs otherwise. It's pure Python (no native helper, no
+signals), so it behaves the same under uvicorn in development and inside the
+PyInstaller bundle started by `run.py`. Threads parked in a wait (idle
+threadpool workers, the event loop in `select`) are skipped unless `idle`.
+
+Per-request mode (`route`) keeps only samples taken inside requests whose
+route template or path matches the fnmatch pattern:
+
+- On the event loop: stacks that pass through that request's
+  `ProfilingMiddleware` frame, which covers async handlers and dependencies.
+- In the threadpool: stacks under a sync endpoint, which `TracedRoute`
+  calls through `call_profiled`. Sync dependencies run on a threadpool hop of
+  their own and aren't attributed.
+
+Output is collapsed stacks (`thread;outer;...;leaf count`, for flamegraph.pl,
+inferno or speedscope) or speedscope's JSON format.
+"""
+import dis
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from contextvars import ContextVar
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics import route_template
+
+# (file name, function) of the frames a parked thread sits in, with the
+# blocking method when that same frame also calls into C for real work (the
+# frame is idle only on that call's line); None: the frame only ever waits
+IDLE_FRAMES = {
+    ("threading.py", "wait"): None,                   # Condition.wait: threadpool workers, executors
+    ("threading.py", "_wait_for_tstate_lock"): None,  # Thread.join
+    ("selectors.py", "select"): None,                 # event loop with nothing to do
+    ("selectors.py", "_select"): None,                # SelectSelector (Windows)
+    ("windows_events.py", "_poll"): None,             # proactor event loop (Windows)
+    ("thread.py", "_worker"): "get",                  # ThreadPoolExecutor on its queue
+    ("core.py", "_connection_worker_thread"): "get",  # aiosqlite's connection thread (DB_ASYNC)
+}
+
+# GIL switch interval while a profile runs (see SamplingProfiler.start)
+SWITCH_INTERVAL = 0.0005
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+def _path_prefixes() -> List[str]:
+    roots = [os.environ.get("APP_BASE_DIR", ""), *sys.path]
+    prefixes = {os.path.abspath(root) for root in roots if root and os.path.isdir(root)}
+    return sorted(prefixes, key=len, reverse=True)
+
+def _idle_lines(code):
+    """True/False, or the lines where `code` makes its blocking call (read from the bytecode)"""
+    call = IDLE_FRAMES.get((os.path.basename(code.co_filename), code.co_name), False)
+    if call is None or call is False:
+        return call is None
+    starts = sorted(dis.findlinestarts(code))
+    offsets = [offset for offset, _ in starts]
+    return frozenset(
+        starts[bisect_right(offsets, instruction.offset) - 1][1]
+        for instruction in dis.get_instructions(code)
+        if instruction.argval == call and instruction.opname in ("LOAD_ATTR", "LOAD_METHOD")
+    )
+
+def _thread_label(name: str) -> str:
+    # "Thread-3 (target)" -> "target"; pool threads differ only by number
+    # ("AnyIO worker thread", "ThreadPoolExecutor-0_3")
+    match = re.fullmatch(r"Thread-\d+ \((.+)\)", name)
+    if match:
+        return match.group(1)
+    return re.sub(r"[-_ ]?\d+(_\d+)?$", "", name) or name
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.01, idle: bool = False, route: Optional[str] = None):
+        self.interval = interval
+        self.idle = idle
+        self.route = route
+        # (thread name, code objects leaf first) -> samples
+        self.counts: Counter = Counter()
+        self.ticks = 0
+        self.requests = 0
+        self.elapsed = 0.0
+        self._markers: Dict[object, Counter] = {}
+        self._markers_lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+        self._idle_codes: Dict[object, object] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    # --- sampling ---
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        started = time.perf_counter()
+        next_tick = started
+        while not self._stop.wait(max(0.0, next_tick - time.perf_counter())):
+            with self._counts_lock:
+                self._sample(own)
+            self.ticks += 1
+            # Fall behind rather than burst when a tick couldn't get the GIL in time
+            next_tick = max(next_tick + self.interval, time.perf_counter())
+        self.elapsed = time.perf_counter() - started
+
+    def _is_idle(self, frame) -> bool:
+        code = frame.f_code
+        idle = self._idle_codes.get(code)
+        if idle is None:
+            idle = self._idle_codes[code] = _idle_lines(code)
+        return idle is True or (idle is not False and frame.f_lineno in idle)
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._thread_names.get(ident)
+        if name is None:
+            self._thread_names = {t.ident: _thread_label(t.name) for t in threading.enumerate()}
+            name = self._thread_names.setdefault(ident, f"thread {ident}")
+        return name
+
+    def _sample(self, own: int) -> None:
+        markers = self._markers
+        for ident, frame in sys._current_frames().items():
+            if ident == own or (not self.idle and self._is_idle(frame)):
+                continue
+            codes = []
+            target = None
+            while frame is not None:
+                codes.append(frame.f_code)
+                if markers and target is None:
+                    target = markers.get(frame)
+                frame = frame.f_back
+            if target is None:
+                if self.route is not None:
+                    continue
+                target = self.counts
+            target[(self._thread_name(ident), tuple(codes))] += 1
+
+    def start(self) -> None:
+        # The sampler needs the GIL to look at the other threads; with the
+        # default 5 ms switch interval it mostly got it when a thread released
+        # it for I/O, piling samples on those calls. A short interval while
+        # profiling lets samples land where the time actually goes.
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, SWITCH_INTERVAL))
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    # --- per-request mode ---
+
+    def mark(self, frame, samples: Counter) -> None:
+        """Samples of stacks passing through `frame` go to `samples`"""
+        with self._markers_lock:
+            markers = dict(self._markers)
+            markers[frame] = samples
+            self._markers = markers
+
+    def unmark(self, frame) -> None:
+        with self._markers_lock:
+            markers = dict(self._markers)
+            markers.pop(frame, None)
+            self._markers = markers
+
+    def matches(self, scope: Scope) -> bool:
+        return fnmatchcase(route_template(scope), self.route) or fnmatchcase(scope["path"], self.route)
+
+    def add_request(self, samples: Counter) -> None:
+        with self._counts_lock:
+            self.counts.update(samples)
+            self.requests += 1
+
+    # --- output ---
+
+    @property
+    def tick_ms(self) -> float:
+        """Measured time per sample (nominally `interval`)"""
+        return self.elapsed / self.ticks * 1000 if self.ticks else self.interval * 1000
+
+    def _labeled(self) -> List[Tuple[str, List[Tuple[str, str, int]], int]]:
+        prefixes = _path_prefixes()
+        frames: Dict[object, Tuple[str, str, int]] = {}
+
+        def describe(code) -> Tuple[str, str, int]:
+            frame = frames.get(code)
+            if frame is None:
+                path = code.co_filename
+                for prefix in prefixes:
+                    if path.startswith(prefix):
+                        path = path[len(prefix):].lstrip("/\\")
+                        break
+                name = getattr(code, "co_qualname", code.co_name)
+                frame = frames[code] = (f"{name} ({path}:{code.co_firstlineno})", path, code.co_firstlineno)
+            return frame
+
+        with self._counts_lock:
+            counts = list(self.counts.items())
+        return [(thread, [describe(code) for code in reversed(codes)], count) for (thread, codes), count in counts]
+
+    def collapsed(self) -> str:
+        lines = []
+        for thread, frames, count in self._labeled():
+            stack = ";".join([thread, *(name for name, _, _ in frames)]).replace("\n", " ")
+            lines.append(f"{stack} {count}")
+        lines.sort()
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> dict:
+        """speedscope's file format: one sampled profile per thread, weighted in milliseconds"""
+        shared: List[dict] = []
+        index: Dict[Tuple[str, str, int], int] = {}
+        profiles: Dict[str, dict] = {}
+        tick_ms = self.tick_ms
+        for thread, frames, count in sorted(self._labeled(), key=lambda item: item[0]):
+            stack = []
+            for frame in frames:
+                if frame not in index:
+                    index[frame] = len(shared)
+                    shared.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                stack.append(index[frame])
+            profile = profiles.setdefault(thread, {
+                "type": "sampled", "name": thread, "unit": "milliseconds",
+                "startValue": 0, "endValue": 0, "samples": [], "weights": [],
+            })
+            profile["samples"].append(stack)
+            profile["weights"].append(round(count * tick_ms, 3))
+            profile["endValue"] = round(profile["endValue"] + count * tick_ms, 3)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": shared},
+            "profiles": list(profiles.values()),
+            "name": name,
+            "activeProfileIndex": 0,
+            "exporter": "gym-management-app",
+        }
+
+_running: Optional[SamplingProfiler] = None
+_running_lock = threading.Lock()
+# Per-request samples of the current request while a per-request profile runs
+_request_samples: ContextVar[Optional[Counter]] = ContextVar("profiled_request", default=None)
+
+def start_profiler(interval: float, idle: bool = False, route: Optional[str] = None) -> SamplingProfiler:
+    """Start the one profiler the process can run at a time"""
+    global _running
+    with _running_lock:
+        if _running is not None:
+            raise ProfilerBusyError("A profile is already being taken")
+        profiler = SamplingProfiler(interval, idle, route)
+        profiler.start()
+        _running = profiler
+    return profiler
+
+def stop_profiler(profiler: SamplingProfiler) -> None:
+    global _running
+    with _running_lock:
+        if _running is profiler:
+            _running = None
+    profiler.stop()
+
+def call_profiled(function, *args, **kwargs):
+    """Call `function`; if its request is being profiled, this frame marks the thread's stack"""
+    samples = _request_samples.get()
+    profiler = _running
+    if samples is None or profiler is None:
+        return function(*args, **kwargs)
+    frame = sys._getframe()
+    profiler.mark(frame, samples)
+    try:
+        return function(*args, **kwargs)
+    finally:
+        profiler.unmark(frame)
+
+class ProfilingMiddleware:
+    """Attributes samples to requests while a per-request profile runs (a no-op otherwise)"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = _running
+        if profiler is None or profiler.route is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # While this coroutine runs on the event loop, its frame is in the stack
+        frame = sys._getframe()
+        samples: Counter = Counter()
+        profiler.mark(frame, samples)
+        token = _request_samples.set(samples)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_samples.reset(token)
+            profiler.unmark(frame)
+            if profiler.matches(scope):
+                profiler.add_request(samples)
@@ -0,0 +1,125 @@
+"""Versioned schema migrations for SQLite.
+
+`create_all` only creates missing tables: it never adds an index (or anything
+else) to a table that already exists in a deployed `gym.db`. Schema changes
+are therefore written as numbered migrations in `MIGRATIONS` and applied in
+place, in order, each in its own transaction.
+
+The applied version lives in SQLite's `PRAGMA user_version` (a field in the
+file header, read without touching any table), so a boot on a current
+database costs one PRAGMA and no DDL. Each applied step is also logged in
+`schema_migrations` with its timestamp and duration.
+
+A new (empty) database is created straight from the models and stamped
+with the latest version, so migrations only ever run on existing files.
+Adding a table or index to a model: also append a migration that creates it
+on existing databases (`_create_model_indexes` covers new model indexes).
+"""
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import SQLModel
+
+from app.models import client, entrenamiento, user, valoracion # Import to register every table
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+def _create_tables(connection: Connection) -> None:
+    SQLModel.metadata.create_all(connection)
+
+def _create_model_indexes(connection: Connection) -> None:
+    """Create every index declared on the models that the database lacks"""
+    inspector = inspect(connection)
+    existing = {
+        table: {ix["name"] for ix in inspector.get_indexes(table)}
+        for table in inspector.get_table_names()
+    }
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing.get(table.name, set()):
+                index.create(connection)
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Base tables", _create_tables),
+    # Rutina (cliente_id, fecha_inicio, id), DiaRutina (rutina_id, orden) and
+    # DetalleRutina (dia_rutina_id, orden), plus the listing and validator
+    # indexes that databases created before they were declared never got
+    Migration(2, "Foreign-key and sort indexes", _create_model_indexes),
+    # ClienteGym (entrenador_id, id): a trainer's client listing was a full scan
+    Migration(3, "Trainer client listing index", _create_model_indexes),
+    # UltimaValoracion (updated_at): the /ultimas ETag validator scanned the snapshot table
+    Migration(4, "Latest-valoracion validator index", _create_model_indexes),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+def stored_version(connection: Connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar_one()
+
+def _record(connection: Connection, migration: Migration, seconds: float) -> None:
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, description TEXT NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL, duration_ms REAL NOT NULL)"
+    )
+    connection.exec_driver_sql(
+        "INSERT OR REPLACE INTO schema_migrations (version, description, applied_at, duration_ms) "
+        "VALUES (?, ?, ?, ?)",
+        (migration.version, migration.description, datetime.utcnow().isoformat(), seconds * 1000),
+    )
+    # PRAGMA doesn't take bound parameters; the value is our own int
+    connection.exec_driver_sql(f"PRAGMA user_version = {int(migration.version)}")
+
+def migrate(engine: Engine, target: Optional[int] = None, on_step: Optional[Callable[[Migration, float], None]] = None) -> List[Migration]:
+    """Apply the pending migrations up to `target` (default: latest), then ANALYZE.
+
+    Each migration and its version bump commit together, so an interrupted
+    upgrade resumes from the last completed step. Returns what was applied.
+    """
+    target = SCHEMA_VERSION if target is None else target
+    with engine.connect() as connection:
+        current = stored_version(connection)
+        empty = current == 0 and not inspect(connection).get_table_names()
+
+    if empty and target == SCHEMA_VERSION:
+        created = Migration(SCHEMA_VERSION, "Created from the models", _create_tables)
+        start = time.perf_counter()
+        with engine.begin() as connection:
+            created.apply(connection)
+            _record(connection, created, time.perf_counter() - start)
+        if on_step:
+            on_step(created, time.perf_counter() - start)
+        return [created]
+
+    pending = [m for m in MIGRATIONS if current < m.version <= target]
+
+    for migration in pending:
+        start = time.perf_counter()
+        with engine.begin() as connection:
+            migration.apply(connection)
+            _record(connection, migration, time.perf_counter() - start)
+        if on_step:
+            on_step(migration, time.perf_counter() - start)
+
+    if pending:
+        # New indexes are only used well once the planner has statistics for them
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+    return pending
+
+def ensure_schema(engine: Engine) -> bool:
+    """Bring the database to SCHEMA_VERSION at startup.
+
+    Returns True when migrations ran (new or outdated database), False when
+    it was already current and no DDL was issued; main.py reports it in the
+    startup phases. Bootstrap data is seeded on every start regardless.
+    """
+    return bool(migrate(engine))
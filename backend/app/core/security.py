@@ -1,22 +1,85 @@
-from datetime import datetime, timedelta
-from typing import Optional, Union, Any
-from jose import jwt, JWTError
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Optional, Union, Any
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-import bcrypt
+from sqlmodel import Session, select
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.db import get_async_read_session, get_session
+from app.core.tracing import span
+from app.models.user import Usuario
+
+if TYPE_CHECKING:  # imported only under DB_ASYNC (see app.core.db)
+    from sqlmodel.ext.asyncio.session import AsyncSession
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash"""
+# token -> Usuario snapshot (dict). Hit/miss counters live on the cache itself.
+auth_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+# --- Password hashing ---
+# bcrypt is deliberately slow, so it runs on its own small executor instead of
+# the request threadpool. The semaphore caps running + queued jobs; past that
+# callers get a 503 instead of piling up behind a login burst.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+_password_slots = threading.BoundedSemaphore(
+    settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+)
+
+def _submit_password_job(fn, *args) -> Future:
+    if not _password_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password operations, try again",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = password_executor.submit(fn, *args)
+    except BaseException:
+        _password_slots.release()
+        raise
+    future.add_done_callback(lambda _: _password_slots.release())
+    return future
+
+# bcrypt and python-jose (which loads `cryptography`) are imported on first use
+# rather than at startup; after that the import statement is a dict lookup.
+
+def _checkpw(plain_password: str, hashed_password: str) -> bool:
+    import bcrypt
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+def _hashpw(password: str) -> str:
+    import bcrypt
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash (blocks the caller until the executor is done)"""
+    return _submit_password_job(_checkpw, plain_password, hashed_password).result()
+
 def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt"""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    """Hash a password using bcrypt with the configured cost factor"""
+    return _submit_password_job(_hashpw, password).result()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Like `verify_password`, but awaits the executor without holding a threadpool thread"""
+    return await asyncio.wrap_future(_submit_password_job(_checkpw, plain_password, hashed_password))
+
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit_password_job(_hashpw, password))
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when the stored hash was made with a different cost than BCRYPT_ROUNDS"""
+    try:
+        # Format: $2b$<cost>$<salt+hash>
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
 
 def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     if expires_delta:
@@ -24,36 +87,82 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {"exp": expire, "sub": str(subject)}
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Get current user from JWT token"""
-    from app.models.user import Usuario
-    from app.core.db import get_session
-    from sqlmodel import Session, select
-    
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _decode_token(token: str) -> dict:
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    
-    # Get user from database
-    session_gen = get_session()
-    session = next(session_gen)
-    try:
-        user = session.exec(select(Usuario).where(Usuario.email == email)).first()
-        if user is None:
-            raise credentials_exception
-        return user
-    finally:
-        session.close()
+        raise _credentials_exception()
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+    return payload
+
+def _cache_principal(token: str, payload: dict, user: Optional[Usuario]) -> dict:
+    if user is None:
+        raise _credentials_exception()
+    snapshot = user.model_dump()
+    # Never keep a principal cached past its token expiry
+    ttl = settings.AUTH_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - datetime.now(timezone.utc).timestamp())
+    if ttl > 0:
+        auth_cache.set(token, snapshot, ttl=ttl)
+    return snapshot
+
+def _principal(snapshot: dict) -> Usuario:
+    if not snapshot["is_active"]:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    # Hand out a fresh, detached copy so callers can't mutate the cached entry
+    return Usuario(**snapshot)
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    session: Session = Depends(get_session)
+) -> Usuario:
+    """Get current user from JWT token.
+
+    Resolved principals are kept in `auth_cache` so repeated requests with the
+    same token skip both the JWT decode and the user lookup. The session is the
+    request's own (FastAPI shares dependencies per request), and it only opens a
+    connection on a cache miss.
+    """
+    with span("get_current_user"):
+        snapshot = auth_cache.get(token)
+        if snapshot is None:
+            payload = _decode_token(token)
+            user = session.exec(select(Usuario).where(Usuario.email == payload["sub"])).first()
+            snapshot = _cache_principal(token, payload, user)
+        return _principal(snapshot)
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    session: "AsyncSession" = Depends(get_async_read_session)
+) -> Usuario:
+    """`get_current_user` for the async handlers (DB_ASYNC).
+
+    Being a coroutine, a cache hit is answered on the event loop instead of
+    taking a threadpool thread; it shares `auth_cache` with the sync version.
+    """
+    with span("get_current_user"):
+        snapshot = auth_cache.get(token)
+        if snapshot is None:
+            payload = _decode_token(token)
+            user = (await session.exec(select(Usuario).where(Usuario.email == payload["sub"]))).first()
+            snapshot = _cache_principal(token, payload, user)
+        return _principal(snapshot)
+
+def invalidate_user_cache(user_id: int) -> None:
+    """Drop cached principals for a user after it is updated or deleted"""
+    auth_cache.invalidate_where(lambda snapshot: snapshot["id"] == user_id)
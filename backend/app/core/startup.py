@@ -0,0 +1,66 @@
+"""Per-phase startup timings, printed by `run.py --profile-startup`.
+
+Phases are recorded in the order they start, nested phases indented under
+their parent. Work that was moved off the critical path (catalog index,
+static compression) runs after startup on a background thread and is
+reported as warm-up.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import List, Optional
+
+@dataclass
+class Phase:
+    name: str
+    depth: int
+    seconds: Optional[float] = None  # None: skipped
+    note: str = ""
+
+class StartupTimer:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.phases: List[Phase] = []
+        self.warmed_up = threading.Event()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _add(self, phase: Phase) -> Phase:
+        with self._lock:
+            self.phases.append(phase)
+        return phase
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the block; the yielded `Phase` takes an optional `note`"""
+        depth = getattr(self._local, "depth", 0)
+        phase = self._add(Phase(name, depth))
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield phase
+        finally:
+            phase.seconds = time.perf_counter() - start
+            self._local.depth = depth
+
+    def skip(self, name: str, reason: str) -> None:
+        self._add(Phase(name, getattr(self._local, "depth", 0), None, reason))
+
+    def mark(self, name: str) -> float:
+        """Record a milestone (e.g. "ready") as the time elapsed since the timer was created"""
+        elapsed = time.perf_counter() - self.origin
+        self._add(Phase(name, 0, elapsed, "elapsed"))
+        return elapsed
+
+    def report(self) -> str:
+        lines = ["Startup profile"]
+        for phase in self.phases:
+            label = "  " * (phase.depth + 1) + phase.name
+            value = "skipped" if phase.seconds is None else f"{phase.seconds * 1000:9.1f} ms"
+            lines.append(f"{label:<44}{value:>12}" + (f"  ({phase.note})" if phase.note else ""))
+        return "\n".join(lines)
+
+# Created on first import; run.py imports it before the framework so the
+# origin is (almost) the process start
+startup_timer = StartupTimer()
@@ -0,0 +1,198 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.compression import negotiate_encoding
+from app.core.http_cache import etag_matches, not_modified
+
+try:  # Optional: only used to compress after startup when Vite didn't emit .br files
+    import brotli
+except ImportError:
+    brotli = None
+
+# Vite fingerprints everything under assets/, so those URLs never change content
+IMMUTABLE = "public, max-age=31536000, immutable"
+# index.html and unhashed files (vite.svg, public/) must be revalidated
+REVALIDATE = "no-cache"
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml",
+                      "application/manifest+json", "application/xml")
+
+mimetypes.add_type("application/javascript", ".js")
+mimetypes.add_type("application/javascript", ".mjs")
+mimetypes.add_type("image/svg+xml", ".svg")
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+
+@dataclass
+class StaticFile:
+    body: bytes
+    media_type: str
+    etag: str
+    cache_control: str
+    # content-coding -> compressed body (only kept when smaller than the original)
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+    # Big enough and of a compressible type: `compress_pending` fills `encoded`
+    compressible: bool = False
+
+    def etag_for(self, coding: Optional[str]) -> str:
+        """Strong validator of one representation: each content-coding gets its own"""
+        return self.etag if coding is None else f'{self.etag[:-1]}-{coding}"'
+
+
+class StaticBundle:
+    """The built frontend (frontend/dist), loaded into memory once at startup.
+
+    A Vite build is a few MB, so holding it avoids a stat + open + read per
+    request, which inside the PyInstaller bundle means the onefile temp dir.
+    Precompressed `.br`/`.gz` siblings are used when present. Missing
+    encodings are produced once by `compress_pending`, which main.py runs on a
+    background thread after startup (brotli at full quality takes seconds on
+    a large bundle); until then those files are served uncompressed.
+    """
+
+    def __init__(self, root: str, compress_min_bytes: int = 1024):
+        self.root = root
+        self.compress_min_bytes = compress_min_bytes
+        self.files: Dict[str, StaticFile] = {}
+        self._load()
+
+    def _load(self) -> None:
+        for dirpath, _, filenames in os.walk(self.root):
+            names = set(filenames)
+            for name in filenames:
+                if name.endswith((".br", ".gz")) and name[:-3] in names:
+                    continue
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+                self.files[rel] = self._build(path, rel, names)
+
+    def _build(self, path: str, rel: str, siblings: set) -> StaticFile:
+        with open(path, "rb") as f:
+            body = f.read()
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+        static_file = StaticFile(
+            body=body,
+            media_type=media_type,
+            etag=f'"{hashlib.sha1(body).hexdigest()[:16]}"',
+            cache_control=IMMUTABLE if rel.startswith("assets/") else REVALIDATE,
+        )
+
+        name = os.path.basename(path)
+        for coding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if name + suffix in siblings:
+                with open(path + suffix, "rb") as f:
+                    static_file.encoded[coding] = f.read()
+
+        static_file.encoded = {c: b for c, b in static_file.encoded.items() if len(b) < len(body)}
+        static_file.compressible = (
+            len(body) >= self.compress_min_bytes and media_type.startswith(COMPRESSIBLE_TYPES)
+        )
+        return static_file
+
+    def compress_pending(self) -> None:
+        """Gzip (and brotli, if installed) the compressible files that lack a precompressed sibling.
+
+        Safe to run while serving: encodings are only ever added, never removed.
+        """
+        for static_file in self.files.values():
+            if not static_file.compressible:
+                continue
+            if "gzip" not in static_file.encoded:
+                self._add_encoding(static_file, "gzip", gzip.compress(static_file.body, compresslevel=9, mtime=0))
+            if "br" not in static_file.encoded and brotli is not None:
+                self._add_encoding(static_file, "br", brotli.compress(static_file.body))
+
+    @staticmethod
+    def _add_encoding(static_file: StaticFile, coding: str, body: bytes) -> None:
+        if len(body) < len(static_file.body):
+            static_file.encoded[coding] = body
+
+    def get(self, path: str) -> Optional[StaticFile]:
+        return self.files.get(path.lstrip("/"))
+
+    def serve(self, request: Request, static_file: StaticFile) -> Response:
+        """Build the response: 304, 206/416 for ranges, or the best encoding the client accepts"""
+        range_header = request.headers.get("range", "")
+        # Multi-range and non-byte units are ignored (served whole), which RFC 9110 allows
+        is_single_range = range_header.lower().startswith("bytes=") and "," not in range_header
+        is_range = is_single_range and _if_range_matches(request, static_file.etag)
+
+        # Ranges are served over the identity encoding, so they validate against its ETag
+        coding = None if is_range else negotiate_encoding(
+            request.headers.get("accept-encoding", ""), static_file.encoded
+        )
+        etag = static_file.etag_for(coding)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": static_file.cache_control,
+            "Accept-Ranges": "bytes",
+        }
+        varies = static_file.compressible or bool(static_file.encoded)
+        if varies:
+            headers["Vary"] = "Accept-Encoding"
+
+        if etag_matches(request, etag):
+            response = not_modified(etag, static_file.cache_control)
+            if varies:
+                response.headers["Vary"] = "Accept-Encoding"
+            return response
+
+        if is_range:
+            return _range_response(static_file, range_header, headers)
+
+        body = static_file.body
+        if coding:
+            body = static_file.encoded[coding]
+            headers["Content-Encoding"] = coding
+        return Response(content=body, media_type=static_file.media_type, headers=headers)
+
+
+def _if_range_matches(request: Request, etag: str) -> bool:
+    """A Range only applies if If-Range is absent or names the current entity"""
+    if_range = request.headers.get("if-range")
+    return if_range is None or if_range.strip() == etag
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """`bytes=` range -> inclusive (start, end); None if unsatisfiable"""
+    start, _, end = header.partition("=")[2].strip().partition("-")
+    if size == 0:
+        return None
+    try:
+        if start == "":
+            # Suffix range: the last N bytes
+            length = int(end)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        first = int(start)
+        last = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if first >= size or last < first:
+        return None
+    return first, min(last, size - 1)
+
+
+def _range_response(static_file: StaticFile, header: str, headers: Dict[str, str]) -> Response:
+    # Ranges are served over the identity encoding so offsets mean the same to every client
+    size = len(static_file.body)
+    parsed = _parse_range(header, size)
+    if parsed is None:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    first, last = parsed
+    headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+    return Response(
+        content=static_file.body[first:last + 1],
+        status_code=206,
+        media_type=static_file.media_type,
+        headers=headers,
+    )
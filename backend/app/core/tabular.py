@@ -0,0 +1,59 @@
+"""Streaming readers for uploaded spreadsheets (CSV or XLSX) used by the bulk imports.
+
+XLSX needs `openpyxl` (optional dependency).
+"""
+import csv
+import importlib.util
+import io
+import os
+from typing import BinaryIO, Dict, Iterator, Tuple
+
+XLSX_AVAILABLE = importlib.util.find_spec("openpyxl") is not None
+
+class ImportFileError(ValueError):
+    pass
+
+def read_rows(file: BinaryIO, filename: str) -> Iterator[Tuple[int, Dict[str, object]]]:
+    """Yield (line number, {column: value}) for each data row, by file extension"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        return _read_csv(file)
+    if extension == ".xlsx":
+        if not XLSX_AVAILABLE:
+            raise ImportFileError("XLSX import needs openpyxl installed")
+        return _read_xlsx(file)
+    raise ImportFileError("Unsupported file type: use .csv or .xlsx")
+
+def _read_csv(file: BinaryIO) -> Iterator[Tuple[int, Dict[str, object]]]:
+    # utf-8-sig drops the BOM Excel adds; Spanish-locale Excel also exports with ';'
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    header = [_column(h) for h in next(reader, [])]
+    for line, values in enumerate(reader, start=2):
+        if any(values):
+            yield line, dict(zip(header, values))
+
+def _read_xlsx(file: BinaryIO) -> Iterator[Tuple[int, Dict[str, object]]]:
+    import openpyxl
+
+    try:
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:  # zip/xml errors from a corrupt or mislabelled file
+        raise ImportFileError(f"Invalid XLSX file: {e}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_column(h) for h in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if any(v not in (None, "") for v in values):
+                yield line, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+def _column(name) -> str:
+    return str(name or "").strip().lower()
@@ -0,0 +1,325 @@
+"""Sampled per-request tracing and a slow-request log.
+
+A sampled request gets a span tree:
+
+- `request`: the whole request, middlewares and body streaming included.
+  - `handler`: the matched route, split into `dependencies` (parameter
+    parsing and `Depends`, with `get_current_user` as a child), `endpoint`
+    and `serialize` (response-model validation and JSON encoding).
+  - `sql` leaves: one per statement, with its text, under whichever span
+    was open when it ran.
+
+Traced requests slower than TRACE_SLOW_MS are appended to a rotating JSONL
+file (TRACE_LOG_FILE, next to the database unless absolute) and kept in a bounded in-memory window that
+`GET /api/admin/traces` reads. An unsampled request costs one `random()`, and
+each of its statements one ContextVar lookup. The current trace lives in a
+ContextVar, which the threadpool (sync endpoints and dependencies) and the
+aiosqlite greenlets inherit from the request's task.
+"""
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Callable, List, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import route_template
+from app.core.profiler import call_profiled
+
+# Bounds a trace of a request that runs thousands of statements; past it,
+# statements are still counted and timed but get no span of their own
+MAX_SPANS = 2000
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+
+class Span:
+    __slots__ = ("name", "start", "end", "attrs", "children")
+
+    def __init__(self, name: str, start: float, attrs: Optional[dict] = None):
+        self.name = name
+        self.start = start
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.children: List["Span"] = []
+
+    def to_dict(self, origin: float, trace_end: float) -> dict:
+        end = self.end if self.end is not None else trace_end
+        node = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "ms": round((end - self.start) * 1000, 3),
+        }
+        if self.attrs:
+            node.update(self.attrs)
+        if self.end is None:
+            node["unfinished"] = True
+        if self.children:
+            node["children"] = [child.to_dict(origin, trace_end) for child in self.children]
+        return node
+
+class Trace:
+    """One request's span tree. Its parts run one after another (event loop,
+    then a threadpool thread, then back), so the open-span stack needs no lock."""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.timestamp = datetime.now(timezone.utc)
+        self.root = Span("request", time.perf_counter())
+        self._stack: List[Span] = [self.root]
+        self.spans = 1
+        self.dropped = 0
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.slow_log = True
+
+    def _child(self, name: str, attrs: Optional[dict]) -> Span:
+        span = Span(name, time.perf_counter(), attrs)
+        if self.spans < MAX_SPANS:
+            self._stack[-1].children.append(span)
+            self.spans += 1
+        else:
+            self.dropped += 1
+        return span
+
+    def start(self, name: str, **attrs) -> Span:
+        """Open a span under the current one; it's the parent of what follows until finished"""
+        span = self._child(name, attrs)
+        self._stack.append(span)
+        return span
+
+    def finish(self, span: Span) -> None:
+        """Close `span` and anything still open inside it"""
+        now = time.perf_counter()
+        if span not in self._stack:
+            span.end = now
+            return
+        while True:
+            top = self._stack.pop()
+            top.end = now
+            if top is span:
+                return
+
+    def split_dependencies(self) -> None:
+        """At endpoint entry: what ran in the open span so far was dependency resolution"""
+        parent = self._stack[-1]
+        dependencies = Span("dependencies", parent.start)
+        dependencies.end = time.perf_counter()
+        dependencies.children, parent.children = parent.children, [dependencies]
+        self.spans += 1
+
+    def record(self, status: int, route: str) -> dict:
+        self.root.end = time.perf_counter()
+        record = {
+            "trace_id": self.id,
+            "timestamp": self.timestamp.isoformat(),
+            "method": self.method,
+            "path": self.path,
+            "route": route,
+            "status": status,
+            "duration_ms": round((self.root.end - self.root.start) * 1000, 3),
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_seconds * 1000, 3),
+        }
+        if self.dropped:
+            record["dropped_spans"] = self.dropped
+        record["spans"] = self.root.to_dict(self.root.start, self.root.end)
+        return record
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time the block as a child span of the current trace (no-op when unsampled)"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    current = trace.start(name, **attrs)
+    try:
+        yield
+    finally:
+        trace.finish(current)
+
+def skip_slow_log() -> None:
+    """Keep the current request out of the slow log (endpoints slow by design, like a timed profile)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.slow_log = False
+
+def log_path(path: str) -> str:
+    """A relative TRACE_LOG_FILE goes next to the database, not in the working directory"""
+    if not path or os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(settings.DB_FILE)), path)
+
+class SlowTraceLog:
+    """Traces over the threshold: a rotating JSONL file plus the most recent ones in memory"""
+
+    def __init__(self, path: str, max_bytes: int, backups: int, keep: int):
+        self._recent: deque = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._logger: Optional[logging.Logger] = None
+        if path:
+            # delay=True: the file only appears once a slow request does
+            handler = RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger = logging.getLogger("app.slow_requests")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.addHandler(handler)
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            self._recent.append(record)
+        if self._logger is not None:
+            self._logger.info(json.dumps(record, ensure_ascii=False))
+
+    def slowest(self, limit: int, route: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            records = [r for r in self._recent if route is None or r["route"] == route]
+        records.sort(key=lambda r: r["duration_ms"], reverse=True)
+        return records[:limit]
+
+slow_traces = SlowTraceLog(
+    log_path(settings.TRACE_LOG_FILE), settings.TRACE_LOG_MAX_BYTES, settings.TRACE_LOG_BACKUPS, settings.TRACE_RECENT_SIZE
+)
+
+class TracingMiddleware:
+    """Samples requests and opens their root span; slow ones go to `slow_traces`"""
+
+    def __init__(self, app: ASGIApp, sample_rate: float, slow_ms: float, log: SlowTraceLog = slow_traces):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        trace = Trace(scope["method"], scope["path"])
+        token = _current.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            record = trace.record(status, route_template(scope))
+            if trace.slow_log and record["duration_ms"] >= self.slow_ms:
+                self.log.add(record)
+
+def _enter_endpoint(trace: Trace) -> Span:
+    trace.split_dependencies()
+    return trace.start("endpoint")
+
+def _leave_endpoint(trace: Trace, current: Span, result) -> None:
+    trace.finish(current)
+    # A returned Response goes out as is; anything else is validated and
+    # encoded by FastAPI next, inside the handler span that closes this one
+    if not isinstance(result, Response):
+        trace.start("serialize")
+
+def _traced_endpoint(endpoint: Callable) -> Callable:
+    # functools.wraps keeps the signature FastAPI reads the parameters from
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def traced(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return await endpoint(*args, **kwargs)
+            current = _enter_endpoint(trace)
+            try:
+                result = await endpoint(*args, **kwargs)
+            except BaseException:
+                trace.finish(current)
+                raise
+            _leave_endpoint(trace, current, result)
+            return result
+    else:
+        # Sync endpoints run on a threadpool thread: call_profiled lets the
+        # profiler's per-request mode attribute that thread's stack
+        @functools.wraps(endpoint)
+        def traced(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return call_profiled(endpoint, *args, **kwargs)
+            current = _enter_endpoint(trace)
+            try:
+                result = call_profiled(endpoint, *args, **kwargs)
+            except BaseException:
+                trace.finish(current)
+                raise
+            _leave_endpoint(trace, current, result)
+            return result
+    return traced
+
+class TracedRoute(APIRoute):
+    """Route class of the API routers: adds the handler/dependencies/endpoint/serialize spans
+    and marks sync endpoints for the profiler's per-request mode"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _traced_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            trace = _current.get()
+            if trace is None:
+                return await handler(request)
+            current = trace.start("handler")
+            try:
+                return await handler(request)
+            finally:
+                trace.finish(current)
+
+        return traced_handler
+
+def instrument_engine(engine: Engine) -> None:
+    """A `sql` span per statement of `engine` (sync or `AsyncEngine.sync_engine`) in traced requests"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        trace = _current.get()
+        if trace is not None:
+            attrs = {"statement": statement}
+            if executemany:
+                attrs["executemany"] = len(parameters)
+            context._trace_span = (trace, trace._child("sql", attrs))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        traced = getattr(context, "_trace_span", None)
+        if traced is not None:
+            trace, sql = traced
+            sql.end = time.perf_counter()
+            if cursor.rowcount >= 0:
+                sql.attrs["rows"] = cursor.rowcount
+            trace.sql_count += 1
+            trace.sql_seconds += sql.end - sql.start
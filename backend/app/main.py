@@ -1,25 +1,30 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from contextlib import asynccontextmanager
 import os
+import threading
+import time
 
-from app.core.db import create_db_and_tables, get_session
-from app.api import auth, clients, users, valoraciones, entrenamientos
+from app.core.startup import startup_timer
+from app.core.db import async_engine, async_read_engine, dispose_async_engines, engine, get_session, read_engine
+from app.api import admin, auth, clients, users, valoraciones, entrenamientos, exportaciones
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, instrument_engine, register_cache, registry
+from app.core import tracing
+from app.core.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from app.core.profiler import ProfilingMiddleware
+from app.core.schema import SCHEMA_VERSION, ensure_schema, stored_version
+from app.core.static_files import StaticBundle
 from app.models.user import Usuario, Role
-from app.models.client import ClienteGym # Import to register table
-from app.models.valoracion import ValoracionFisica # Import to register table
-from app.core.security import get_password_hash
+from app.core.security import auth_cache, get_password_hash
+from app.services.catalogo import get_catalogo
+from app.services.progreso import progreso_cache
 from sqlmodel import Session, select
 
-# Startup event to create tables and seed admin
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    create_db_and_tables()
-    # Seed Admin User if not exists
-    from app.core.db import engine
+def seed_admin():
+    """Create the default admin if it doesn't exist"""
     try:
         with Session(engine) as session:
             user = session.exec(select(Usuario).where(Usuario.email == "admin@gym.com")).first()
@@ -36,7 +41,33 @@ async def lifespan(app: FastAPI):
         import traceback
         traceback.print_exc()
         print(f"Error seeding admin user: {e}")
+
+def warm_up():
+    """Work that used to delay startup; runs on a background thread once the app is up"""
+    try:
+        # The catalog index also builds itself on first use if a request gets there first
+        with startup_timer.phase("warm-up: exercise catalog index"):
+            with Session(read_engine) as session:
+                get_catalogo(session)
+        if static_bundle is not None:
+            with startup_timer.phase("warm-up: compress frontend bundle"):
+                static_bundle.compress_pending()
+    finally:
+        startup_timer.warmed_up.set()
+
+# Startup: schema check (migrations only for new or outdated databases) and admin seed
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with startup_timer.phase("schema version check") as phase:
+        created = ensure_schema(engine)
+        phase.note = f"migrated to v{SCHEMA_VERSION}" if created else f"v{SCHEMA_VERSION} current, no DDL"
+    # Always: a database migrated by scripts/migrar.py or generar_datos.py before
+    # the first start is already current but has no admin. It's one indexed lookup.
+    with startup_timer.phase("seed admin user"):
+        seed_admin()
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
     yield
+    await dispose_async_engines()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -50,19 +81,93 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.RESPONSE_COMPRESS_MIN_BYTES,
+    gzip_level=settings.RESPONSE_GZIP_LEVEL,
+    brotli_quality=settings.RESPONSE_BROTLI_QUALITY,
+)
+
+# Only does anything while an admin takes a per-request profile
+app.add_middleware(ProfilingMiddleware)
+
+if settings.TRACE_SAMPLE_RATE > 0:
+    # Around compression, so a trace covers the encoding and streaming too
+    app.add_middleware(
+        tracing.TracingMiddleware, sample_rate=settings.TRACE_SAMPLE_RATE, slow_ms=settings.TRACE_SLOW_MS
+    )
+    for traced_engine in (engine, read_engine, async_engine, async_read_engine):
+        if traced_engine is not None:
+            tracing.instrument_engine(getattr(traced_engine, "sync_engine", traced_engine))
+
+if settings.METRICS_ENABLED:
+    # Outermost, so it times the whole stack and sees the compressed size
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine, "write")
+    instrument_engine(read_engine, "read")
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine, "async_write")
+        instrument_engine(async_read_engine.sync_engine, "async_read")
+    register_cache("auth", auth_cache)
+    register_cache("progreso", progreso_cache)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# DB_ASYNC: the async (aiosqlite) handlers of the hot endpoints are mounted
+# first, so they win the route match; the sync router still serves the rest
+# (and these same paths are documented from it, with the same contract).
+if settings.DB_ASYNC:
+    app.include_router(auth.async_router, prefix="/api/auth", tags=["auth"])
+    app.include_router(clients.async_router, prefix="/api/clients", tags=["clients"])
+    app.include_router(valoraciones.async_router, prefix="/api/valoraciones", tags=["valoraciones"])
+    app.include_router(entrenamientos.async_router, prefix="/api/entrenamientos", tags=["entrenamientos"])
 
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(clients.router, prefix="/api/clients", tags=["clients"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(valoraciones.router, prefix="/api/valoraciones", tags=["valoraciones"])
 app.include_router(entrenamientos.router, prefix="/api/entrenamientos", tags=["entrenamientos"])
+app.include_router(exportaciones.router, prefix="/api/exportaciones", tags=["exportaciones"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "mode": "offline-ready"}
 
+@app.get("/health/ready")
+def readiness_check():
+    """Deep check: a real round-trip through the read and write pools.
+
+    Each one checks out a pooled connection, reads the schema version from
+    the file header and a page of a real table. 503 if either fails or the
+    schema isn't at SCHEMA_VERSION.
+    """
+    checks = {}
+    ready = True
+    for name, pool_engine in (("read", read_engine), ("write", engine)):
+        started = time.perf_counter()
+        try:
+            with pool_engine.connect() as connection:
+                version = stored_version(connection)
+                connection.exec_driver_sql("SELECT id FROM usuario LIMIT 1").all()
+            check = {"ok": version == SCHEMA_VERSION, "schema_version": version}
+        except Exception as e:
+            check = {"ok": False, "error": str(e)}
+        check["ms"] = round((time.perf_counter() - started) * 1000, 2)
+        checks[name] = check
+        ready = ready and check["ok"]
+    body = {
+        "status": "ready" if ready else "unavailable",
+        "database": checks,
+        "warmed_up": startup_timer.warmed_up.is_set(),
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
 # Mount Static Files (Frontend Build)
 # We expect the 'static' folder to be in the same directory as main.py or configured path
 # For this setup, we will point to the relative ../../frontend/dist for dev, or internal path for exe
@@ -72,34 +177,31 @@ if base_dir:
 else:
     static_path = os.path.join(os.path.dirname(__file__), "../../frontend/dist")
 
-# Only mount if directory exists (it will strictly exist in prod/build)
+static_bundle = None
+
+# Only serve the SPA if the build exists (it will strictly exist in prod/build)
 if os.path.exists(static_path):
-    # Mount assets directory
-    app.mount("/assets", StaticFiles(directory=os.path.join(static_path, "assets")), name="assets")
-    
-    # Mount CSS directory if it exists
-    css_path = os.path.join(static_path, "css")
-    if os.path.exists(css_path):
-        app.mount("/css", StaticFiles(directory=css_path), name="css")
-    
-    # Serve other static files (like vite.svg)
-    @app.get("/vite.svg")
-    async def serve_vite_svg():
-        svg_path = os.path.join(static_path, "vite.svg")
-        if os.path.exists(svg_path):
-            return FileResponse(svg_path)
-        return {"error": "Not found"}
-    
-    # Catch-all for SPA (return index.html)
-    @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
+    # The whole build (index.html, hashed /assets, vite.svg, ...) is read once
+    # here and answered from memory; it's compressed later, during warm-up
+    with startup_timer.phase("load frontend bundle"):
+        static_bundle = StaticBundle(static_path, compress_min_bytes=settings.STATIC_COMPRESS_MIN_BYTES)
+    index_file = static_bundle.get("index.html")
+
+    # Catch-all for SPA: real files by path, anything else gets index.html
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+    async def serve_spa(full_path: str, request: Request):
         # Allow API routes to pass through (handled above by include_router priority) but verify logic
         if full_path.startswith("api"):
              return {"error": "Not found"} # Should be handled by routers
-        
-        index_path = os.path.join(static_path, "index.html")
-        if os.path.exists(index_path):
-            return FileResponse(index_path)
+
+        static_file = static_bundle.get(full_path)
+        if static_file:
+            return static_bundle.serve(request, static_file)
+        # A missing hashed asset must not be answered with index.html
+        if full_path.startswith("assets/"):
+            return Response(status_code=404)
+        if index_file:
+            return static_bundle.serve(request, index_file)
         return {"error": "Frontend not built"}
 else:
     print(f"WARNING: Static path {static_path} not found. Running in API-only mode.")
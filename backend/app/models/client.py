@@ -1,5 +1,6 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import date, datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 from enum import Enum
 
@@ -21,6 +22,21 @@ class ClienteGymBase(SQLModel):
     fecha_inicio: date = Field(default_factory=date.today)
 
 class ClienteGym(ClienteGymBase, table=True):
+    # Composite indexes backing the filtered keyset listing (filter cols..., sort col, id)
+    __table_args__ = (
+        Index("ix_clientegym_activo_id", "activo", "id"),
+        Index("ix_clientegym_activo_apellido_id", "activo", "apellido", "id"),
+        Index("ix_clientegym_tipo_usuario_activo_id", "tipo_usuario", "activo", "id"),
+        Index("ix_clientegym_entrenador_id_activo_id", "entrenador_id", "activo", "id"),
+        # A trainer's clients in id order without the activo filter (the one
+        # above can't give that order, and SQLite then scans the whole table)
+        Index("ix_clientegym_entrenador_id_id", "entrenador_id", "id"),
+        Index("ix_clientegym_apellido_id", "apellido", "id"),
+        Index("ix_clientegym_fecha_inicio_id", "fecha_inicio", "id"),
+        # MAX(updated_at) for the conditional-GET validator
+        Index("ix_clientegym_updated_at", "updated_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -44,3 +60,15 @@ class ClienteGymUpdate(SQLModel):
     tipo_usuario: Optional[TipoUsuario] = None
     objetivo_fitness: Optional[str] = None
     activo: Optional[bool] = None
+
+class ClientImportError(SQLModel):
+    row: int  # line in the file, counting the header as line 1
+    email: Optional[str] = None
+    errors: List[str]
+
+class ClientImportResult(SQLModel):
+    total_rows: int
+    imported: int
+    failed: int
+    dry_run: bool = False
+    errors: List[ClientImportError] = []
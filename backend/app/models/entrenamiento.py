@@ -1,4 +1,5 @@
 from typing import Optional, List
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 
@@ -34,6 +35,11 @@ class RutinaBase(SQLModel):
     duracion_semanas: int = 4
 
 class Rutina(RutinaBase, table=True):
+    # Rutinas de un cliente, más recientes primero (y COUNT/MAX(id) del validador)
+    __table_args__ = (
+        Index("ix_rutina_cliente_id_fecha_inicio_id", "cliente_id", "fecha_inicio", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     cliente_id: int = Field(foreign_key="clientegym.id")
     entrenador_id: int = Field(foreign_key="usuario.id")
@@ -63,6 +69,11 @@ class DiaRutinaBase(SQLModel):
     orden: int # 1, 2, 3...
 
 class DiaRutina(DiaRutinaBase, table=True):
+    # Días de varias rutinas en orden (rutina_id IN (...) ORDER BY rutina_id, orden)
+    __table_args__ = (
+        Index("ix_diarutina_rutina_id_orden", "rutina_id", "orden"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     rutina_id: int = Field(foreign_key="rutina.id")
     
@@ -78,6 +89,11 @@ class DetalleRutinaBase(SQLModel):
     notas: Optional[str] = None
 
 class DetalleRutina(DetalleRutinaBase, table=True):
+    # Join desde el día con los ejercicios ya en orden
+    __table_args__ = (
+        Index("ix_detallerutina_dia_rutina_id_orden", "dia_rutina_id", "orden"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     dia_rutina_id: int = Field(foreign_key="diarutina.id")
     ejercicio_id: int = Field(foreign_key="ejercicio.id")
@@ -1,5 +1,6 @@
 from typing import Optional
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from enum import Enum
 
@@ -14,6 +15,12 @@ class UsuarioBase(SQLModel):
     role: Role = Field(default=Role.USER)
 
 class Usuario(UsuarioBase, table=True):
+    # Composite indexes backing the filtered keyset listing
+    __table_args__ = (
+        Index("ix_usuario_role_is_active_id", "role", "is_active", "id"),
+        Index("ix_usuario_is_active_id", "is_active", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     hashed_password: str
 
@@ -1,6 +1,7 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 class TipoValoracion(str, Enum):
@@ -10,6 +11,13 @@ class TipoValoracion(str, Enum):
 
 class ValoracionFisica(SQLModel, table=True):
     __tablename__ = "valoraciones_fisicas"
+    # Índices para el listado paginado por (fecha, id), global o por cliente
+    __table_args__ = (
+        Index("ix_valoraciones_fisicas_fecha_id", "fecha", "id"),
+        Index("ix_valoraciones_fisicas_cliente_id_fecha_id", "cliente_id", "fecha", "id"),
+        # MAX(updated_at) para el validador de GET condicional
+        Index("ix_valoraciones_fisicas_updated_at", "updated_at"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     cliente_id: int = Field(foreign_key="clientegym.id")
@@ -230,3 +238,59 @@ class ValoracionFisicaUpdate(SQLModel):
     
     notas: Optional[str] = None
     objetivos: Optional[str] = None
+
+# --- Snapshot: última valoración por cliente ---
+
+class UltimaValoracionBase(SQLModel):
+    valoracion_id: int
+    fecha: datetime
+    total_valoraciones: int = 0
+
+    # Métricas clave copiadas de la valoración más reciente
+    peso: Optional[float] = None
+    altura: Optional[float] = None
+    imc: Optional[float] = None
+    porcentaje_grasa: Optional[float] = None
+    masa_muscular: Optional[float] = None
+    grasa_visceral: Optional[float] = None
+    perimetro_cintura: Optional[float] = None
+
+class UltimaValoracion(UltimaValoracionBase, table=True):
+    """Una fila por cliente, mantenida en la misma transacción que las escrituras de valoraciones"""
+    __tablename__ = "ultima_valoracion_cliente"
+    __table_args__ = (
+        Index("ix_ultima_valoracion_cliente_fecha", "fecha"),
+        # MAX(updated_at) para el validador de GET condicional de /ultimas
+        Index("ix_ultima_valoracion_cliente_updated_at", "updated_at"),
+    )
+
+    cliente_id: int = Field(primary_key=True, foreign_key="clientegym.id")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class UltimaValoracionRead(SQLModel):
+    cliente_id: int
+    nombre: str
+    apellido: str
+    valoracion_id: Optional[int] = None
+    fecha: Optional[datetime] = None
+    total_valoraciones: int = 0
+    peso: Optional[float] = None
+    altura: Optional[float] = None
+    imc: Optional[float] = None
+    porcentaje_grasa: Optional[float] = None
+    masa_muscular: Optional[float] = None
+    grasa_visceral: Optional[float] = None
+    perimetro_cintura: Optional[float] = None
+
+# --- Ingesta de exportaciones de báscula ---
+
+class ErrorIngesta(SQLModel):
+    fila: int  # línea del archivo (el encabezado es la 1)
+    errores: List[str]
+
+class ResultadoIngesta(SQLModel):
+    total_filas: int = 0
+    insertadas: int = 0
+    ya_importadas: int = 0  # misma (cliente, fecha) ya presente: re-subir el archivo no duplica
+    con_errores: int = 0
+    errores: List[ErrorIngesta] = []
@@ -0,0 +1,126 @@
+"""
+Índice en memoria del catálogo de ejercicios.
+
+El catálogo es pequeño y casi no cambia, así que se carga completo al arrancar
+y se reconstruye cuando se crea un ejercicio. Las búsquedas ignoran tildes y
+mayúsculas ("jalon" encuentra "Jalón al Pecho"), aceptan prefijos por palabra y
+se ordenan por relevancia. Cada reconstrucción publica un índice nuevo e
+inmutable, así que las lecturas concurrentes nunca ven uno a medio armar.
+"""
+import bisect
+import hashlib
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional
+
+from sqlmodel import Session, select
+
+from app.models.entrenamiento import Ejercicio, EjercicioRead
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def normalizar(texto: Optional[str]) -> str:
+    """Minúsculas y sin diacríticos: 'Jalón' -> 'jalon'"""
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+def tokenizar(texto: Optional[str]) -> List[str]:
+    return _TOKEN_RE.findall(normalizar(texto))
+
+class IndiceCatalogo:
+    def __init__(self, ejercicios: List[EjercicioRead]):
+        self.ejercicios = ejercicios
+        self._nombres = [" ".join(tokenizar(e.nombre)) for e in ejercicios]
+        self._tokens = [set(tokenizar(e.nombre)) for e in ejercicios]
+
+        # token -> posiciones en `ejercicios`, y la lista ordenada de tokens para prefijos
+        self._posting: Dict[str, List[int]] = {}
+        for pos, tokens in enumerate(self._tokens):
+            for token in tokens:
+                self._posting.setdefault(token, []).append(pos)
+        self._vocabulario = sorted(self._posting)
+
+        huella = hashlib.sha1()
+        for e in ejercicios:
+            huella.update(repr((e.id, e.nombre, e.grupo_muscular, e.equipo_necesario,
+                                e.descripcion, e.video_url)).encode("utf-8"))
+        self.version = huella.hexdigest()[:16]
+
+    def _con_prefijo(self, prefijo: str) -> set:
+        posiciones = set()
+        i = bisect.bisect_left(self._vocabulario, prefijo)
+        while i < len(self._vocabulario) and self._vocabulario[i].startswith(prefijo):
+            posiciones.update(self._posting[self._vocabulario[i]])
+            i += 1
+        return posiciones
+
+    def buscar(self, search: Optional[str] = None, grupo_muscular: Optional[str] = None,
+               equipo_necesario: Optional[str] = None) -> List[EjercicioRead]:
+        """Filtra y ordena por relevancia (sin búsqueda conserva el orden por id)"""
+        posiciones = self._buscar_texto(search)
+        grupo = normalizar(grupo_muscular)
+        equipo = normalizar(equipo_necesario)
+        if grupo:
+            posiciones = [p for p in posiciones if normalizar(self.ejercicios[p].grupo_muscular) == grupo]
+        if equipo:
+            posiciones = [p for p in posiciones if normalizar(self.ejercicios[p].equipo_necesario) == equipo]
+        return [self.ejercicios[p] for p in posiciones]
+
+    def facetas(self, search: Optional[str] = None) -> dict:
+        """Conteos por grupo muscular y equipo sobre los resultados de la búsqueda"""
+        posiciones = self._buscar_texto(search)
+        return {
+            "total": len(posiciones),
+            "grupo_muscular": dict(Counter(self.ejercicios[p].grupo_muscular for p in posiciones)),
+            "equipo_necesario": dict(Counter(
+                self.ejercicios[p].equipo_necesario or "Sin equipo" for p in posiciones
+            )),
+        }
+
+    def _buscar_texto(self, search: Optional[str]) -> List[int]:
+        tokens = tokenizar(search)
+        if not tokens:
+            return list(range(len(self.ejercicios)))
+
+        # Todas las palabras de la búsqueda deben aparecer (completas o como prefijo)
+        candidatos = None
+        for token in tokens:
+            encontrados = self._con_prefijo(token)
+            candidatos = encontrados if candidatos is None else candidatos & encontrados
+            if not candidatos:
+                return []
+
+        consulta = " ".join(tokens)
+        def puntaje(pos: int) -> int:
+            nombre = self._nombres[pos]
+            valor = sum(3 if t in self._tokens[pos] else 1 for t in tokens)
+            if nombre == consulta:
+                valor += 10
+            elif nombre.startswith(consulta):
+                valor += 5
+            return valor
+
+        return sorted(candidatos, key=lambda p: (-puntaje(p), self._nombres[p]))
+
+_indice: Optional[IndiceCatalogo] = None
+
+def reconstruir_catalogo(session: Session) -> IndiceCatalogo:
+    """Carga el catálogo desde la base y publica un índice nuevo"""
+    global _indice
+    ejercicios = [
+        EjercicioRead.model_validate(e, from_attributes=True)
+        for e in session.exec(select(Ejercicio).order_by(Ejercicio.id)).all()
+    ]
+    # Reasignar la referencia es atómico: los lectores ven el índice viejo o el nuevo
+    _indice = IndiceCatalogo(ejercicios)
+    return _indice
+
+def get_catalogo(session: Session) -> IndiceCatalogo:
+    """Índice actual; lo construye en el primer uso si no se cargó al arrancar"""
+    indice = _indice
+    if indice is None:
+        indice = reconstruir_catalogo(session)
+    return indice
@@ -0,0 +1,104 @@
+"""
+Bulk client import from CSV or XLSX.
+
+Rows are streamed from the file, validated against `ClienteGymCreate` and
+written in batches of `IMPORT_BATCH_SIZE`: one `SELECT email ... IN (...)` to
+find clients that already exist, one executemany INSERT and one commit per
+batch. Invalid rows and duplicates are reported per row instead of aborting
+the import. Used by `POST /api/clients/import` and `scripts/importar_clientes.py`.
+"""
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlmodel import Session
+
+from app.models.client import ClienteGym, ClienteGymCreate, ClientImportError, ClientImportResult
+
+IMPORT_BATCH_SIZE = 1000
+
+CLIENT_FIELDS = set(ClienteGymCreate.model_fields)
+
+def _clean(raw: Dict[str, object]) -> Dict[str, object]:
+    """Keep known columns and drop blanks so model defaults apply"""
+    clean = {}
+    for key, value in raw.items():
+        if key not in CLIENT_FIELDS or value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        elif isinstance(value, float) and value.is_integer():
+            value = str(int(value))  # spreadsheet phone numbers
+        elif isinstance(value, int) and not isinstance(value, bool):
+            value = str(value)
+        clean[key] = value
+    return clean
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors()]
+
+def import_clients(
+    session: Session,
+    rows: Iterable[Tuple[int, Dict[str, object]]],
+    entrenador_id: Optional[int] = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> ClientImportResult:
+    """
+    Validate and insert `rows` batch by batch. Each batch commits on its own,
+    so a failure halfway keeps the batches already imported. With `dry_run`
+    everything is validated and checked against the database but nothing is
+    written.
+    """
+    result = ClientImportResult(total_rows=0, imported=0, failed=0, dry_run=dry_run)
+    seen_emails: Dict[str, int] = {}  # email -> first line, across the whole file
+    rows = iter(rows)
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        result.total_rows += len(batch)
+
+        valid: List[Tuple[int, ClienteGymCreate]] = []
+        for line, raw in batch:
+            data = _clean(raw)
+            try:
+                client = ClienteGymCreate.model_validate(data)
+            except ValidationError as e:
+                result.errors.append(ClientImportError(row=line, email=data.get("email"), errors=_validation_messages(e)))
+                continue
+            client.email = client.email.strip()
+            first = seen_emails.setdefault(client.email, line)
+            if first != line:
+                result.errors.append(ClientImportError(
+                    row=line, email=client.email, errors=[f"email: duplicated in the file (first on row {first})"]
+                ))
+                continue
+            valid.append((line, client))
+
+        # One set-based lookup for the whole batch
+        existing = set(session.execute(
+            select(ClienteGym.email).where(ClienteGym.email.in_([c.email for _, c in valid]))
+        ).scalars()) if valid else set()
+
+        now = datetime.utcnow()
+        to_insert = []
+        for line, client in valid:
+            if client.email in existing:
+                result.errors.append(ClientImportError(row=line, email=client.email, errors=["email: already registered"]))
+                continue
+            to_insert.append({**client.model_dump(), "entrenador_id": entrenador_id, "created_at": now, "updated_at": now})
+
+        if to_insert and not dry_run:
+            session.execute(insert(ClienteGym.__table__), to_insert)
+            session.commit()
+        result.imported += len(to_insert)
+
+    result.failed = len(result.errors)
+    result.errors.sort(key=lambda e: e.row)
+    return result
@@ -0,0 +1,424 @@
+"""
+Generador determinista de datos sintéticos con la escala de un gimnasio grande.
+
+Con la misma semilla, los mismos parámetros y la misma fecha de referencia
+(`hasta`) produce exactamente las mismas filas:
+
+- entrenadores (`Usuario` con rol admin, todos con la misma contraseña);
+- clientes con antigüedad, edad, objetivo y entrenador repartidos al azar;
+- valoraciones en series por cliente con deriva plausible: cada cliente
+  avanza hacia su objetivo (bajar grasa, ganar músculo o mantener) con
+  meseta exponencial y ruido de medición, entre su alta y hoy o su baja;
+- rutinas sucesivas por cliente, con días y ejercicios tomados del catálogo
+  según el grupo muscular del día.
+
+Cada etapa usa su propio generador aleatorio, así que cambiar el número de
+valoraciones no cambia los clientes. Las valoraciones se insertan en orden
+cronológico entre clientes (como llegan en producción), de modo que los ids y
+el orden físico de la tabla se parecen a los de una base real.
+
+Las filas van con executemany en lotes de `lote` filas, un lote por
+transacción, con ids explícitos a partir del máximo existente: se puede
+generar sobre una base que ya tiene datos. Al final se reconstruye el
+snapshot `ultima_valoracion_cliente` y se ejecuta ANALYZE.
+"""
+import heapq
+import math
+import random
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as hora, timedelta
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import Table, func, insert, select
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.models.client import ClienteGym, TipoUsuario
+from app.models.entrenamiento import DetalleRutina, DiaRutina, Ejercicio, Rutina
+from app.models.user import Role, Usuario
+from app.models.valoracion import TipoValoracion, ValoracionFisica
+from app.services.ultima_valoracion import reconstruir_snapshot
+
+NOMBRES = [
+    "Ana", "Andrés", "Camila", "Carlos", "Daniela", "David", "Diana", "Felipe", "Gabriela", "Javier",
+    "Juan", "Julián", "Laura", "Luis", "Manuela", "María", "Mateo", "Natalia", "Paula", "Pedro",
+    "Sara", "Santiago", "Sofía", "Valentina", "Sebastián", "Isabela", "Alejandro", "Catalina", "Diego", "Lucía",
+]
+APELLIDOS = [
+    "García", "Rodríguez", "Martínez", "López", "González", "Pérez", "Sánchez", "Ramírez", "Torres", "Flores",
+    "Rivera", "Gómez", "Díaz", "Moreno", "Jiménez", "Muñoz", "Rojas", "Vargas", "Castro", "Ortiz",
+    "Olarte", "Herrera", "Medina", "Aguilar", "Suárez", "Castillo", "Romero", "Navarro", "Cruz", "Reyes",
+]
+
+# Objetivo -> (cambio de peso, cambio de % grasa, mejora de rendimiento) al completar la meseta
+OBJETIVOS = {
+    "Pérdida de peso": ((-0.15, -0.04), (-9.0, -3.0), (0.2, 0.6)),
+    "Hipertrofia": ((0.02, 0.08), (-3.0, 0.5), (0.3, 0.9)),
+    "Tonificación": ((-0.05, 0.0), (-5.0, -1.0), (0.2, 0.5)),
+    "Resistencia": ((-0.06, -0.01), (-4.0, -1.0), (0.4, 1.0)),
+    "Salud general": ((-0.03, 0.02), (-2.0, 0.5), (0.1, 0.4)),
+}
+OBJETIVOS_PESOS = [35, 25, 20, 10, 10]
+
+# Meses para recorrer ~63% del cambio objetivo (después, meseta)
+MESES_MESETA = 5.0
+
+PLANTILLAS_DIAS = {
+    3: [
+        ("Día 1: Empuje", ["Pecho", "Hombro", "Brazos"]),
+        ("Día 2: Tirón", ["Espalda", "Brazos"]),
+        ("Día 3: Pierna", ["Pierna", "Core"]),
+    ],
+    4: [
+        ("Día 1: Torso", ["Pecho", "Espalda"]),
+        ("Día 2: Pierna", ["Pierna", "Core"]),
+        ("Día 3: Hombro y Brazos", ["Hombro", "Brazos"]),
+        ("Día 4: Cuerpo Completo", ["Pierna", "Pecho", "Espalda", "Core"]),
+    ],
+    5: [
+        ("Día 1: Pecho", ["Pecho", "Brazos"]),
+        ("Día 2: Espalda", ["Espalda", "Brazos"]),
+        ("Día 3: Pierna", ["Pierna"]),
+        ("Día 4: Hombro", ["Hombro", "Core"]),
+        ("Día 5: Pierna y Core", ["Pierna", "Core"]),
+    ],
+}
+REPETICIONES = ["6-8", "8-10", "10-12", "12-15", "15", "Al fallo"]
+PESOS_SUGERIDOS = [None, None, "RPE 7", "RPE 8", "70% 1RM", "Peso corporal"]
+
+@dataclass
+class ParametrosGeneracion:
+    clientes: int = 1000
+    entrenadores: int = 10
+    valoraciones: int = 20000  # total, repartidas según la antigüedad de cada cliente
+    rutinas: int = 2000  # total, 3 a 5 días de 4 a 7 ejercicios cada una
+    semilla: int = 42
+    hasta: date = field(default_factory=date.today)  # fecha de referencia ("hoy" de los datos)
+    anios: int = 3  # antigüedad máxima de un cliente
+    lote: int = 20000  # filas por transacción
+    password_entrenadores: str = "entrenador123"
+
+class _Cliente(NamedTuple):
+    id: int
+    inicio: date
+    fin: date  # `hasta` o la fecha de baja
+    edad: int
+    objetivo: str
+    entrenador_id: int
+    activo: bool
+
+def _rnd(parametros: ParametrosGeneracion, etapa: str) -> random.Random:
+    # Semilla de texto: se deriva con SHA-512, no depende de PYTHONHASHSEED
+    return random.Random(f"{parametros.semilla}:{etapa}")
+
+def _sin_tildes(texto: str) -> str:
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode().lower()
+
+def _siguiente_id(session: Session, modelo) -> int:
+    return (session.execute(select(func.max(modelo.id))).scalar_one() or 0) + 1
+
+def _repartir(total: int, pesos: List[float]) -> List[int]:
+    """Reparte `total` proporcionalmente a `pesos` (restos a las fracciones mayores); exacto y determinista"""
+    suma = sum(pesos)
+    if not suma or not total:
+        return [0] * len(pesos)
+    cuotas = [total * p / suma for p in pesos]
+    conteos = [int(c) for c in cuotas]
+    orden = sorted(range(len(pesos)), key=lambda i: conteos[i] - cuotas[i])
+    for i in orden[:total - sum(conteos)]:
+        conteos[i] += 1
+    return conteos
+
+def _insertar(engine: Engine, tabla: Table, filas: Iterable[dict], lote: int) -> int:
+    """executemany por lotes, una transacción por lote"""
+    total = 0
+    filas = iter(filas)
+    while True:
+        bloque = list(islice(filas, lote))
+        if not bloque:
+            return total
+        with engine.begin() as connection:
+            connection.execute(insert(tabla), bloque)
+        total += len(bloque)
+
+def _entrenadores(engine: Engine, parametros: ParametrosGeneracion) -> List[int]:
+    # bcrypt se importa y se paga una sola vez: todos comparten el hash
+    from app.core.security import get_password_hash
+
+    hashed = get_password_hash(parametros.password_entrenadores)
+    with Session(engine) as session:
+        primero = _siguiente_id(session, Usuario)
+    ids = list(range(primero, primero + parametros.entrenadores))
+    _insertar(engine, Usuario.__table__, (
+        {
+            "id": i, "email": f"entrenador{i}@gym.test", "full_name": f"Entrenador {i}",
+            "hashed_password": hashed, "role": Role.ADMIN, "is_active": True,
+        }
+        for i in ids
+    ), parametros.lote)
+    return ids
+
+def _clientes(engine: Engine, parametros: ParametrosGeneracion, entrenadores: List[int]) -> List[_Cliente]:
+    rnd = _rnd(parametros, "clientes")
+    hasta = parametros.hasta
+    with Session(engine) as session:
+        primero = _siguiente_id(session, ClienteGym)
+
+    clientes, filas = [], []
+    for cliente_id in range(primero, primero + parametros.clientes):
+        # Más altas recientes que antiguas (el gimnasio crece)
+        inicio = hasta - timedelta(days=int(rnd.triangular(0, parametros.anios * 365, 0)))
+        activo = rnd.random() < 0.85
+        fin = hasta if activo else inicio + timedelta(days=int((hasta - inicio).days * rnd.uniform(0.2, 0.95)))
+        edad = int(rnd.triangular(16, 70, 28))
+        objetivo = rnd.choices(list(OBJETIVOS), OBJETIVOS_PESOS)[0]
+        nombre, apellido = rnd.choice(NOMBRES), rnd.choice(APELLIDOS)
+        cliente = _Cliente(cliente_id, inicio, fin, edad, objetivo, rnd.choice(entrenadores), activo)
+        clientes.append(cliente)
+        alta = datetime.combine(inicio, hora(rnd.randint(6, 20), rnd.randint(0, 59)))
+        filas.append({
+            "id": cliente_id,
+            "nombre": nombre,
+            "apellido": f"{apellido} {rnd.choice(APELLIDOS)}",
+            "email": _sin_tildes(f"{nombre}.{apellido}.{cliente_id}@gym.test"),
+            "telefono": f"3{rnd.randint(0, 999_999_999):09d}",
+            "fecha_nacimiento": date(hasta.year - edad, rnd.randint(1, 12), rnd.randint(1, 28)),
+            "tipo_usuario": rnd.choices(list(TipoUsuario), [15, 70, 15])[0],
+            "objetivo_fitness": objetivo,
+            "condiciones_medicas": rnd.choice(["Hipertensión", "Lesión de rodilla", "Asma"]) if rnd.random() < 0.08 else None,
+            "activo": activo,
+            "fecha_inicio": inicio,
+            "entrenador_id": cliente.entrenador_id,
+            "created_at": alta,
+            "updated_at": alta if activo else datetime.combine(fin, hora(12)),
+        })
+    _insertar(engine, ClienteGym.__table__, filas, parametros.lote)
+    return clientes
+
+class _Serie:
+    """Estado de la serie de valoraciones de un cliente mientras se intercalan por fecha"""
+    __slots__ = (
+        "cliente", "total", "n", "fecha", "intervalo", "altura", "peso0", "grasa0", "delta_peso",
+        "delta_grasa", "mejora", "musculo", "cintura0", "cadera0", "flexiones0", "abdominales0",
+        "sentadillas0", "plancha0", "fc0", "pas0", "pad0", "con_pruebas",
+    )
+
+    def __init__(self, cliente: _Cliente, total: int, rnd: random.Random):
+        self.cliente, self.total, self.n = cliente, total, 0
+        inicio = datetime.combine(cliente.inicio, hora(rnd.randint(6, 20), rnd.randint(0, 59)))
+        dias = max((cliente.fin - cliente.inicio).days, 1)
+        self.fecha = inicio
+        self.intervalo = timedelta(days=dias / max(total - 1, 1))
+        hombre = rnd.random() < 0.5
+        self.altura = round(min(max(rnd.gauss(176 if hombre else 163, 7), 145), 205), 1)
+        imc = min(max(rnd.gauss(26.5, 4), 18.0), 40.0)
+        self.peso0 = imc * (self.altura / 100) ** 2
+        # Deurenberg: % grasa a partir de IMC, edad y sexo
+        self.grasa0 = min(max(1.2 * imc + 0.23 * cliente.edad - (16.2 if hombre else 5.4) + rnd.gauss(0, 2), 6.0), 50.0)
+        cambio_peso, cambio_grasa, mejora = OBJETIVOS[cliente.objetivo]
+        self.delta_peso = rnd.uniform(*cambio_peso)
+        self.delta_grasa = rnd.uniform(*cambio_grasa)
+        self.mejora = rnd.uniform(*mejora)
+        self.musculo = rnd.uniform(0.50, 0.58) if hombre else rnd.uniform(0.44, 0.52)
+        self.cintura0 = self.peso0 * 0.55 + (22 if hombre else 14) + rnd.gauss(0, 3)
+        self.cadera0 = self.peso0 * 0.45 + (62 if hombre else 70) + rnd.gauss(0, 3)
+        forma = max(0.3, 1.6 - imc / 25 - (cliente.edad - 30) / 80)
+        self.flexiones0 = max(1.0, rnd.gauss(25 if hombre else 12, 6) * forma)
+        self.abdominales0 = max(3.0, rnd.gauss(30, 8) * forma)
+        self.sentadillas0 = max(5.0, rnd.gauss(35, 8) * forma)
+        self.plancha0 = max(10.0, rnd.gauss(60, 20) * forma)
+        self.fc0 = rnd.gauss(74, 6)
+        self.pas0 = rnd.gauss(118 + cliente.edad * 0.3, 8)
+        self.pad0 = rnd.gauss(76, 6)
+        self.con_pruebas = rnd.random() < 0.7
+
+    def fila(self, rnd: random.Random) -> dict:
+        meses = (self.fecha - datetime.combine(self.cliente.inicio, hora())).days / 30.4
+        avance = 1 - math.exp(-meses / MESES_MESETA)
+        peso = self.peso0 * (1 + self.delta_peso * avance) + rnd.gauss(0, 0.5)
+        grasa = min(max(self.grasa0 + self.delta_grasa * avance + rnd.gauss(0, 0.6), 4.0), 55.0)
+        imc = round(peso / (self.altura / 100) ** 2, 2)
+        ultima = self.n == self.total - 1
+        if self.n == 0:
+            tipo = TipoValoracion.INICIAL
+        elif ultima and not self.cliente.activo:
+            tipo = TipoValoracion.FINAL
+        else:
+            tipo = TipoValoracion.SEGUIMIENTO
+        rendimiento = 1 + self.mejora * avance
+        pruebas = self.con_pruebas and rnd.random() < 0.8
+        return {
+            "cliente_id": self.cliente.id,
+            "fecha": self.fecha,
+            "tipo": tipo,
+            "peso": round(peso, 1),
+            "altura": self.altura,
+            "imc": imc,
+            "perimetro_cintura": round(self.cintura0 * (peso / self.peso0) ** 1.2 + rnd.gauss(0, 0.8), 1),
+            "perimetro_cadera": round(self.cadera0 * (peso / self.peso0) ** 0.8 + rnd.gauss(0, 0.8), 1),
+            "porcentaje_grasa": round(grasa, 1),
+            "masa_muscular": round(peso * (1 - grasa / 100) * self.musculo + rnd.gauss(0, 0.3), 1),
+            "agua_corporal": round((100 - grasa) * 0.73 + rnd.gauss(0, 0.5), 1),
+            "grasa_visceral": float(max(1, round(imc * 0.5 - 5 + (grasa - 20) * 0.15))),
+            "flexiones_1min": round(self.flexiones0 * rendimiento + rnd.gauss(0, 2)) if pruebas else None,
+            "abdominales_1min": round(self.abdominales0 * rendimiento + rnd.gauss(0, 2)) if pruebas else None,
+            "sentadillas_1min": round(self.sentadillas0 * rendimiento + rnd.gauss(0, 2)) if pruebas else None,
+            "plancha_segundos": round(self.plancha0 * rendimiento + rnd.gauss(0, 5)) if pruebas else None,
+            "frecuencia_cardiaca_reposo": round(self.fc0 - 6 * avance + rnd.gauss(0, 2)),
+            "presion_arterial_sistolica": round(self.pas0 - 5 * avance + rnd.gauss(0, 4)),
+            "presion_arterial_diastolica": round(self.pad0 - 3 * avance + rnd.gauss(0, 3)),
+            "notas": "Valoración de ingreso" if self.n == 0 else None,
+            "objetivos": self.cliente.objetivo if self.n == 0 else None,
+            "created_at": self.fecha,
+            "updated_at": self.fecha,
+        }
+
+    def avanzar(self, rnd: random.Random) -> bool:
+        """Pasa a la siguiente valoración; False al terminar la serie"""
+        self.n += 1
+        if self.n >= self.total:
+            return False
+        # Mismo ritmo con holgura de ±30%, en horario del gimnasio y nunca después de la baja
+        dia = min((self.fecha + self.intervalo * rnd.uniform(0.7, 1.3)).date(), self.cliente.fin)
+        siguiente = datetime.combine(dia, hora(rnd.randint(6, 20), rnd.randint(0, 59)))
+        self.fecha = max(siguiente, self.fecha + timedelta(minutes=30))
+        return True
+
+def _antiguedad(cliente: _Cliente) -> int:
+    return (cliente.fin - cliente.inicio).days + 30
+
+def _valoraciones(parametros: ParametrosGeneracion, clientes: List[_Cliente]) -> Iterator[dict]:
+    """Valoraciones de todos los clientes en orden cronológico (mezcla por fecha de sus series)"""
+    rnd = _rnd(parametros, "valoraciones")
+    conteos = _repartir(parametros.valoraciones, [_antiguedad(c) for c in clientes])
+    pendientes = []
+    for cliente, total in zip(clientes, conteos):
+        if total:
+            serie = _Serie(cliente, total, rnd)
+            pendientes.append((serie.fecha, cliente.id, serie))
+    heapq.heapify(pendientes)
+    while pendientes:
+        _, _, serie = pendientes[0]
+        yield serie.fila(rnd)
+        if serie.avanzar(rnd):
+            heapq.heapreplace(pendientes, (serie.fecha, serie.cliente.id, serie))
+        else:
+            heapq.heappop(pendientes)
+
+def _rutinas(engine: Engine, parametros: ParametrosGeneracion, clientes: List[_Cliente]) -> Dict[str, int]:
+    rnd = _rnd(parametros, "rutinas")
+    with Session(engine) as session:
+        catalogo = session.execute(select(Ejercicio.id, Ejercicio.grupo_muscular)).all()
+        rutina_id = _siguiente_id(session, Rutina)
+        dia_id = _siguiente_id(session, DiaRutina)
+    if not catalogo and parametros.rutinas:
+        raise ValueError("El catálogo de ejercicios está vacío (scripts/seed_ejercicios.py)")
+    por_grupo: Dict[str, List[int]] = {}
+    for ejercicio_id, grupo in catalogo:
+        por_grupo.setdefault(grupo, []).append(ejercicio_id)
+    todos = [ejercicio_id for ejercicio_id, _ in catalogo]
+
+    insertadas = {"rutinas": 0, "dias": 0, "detalles": 0}
+    rutinas, dias, detalles = [], [], []
+
+    def volcar():
+        with engine.begin() as connection:
+            for tabla, filas in ((Rutina.__table__, rutinas), (DiaRutina.__table__, dias), (DetalleRutina.__table__, detalles)):
+                if filas:
+                    connection.execute(insert(tabla), filas)
+        for clave, filas in (("rutinas", rutinas), ("dias", dias), ("detalles", detalles)):
+            insertadas[clave] += len(filas)
+            filas.clear()
+
+    conteos = _repartir(parametros.rutinas, [_antiguedad(c) for c in clientes])
+    for cliente, total in zip(clientes, conteos):
+        tramo = max((cliente.fin - cliente.inicio).days, 1) / total if total else 0
+        for j in range(total):
+            semanas = rnd.choice([4, 6, 8, 12])
+            inicio = datetime.combine(cliente.inicio + timedelta(days=int(j * tramo)), hora(rnd.randint(6, 20)))
+            vigente = j == total - 1 and cliente.activo
+            plantilla = PLANTILLAS_DIAS[rnd.choice(list(PLANTILLAS_DIAS))]
+            rutinas.append({
+                "id": rutina_id,
+                "nombre": f"{cliente.objetivo} {len(plantilla)} días",
+                "descripcion": None,
+                "objetivo": cliente.objetivo,
+                "nivel": rnd.choices(["Principiante", "Intermedio", "Avanzado"], [40, 45, 15])[0],
+                "duracion_semanas": semanas,
+                "cliente_id": cliente.id,
+                "entrenador_id": cliente.entrenador_id,
+                "activo": vigente,
+                "fecha_inicio": inicio,
+                "fecha_fin": None if vigente else min(
+                    inicio + timedelta(weeks=semanas), datetime.combine(cliente.fin, hora(21))
+                ),
+            })
+            for orden, (nombre, grupos) in enumerate(plantilla, start=1):
+                dias.append({"id": dia_id, "rutina_id": rutina_id, "nombre": nombre, "orden": orden})
+                for posicion in range(1, rnd.randint(4, 7) + 1):
+                    grupo = grupos[(posicion - 1) % len(grupos)]
+                    detalles.append({
+                        "dia_rutina_id": dia_id,
+                        "ejercicio_id": rnd.choice(por_grupo.get(grupo) or todos),
+                        "orden": posicion,
+                        "series": rnd.randint(3, 5),
+                        "repeticiones": rnd.choice(REPETICIONES),
+                        "peso_sugerido": rnd.choice(PESOS_SUGERIDOS),
+                        "descanso_segundos": rnd.choice([45, 60, 90, 120]),
+                        "notas": None,
+                    })
+                dia_id += 1
+            rutina_id += 1
+        if len(detalles) >= parametros.lote:
+            volcar()
+    volcar()
+    return insertadas
+
+def generar(
+    engine: Engine,
+    parametros: ParametrosGeneracion,
+    on_etapa: Optional[Callable[[str, int, float], None]] = None,
+) -> Dict[str, int]:
+    """Genera todo el conjunto de datos; `on_etapa(nombre, filas, segundos)` tras cada etapa.
+
+    Las tablas deben existir (migraciones aplicadas) y, si hay rutinas, el
+    catálogo de ejercicios cargado. Devuelve las filas insertadas por tabla.
+    """
+    def etapa(nombre: str, filas: int, inicio: float) -> None:
+        if on_etapa:
+            on_etapa(nombre, filas, time.perf_counter() - inicio)
+
+    resumen: Dict[str, int] = {}
+
+    inicio = time.perf_counter()
+    entrenadores = _entrenadores(engine, parametros)
+    resumen["entrenadores"] = len(entrenadores)
+    etapa("entrenadores", len(entrenadores), inicio)
+
+    inicio = time.perf_counter()
+    clientes = _clientes(engine, parametros, entrenadores)
+    resumen["clientes"] = len(clientes)
+    etapa("clientes", len(clientes), inicio)
+
+    inicio = time.perf_counter()
+    resumen["valoraciones"] = _insertar(
+        engine, ValoracionFisica.__table__, _valoraciones(parametros, clientes), parametros.lote
+    )
+    etapa("valoraciones", resumen["valoraciones"], inicio)
+
+    inicio = time.perf_counter()
+    rutinas = _rutinas(engine, parametros, clientes)
+    resumen.update(rutinas)
+    etapa("rutinas (con días y ejercicios)", sum(rutinas.values()), inicio)
+
+    inicio = time.perf_counter()
+    with Session(engine) as session:
+        snapshot = reconstruir_snapshot(session)
+        session.commit()
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    etapa("snapshot de última valoración + ANALYZE", snapshot, inicio)
+    return resumen
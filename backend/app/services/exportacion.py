@@ -0,0 +1,199 @@
+"""
+Exportación masiva de clientes, valoraciones y rutinas a CSV o Parquet.
+
+Las filas se leen del motor de solo lectura en lotes de `EXPORT_CHUNK_SIZE`
+(`yield_per`, sin hidratar objetos ORM) y cada lote se escribe y se entrega
+antes de leer el siguiente, así que la memoria depende del tamaño del lote y
+no del de la tabla. Lo usan el endpoint `/api/exportaciones` y el script
+`scripts/exportar.py`.
+
+Parquet requiere `pyarrow` (dependencia opcional); cada lote se escribe como
+un row group.
+"""
+import csv
+import importlib.util
+import io
+from datetime import date, datetime
+from enum import Enum
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, select
+from sqlmodel import Session
+
+from app.core.db import read_engine
+from app.models.client import ClienteGym
+from app.models.entrenamiento import DetalleRutina, DiaRutina, Ejercicio, Rutina
+from app.models.valoracion import ValoracionFisica
+
+EXPORT_CHUNK_SIZE = 5000
+
+ENTIDADES = ("clientes", "valoraciones", "rutinas")
+FORMATOS = ("csv", "parquet")
+
+PARQUET_DISPONIBLE = importlib.util.find_spec("pyarrow") is not None
+
+Lote = List[Tuple]
+
+def consulta_exportacion(entidad: str, desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                         cliente_id: Optional[int] = None):
+    """
+    Sentencia de la exportación con sus filtros. El rango de fechas se aplica a
+    `fecha_inicio` (clientes y rutinas) o `fecha` (valoraciones); `hasta` es
+    exclusivo, igual que en el listado de valoraciones.
+    """
+    if entidad == "clientes":
+        C = ClienteGym
+        statement = select(C.__table__).order_by(C.id)
+        columna_fecha, columna_cliente = C.fecha_inicio, C.id
+        # fecha_inicio es DATE: se compara contra la fecha, no el datetime
+        desde = desde.date() if desde else None
+        hasta = hasta.date() if hasta else None
+    elif entidad == "valoraciones":
+        V = ValoracionFisica
+        statement = select(V.__table__).order_by(V.cliente_id, V.fecha, V.id)
+        columna_fecha, columna_cliente = V.fecha, V.cliente_id
+    elif entidad == "rutinas":
+        # Una fila por ejercicio de cada día; rutinas sin días salen con columnas nulas
+        statement = (
+            select(
+                Rutina.id.label("rutina_id"),
+                Rutina.cliente_id,
+                Rutina.entrenador_id,
+                Rutina.nombre.label("rutina"),
+                Rutina.objetivo,
+                Rutina.nivel,
+                Rutina.duracion_semanas,
+                Rutina.activo,
+                Rutina.fecha_inicio,
+                Rutina.fecha_fin,
+                DiaRutina.orden.label("dia_orden"),
+                DiaRutina.nombre.label("dia"),
+                DetalleRutina.orden.label("ejercicio_orden"),
+                Ejercicio.nombre.label("ejercicio"),
+                Ejercicio.grupo_muscular,
+                DetalleRutina.series,
+                DetalleRutina.repeticiones,
+                DetalleRutina.peso_sugerido,
+                DetalleRutina.descanso_segundos,
+                DetalleRutina.notas,
+            )
+            .select_from(Rutina)
+            .outerjoin(DiaRutina, DiaRutina.rutina_id == Rutina.id)
+            .outerjoin(DetalleRutina, DetalleRutina.dia_rutina_id == DiaRutina.id)
+            .outerjoin(Ejercicio, Ejercicio.id == DetalleRutina.ejercicio_id)
+            .order_by(Rutina.id, DiaRutina.orden, DetalleRutina.orden)
+        )
+        columna_fecha, columna_cliente = Rutina.fecha_inicio, Rutina.cliente_id
+    else:
+        raise ValueError(f"Entidad no válida: {entidad}")
+
+    if desde:
+        statement = statement.where(columna_fecha >= desde)
+    if hasta:
+        statement = statement.where(columna_fecha < hasta)
+    if cliente_id:
+        statement = statement.where(columna_cliente == cliente_id)
+    return statement
+
+def columnas(statement) -> List[str]:
+    return [c.name for c in statement.selected_columns]
+
+def iterar_lotes(statement, tamano: int = EXPORT_CHUNK_SIZE) -> Iterator[Lote]:
+    """
+    Lotes de tuplas leídos con `yield_per`. Abre su propia sesión porque en
+    el endpoint el generador sigue corriendo después de que la ruta retorna.
+    """
+    with Session(read_engine) as session:
+        result = session.execute(statement.execution_options(yield_per=tamano))
+        for particion in result.partitions():
+            yield [tuple(fila) for fila in particion]
+
+def _celda(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, Enum):
+        return valor.value
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+def generar_csv(nombres: Sequence[str], lotes: Iterable[Lote]) -> Iterator[str]:
+    """Encabezado y luego un bloque de texto por lote"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(nombres)
+    yield buffer.getvalue()
+    for lote in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_celda(v) for v in fila] for fila in lote)
+        yield buffer.getvalue()
+
+class _Sumidero:
+    """Archivo de solo escritura que acumula lo que escribe pyarrow hasta que se vacía"""
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+        self._posicion = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._partes.append(data)
+        self._posicion += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._posicion
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def vaciar(self) -> bytes:
+        data = b"".join(self._partes)
+        self._partes = []
+        return data
+
+def _esquema_arrow(statement):
+    import pyarrow as pa
+
+    campos = []
+    for columna in statement.selected_columns:
+        tipo = columna.type
+        if isinstance(tipo, Boolean):
+            arrow = pa.bool_()
+        elif isinstance(tipo, Integer):
+            arrow = pa.int64()
+        elif isinstance(tipo, Float):
+            arrow = pa.float64()
+        elif isinstance(tipo, DateTime):
+            arrow = pa.timestamp("us")
+        elif isinstance(tipo, Date):
+            arrow = pa.date32()
+        else:
+            arrow = pa.string()
+        campos.append(pa.field(columna.name, arrow))
+    return pa.schema(campos)
+
+def generar_parquet(statement, lotes: Iterable[Lote]) -> Iterator[bytes]:
+    """Un row group por lote; entrega los bytes escritos después de cada uno"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = _esquema_arrow(statement)
+    sumidero = _Sumidero()
+    with pq.ParquetWriter(sumidero, esquema, compression="snappy") as writer:
+        for lote in lotes:
+            datos = [
+                [v.value if isinstance(v, Enum) else v for v in columna]
+                for columna in zip(*lote)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(datos, esquema)],
+                schema=esquema,
+            ))
+            yield sumidero.vaciar()
+    yield sumidero.vaciar()
@@ -0,0 +1,246 @@
+"""
+Ingesta masiva de valoraciones desde exportaciones de básculas de bioimpedancia.
+
+Una `DisposicionBascula` dice qué columna del archivo corresponde a cada campo
+de `ValoracionFisicaCreate` y cómo identificar al cliente (email o id). Por cada
+lote de `INGESTA_LOTE` filas:
+
+- los clientes se resuelven con una consulta por email y otra por id;
+- la altura que falte se toma del snapshot `ultima_valoracion_cliente`;
+- las filas ya cargadas (mismo cliente y fecha) se detectan con una consulta,
+  así que volver a subir el mismo archivo no duplica nada;
+- se inserta con un solo executemany; el IMC lo calcula SQLite dentro del
+  mismo INSERT para todo el lote, en lugar de `calcular_imc` fila por fila.
+
+El snapshot y la caché de progreso de los clientes afectados se actualizan en
+la misma transacción del lote.
+"""
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError, field_validator
+from sqlalchemy import bindparam, func, insert, select
+from sqlmodel import Session
+
+from app.models.client import ClienteGym
+from app.models.valoracion import (
+    ErrorIngesta, ResultadoIngesta, TipoValoracion, UltimaValoracion, ValoracionFisica, ValoracionFisicaCreate
+)
+from app.services.progreso import invalidar_cliente
+from app.services.ultima_valoracion import registrar_lote
+
+INGESTA_LOTE = 5000
+
+CAMPOS_CREATE = list(ValoracionFisicaCreate.model_fields)
+
+class DisposicionBascula(BaseModel):
+    """Cómo leer el archivo de una báscula (encabezados sin distinguir mayúsculas)"""
+    columnas: Dict[str, str]  # campo de ValoracionFisicaCreate -> encabezado en el archivo
+    columna_email: Optional[str] = "email"
+    columna_cliente_id: Optional[str] = "cliente_id"
+    columna_fecha: str = "fecha"
+    formato_fecha: Optional[str] = None  # strptime, p. ej. "%d/%m/%Y %H:%M"; None = ISO 8601
+    separador_decimal: str = "."
+    tipo: TipoValoracion = TipoValoracion.SEGUIMIENTO
+
+    @field_validator("columnas")
+    @classmethod
+    def _campos_validos(cls, columnas: Dict[str, str]) -> Dict[str, str]:
+        invalidos = [c for c in columnas if c not in CAMPOS_CREATE or c in ("cliente_id", "tipo")]
+        if invalidos:
+            raise ValueError(f"Campos no válidos: {invalidos}")
+        return {campo: encabezado.strip().lower() for campo, encabezado in columnas.items()}
+
+_METRICAS_BASCULA = ["peso", "altura", "porcentaje_grasa", "masa_muscular", "masa_osea", "agua_corporal", "grasa_visceral"]
+
+DISPOSICIONES: Dict[str, DisposicionBascula] = {
+    # Encabezados iguales a los nombres de campo
+    "generica": DisposicionBascula(columnas={m: m for m in _METRICAS_BASCULA}),
+    # Exportación típica en inglés, con fecha día/mes/año
+    "ingles": DisposicionBascula(
+        columnas={
+            "peso": "Weight (kg)",
+            "altura": "Height (cm)",
+            "porcentaje_grasa": "Body Fat (%)",
+            "masa_muscular": "Muscle Mass (kg)",
+            "masa_osea": "Bone Mass (kg)",
+            "agua_corporal": "Body Water (%)",
+            "grasa_visceral": "Visceral Fat",
+        },
+        columna_email="Email",
+        columna_cliente_id="Client ID",
+        columna_fecha="Date",
+        formato_fecha="%d/%m/%Y %H:%M",
+    ),
+}
+
+def _texto(valor) -> Optional[str]:
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # ids leídos de XLSX
+    valor = str(valor).strip()
+    return valor or None
+
+def _numero(valor, separador_decimal: str):
+    if isinstance(valor, (int, float)) or valor is None:
+        return valor
+    valor = valor.strip()
+    if not valor:
+        return None
+    if separador_decimal != ".":
+        valor = valor.replace(".", "").replace(separador_decimal, ".")
+    return valor  # pydantic lo convierte (y lo rechaza si no es numérico)
+
+def _fecha(valor, formato: Optional[str]) -> datetime:
+    if isinstance(valor, datetime):
+        return valor
+    texto = _texto(valor)
+    if texto is None:
+        raise ValueError("fecha: requerida")
+    try:
+        return datetime.strptime(texto, formato) if formato else datetime.fromisoformat(texto)
+    except ValueError:
+        raise ValueError(f"fecha: '{texto}' no coincide con el formato {formato or 'ISO 8601'}")
+
+def _insert_con_imc():
+    """INSERT para executemany que calcula el IMC en SQLite: round(peso / (altura_m)², 2)"""
+    T = ValoracionFisica.__table__
+    # Nombres propios (p_*) porque los de columna están reservados para VALUES;
+    # el tipo de la columna se conserva para que enums y fechas se conviertan igual
+    def param(nombre: str, columna: str):
+        return bindparam(f"p_{nombre}", type_=T.c[columna].type)
+
+    altura_m = param("altura", "altura") / 100.0
+    valores = {campo: param(campo, campo) for campo in CAMPOS_CREATE}
+    valores.update(
+        fecha=param("fecha", "fecha"),
+        created_at=param("ahora", "created_at"),
+        updated_at=param("ahora", "updated_at"),
+        imc=func.round(param("peso", "peso") / (altura_m * altura_m), 2),
+    )
+    return insert(T).values(valores)
+
+def ingerir_valoraciones(
+    session: Session,
+    filas: Iterable[Tuple[int, Dict[str, object]]],
+    disposicion: DisposicionBascula,
+    tamano_lote: int = INGESTA_LOTE,
+) -> ResultadoIngesta:
+    """
+    Procesa `filas` (línea, {encabezado: valor}) por lotes, con un commit por
+    lote. Las filas inválidas o de clientes desconocidos se reportan y se omiten.
+    """
+    resultado = ResultadoIngesta()
+    vistas = set()  # (cliente_id, fecha) ya procesadas en este archivo
+    statement = _insert_con_imc()
+    col_email = (disposicion.columna_email or "").strip().lower()
+    col_id = (disposicion.columna_cliente_id or "").strip().lower()
+    col_fecha = disposicion.columna_fecha.strip().lower()
+    filas = iter(filas)
+
+    while True:
+        lote = list(islice(filas, tamano_lote))
+        if not lote:
+            break
+        resultado.total_filas += len(lote)
+        errores: List[ErrorIngesta] = []
+
+        # 1) Parseo de la fila, sin tocar la base
+        leidas = []
+        for linea, raw in lote:
+            try:
+                fecha = _fecha(raw.get(col_fecha), disposicion.formato_fecha)
+            except ValueError as e:
+                errores.append(ErrorIngesta(fila=linea, errores=[str(e)]))
+                continue
+            datos = {
+                campo: _numero(raw.get(encabezado), disposicion.separador_decimal)
+                for campo, encabezado in disposicion.columnas.items()
+            }
+            leidas.append((linea, _texto(raw.get(col_email)), _texto(raw.get(col_id)), fecha, datos))
+
+        # 2) Clientes por email e id: una consulta cada una para todo el lote
+        emails = {email for _, email, _, _, _ in leidas if email}
+        ids = {int(i) for _, _, i, _, _ in leidas if i and i.isdigit()}
+        por_email = dict(session.execute(
+            select(ClienteGym.email, ClienteGym.id).where(ClienteGym.email.in_(emails))
+        ).all()) if emails else {}
+        ids_validos = set(session.execute(
+            select(ClienteGym.id).where(ClienteGym.id.in_(ids))
+        ).scalars()) if ids else set()
+
+        def resolver(email: Optional[str], id_texto: Optional[str]) -> Optional[int]:
+            if id_texto and id_texto.isdigit() and int(id_texto) in ids_validos:
+                return int(id_texto)
+            return por_email.get(email) if email else None
+
+        resueltas = []
+        for linea, email, id_texto, fecha, datos in leidas:
+            cliente_id = resolver(email, id_texto)
+            if cliente_id is None:
+                errores.append(ErrorIngesta(fila=linea, errores=[f"cliente no encontrado ({email or id_texto or 'sin identificador'})"]))
+                continue
+            resueltas.append((linea, cliente_id, fecha, datos))
+
+        clientes = {cliente_id for _, cliente_id, _, _ in resueltas}
+
+        # 3) Altura faltante desde el snapshot (las básculas no siempre la exportan)
+        alturas = dict(session.execute(
+            select(UltimaValoracion.cliente_id, UltimaValoracion.altura).where(UltimaValoracion.cliente_id.in_(clientes))
+        ).all()) if clientes else {}
+
+        # 4) Filas ya cargadas: (cliente, fecha) dentro del rango de fechas del lote
+        existentes = set()
+        if resueltas:
+            fechas = [fecha for _, _, fecha, _ in resueltas]
+            existentes = set(session.execute(
+                select(ValoracionFisica.cliente_id, ValoracionFisica.fecha).where(
+                    ValoracionFisica.cliente_id.in_(clientes),
+                    ValoracionFisica.fecha.between(min(fechas), max(fechas)),
+                )
+            ).all())
+
+        ahora = datetime.utcnow()
+        parametros = []
+        por_cliente: Dict[int, int] = {}
+        for linea, cliente_id, fecha, datos in resueltas:
+            clave = (cliente_id, fecha)
+            if clave in existentes or clave in vistas:
+                resultado.ya_importadas += 1
+                continue
+            if datos.get("altura") is None:
+                datos["altura"] = alturas.get(cliente_id)
+            try:
+                valoracion = ValoracionFisicaCreate.model_validate(
+                    {**datos, "cliente_id": cliente_id, "tipo": disposicion.tipo}
+                )
+            except ValidationError as e:
+                errores.append(ErrorIngesta(
+                    fila=linea,
+                    errores=[f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()],
+                ))
+                continue
+            vistas.add(clave)
+            por_cliente[cliente_id] = por_cliente.get(cliente_id, 0) + 1
+            parametros.append({
+                **{f"p_{campo}": valor for campo, valor in valoracion.model_dump().items()},
+                "p_fecha": fecha,
+                "p_ahora": ahora,
+            })
+
+        # 5) Un executemany por lote; snapshot de los clientes afectados en la misma transacción
+        if parametros:
+            session.execute(statement, parametros)
+            fechas = [p["p_fecha"] for p in parametros]
+            registrar_lote(session, por_cliente, min(fechas), max(fechas))
+            session.commit()
+            for cliente_id in por_cliente:
+                invalidar_cliente(cliente_id)
+        resultado.insertadas += len(parametros)
+        resultado.errores.extend(errores)
+
+    resultado.con_errores = len(resultado.errores)
+    resultado.errores.sort(key=lambda e: e.fila)
+    return resultado
@@ -0,0 +1,180 @@
+"""
+Motor de analítica de progreso para valoraciones físicas.
+
+Todo el cálculo pesado se hace en SQLite con una sola consulta por petición:
+agregados (conteo, mínimo, máximo y las sumas de una regresión lineal) para
+cada métrica numérica de `ValoracionFisica`, más subconsultas escalares para el
+primer y último valor no nulo. Python solo arma el diccionario de respuesta.
+
+Los resultados se guardan por cliente en `progreso_cache` y se invalidan desde
+los endpoints que escriben valoraciones. Cada invalidación sube la generación
+del cliente: un cálculo que empezó antes (sobre una instantánea previa al
+commit) no se guarda si la generación cambió mientras corría.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import Float, Integer, case, func, select
+from sqlmodel import Session
+
+from app.core.cache import TTLCache
+from app.models.valoracion import ValoracionFisica
+
+_NO_METRICAS = {"id", "cliente_id"}
+
+# Todas las columnas numéricas de la valoración (peso, imc, perímetros, pliegues...)
+METRICAS: List[str] = [
+    col.name
+    for col in ValoracionFisica.__table__.columns
+    if isinstance(col.type, (Float, Integer)) and col.name not in _NO_METRICAS
+]
+
+BUCKETS = {
+    "week": "%Y-%W",
+    "month": "%Y-%m",
+}
+
+# Días de la tendencia: la pendiente se reporta como cambio por 30 días
+TENDENCIA_DIAS = 30
+
+progreso_cache = TTLCache(maxsize=512, ttl=3600)
+
+# cliente_id -> número de invalidaciones; el lock hace atómicos el chequeo y el guardado
+_generaciones: Dict[int, int] = {}
+_generaciones_lock = threading.Lock()
+
+def invalidar_cliente(cliente_id: int) -> None:
+    """Descarta los resultados cacheados de un cliente (llamar tras escribir valoraciones)"""
+    with _generaciones_lock:
+        _generaciones[cliente_id] = _generaciones.get(cliente_id, 0) + 1
+        progreso_cache.invalidate_keys(lambda key: key[1] == cliente_id)
+
+def _generacion(cliente_id: int) -> int:
+    """Leer antes de consultar: marca la instantánea sobre la que se calcula"""
+    with _generaciones_lock:
+        return _generaciones.get(cliente_id, 0)
+
+def _guardar(clave: tuple, generacion: int, resultado: dict) -> None:
+    """Cachea `resultado` salvo que el cliente se haya invalidado desde `generacion`"""
+    with _generaciones_lock:
+        if _generaciones.get(clave[1], 0) == generacion:
+            progreso_cache.set(clave, resultado)
+
+def _redondear(valor: Optional[float]) -> Optional[float]:
+    return None if valor is None else round(valor, 2)
+
+def calcular_progreso(session: Session, cliente_id: int, metricas: Optional[List[str]] = None) -> dict:
+    """
+    Primer/último valor, mínimo, máximo, cambio y tendencia (por 30 días) de
+    cada métrica, en una sola consulta. `metricas` limita las columnas que se
+    leen y agregan (por defecto todas las de METRICAS).
+
+    Conserva las claves de la respuesta original (`primera_valoracion`,
+    `ultima_valoracion`, `cambios`, ...) y agrega `metricas` con el detalle.
+    """
+    seleccion = metricas or METRICAS
+    clave = ("progreso", cliente_id, tuple(metricas or ()))
+    cacheado = progreso_cache.get(clave)
+    if cacheado is not None:
+        return cacheado
+    generacion = _generacion(cliente_id)
+
+    V = ValoracionFisica
+    dia = func.julianday(V.fecha)
+    # x = días desde la primera valoración; centrar evita perder precisión en la regresión
+    base = (
+        select(V.fecha, (dia - func.min(dia).over()).label("x"), *[getattr(V, m) for m in seleccion])
+        .where(V.cliente_id == cliente_id)
+        .cte("base")
+    )
+    x = base.c.x
+
+    columnas = [func.count().label("n"), func.min(base.c.fecha).label("desde"), func.max(base.c.fecha).label("hasta")]
+    for m in seleccion:
+        y = base.c[m]
+        xm = case((y.isnot(None), x))
+        columnas += [
+            func.count(y).label(f"{m}__n"),
+            func.min(y).label(f"{m}__min"),
+            func.max(y).label(f"{m}__max"),
+            func.sum(xm).label(f"{m}__sx"),
+            func.sum(xm * xm).label(f"{m}__sxx"),
+            func.sum(y).label(f"{m}__sy"),
+            func.sum(xm * y).label(f"{m}__sxy"),
+            select(y).where(y.isnot(None)).order_by(x.asc()).limit(1).scalar_subquery().label(f"{m}__primera"),
+            select(y).where(y.isnot(None)).order_by(x.desc()).limit(1).scalar_subquery().label(f"{m}__ultima"),
+        ]
+
+    fila = session.execute(select(*columnas).select_from(base)).mappings().one()
+
+    if fila["n"] < 2:
+        resultado = {
+            "mensaje": "Se necesitan al menos 2 valoraciones para calcular el progreso",
+            "valoraciones_count": fila["n"],
+        }
+        _guardar(clave, generacion, resultado)
+        return resultado
+
+    detalle: Dict[str, dict] = {}
+    for m in seleccion:
+        n = fila[f"{m}__n"]
+        if not n:
+            continue
+        primera, ultima = fila[f"{m}__primera"], fila[f"{m}__ultima"]
+        # Pendiente de mínimos cuadrados: (nΣxy − ΣxΣy) / (nΣx² − (Σx)²)
+        sx, sy = fila[f"{m}__sx"], fila[f"{m}__sy"]
+        denominador = n * fila[f"{m}__sxx"] - sx * sx
+        tendencia = None
+        if n >= 2 and denominador > 1e-9:
+            pendiente = (n * fila[f"{m}__sxy"] - sx * sy) / denominador
+            tendencia = pendiente * TENDENCIA_DIAS
+        detalle[m] = {
+            "primera": primera,
+            "ultima": ultima,
+            "min": fila[f"{m}__min"],
+            "max": fila[f"{m}__max"],
+            "cambio": _redondear(ultima - primera) if n >= 2 else None,
+            "tendencia_30d": _redondear(tendencia),
+            "valoraciones": n,
+        }
+
+    desde, hasta = fila["desde"], fila["hasta"]
+    resultado = {
+        "primera_valoracion": {"fecha": desde, **{m: d["primera"] for m, d in detalle.items()}},
+        "ultima_valoracion": {"fecha": hasta, **{m: d["ultima"] for m, d in detalle.items()}},
+        "cambios": {m: detalle.get(m, {}).get("cambio") for m in seleccion},
+        "metricas": detalle,
+        "total_valoraciones": fila["n"],
+        "dias_transcurridos": (hasta - desde).days,
+    }
+    _guardar(clave, generacion, resultado)
+    return resultado
+
+def serie_progreso(session: Session, cliente_id: int, metricas: List[str], bucket: str = "month") -> dict:
+    """
+    Serie reducida para gráficos: promedio de cada métrica por semana o mes,
+    agrupado en SQL para no enviar el historial crudo al frontend.
+    """
+    clave = ("serie", cliente_id, bucket, tuple(metricas))
+    cacheado = progreso_cache.get(clave)
+    if cacheado is not None:
+        return cacheado
+    generacion = _generacion(cliente_id)
+
+    V = ValoracionFisica
+    periodo = func.strftime(BUCKETS[bucket], V.fecha).label("periodo")
+    statement = (
+        select(
+            periodo,
+            func.min(V.fecha).label("desde"),
+            func.count().label("valoraciones"),
+            *[func.round(func.avg(getattr(V, m)), 2).label(m) for m in metricas],
+        )
+        .where(V.cliente_id == cliente_id)
+        .group_by(periodo)
+        .order_by(periodo)
+    )
+    puntos = [dict(fila) for fila in session.execute(statement).mappings()]
+    resultado = {"cliente_id": cliente_id, "bucket": bucket, "metricas": metricas, "puntos": puntos}
+    _guardar(clave, generacion, resultado)
+    return resultado
@@ -0,0 +1,109 @@
+"""
+Escritura por lotes de árboles de rutina (Rutina -> DiaRutina -> DetalleRutina).
+
+El número de sentencias es fijo (una por tabla) sin importar cuántos clientes,
+días o ejercicios tenga el árbol: cada nivel se inserta con un INSERT de varias
+filas y los IDs generados se recuperan con RETURNING, y se borra con un DELETE
+por tabla.
+"""
+from datetime import datetime
+from typing import Iterable, List, Set
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+
+from app.models.entrenamiento import Ejercicio, Rutina, DiaRutina, DetalleRutina
+
+def _insertar_con_ids(session: Session, modelo, filas: List[dict]) -> List[int]:
+    """
+    INSERT multi-fila que devuelve los IDs en el orden de `filas`.
+
+    SQLite no garantiza el orden de RETURNING, y pedírselo a SQLAlchemy
+    (`sort_by_parameter_order`) lo degrada a un INSERT por fila. En cambio, la
+    clave INTEGER PRIMARY KEY se asigna creciente en el orden de VALUES y la
+    transacción tiene el bloqueo de escritura, así que basta con ordenar los IDs.
+    """
+    ids = session.execute(insert(modelo).returning(modelo.id), filas).scalars().all()
+    return sorted(ids)
+
+def ejercicios_inexistentes(session: Session, ejercicio_ids: Iterable[int]) -> Set[int]:
+    """Devuelve los IDs que no existen en el catálogo (una sola consulta)"""
+    solicitados = set(ejercicio_ids)
+    if not solicitados:
+        return set()
+    existentes = session.exec(select(Ejercicio.id).where(Ejercicio.id.in_(solicitados))).all()
+    return solicitados - set(existentes)
+
+def insertar_rutinas(session: Session, plantilla, cliente_ids: List[int], entrenador_id: int) -> List[int]:
+    """
+    Inserta una copia del árbol `plantilla` para cada cliente de `cliente_ids`.
+
+    `plantilla` debe exponer los campos de `RutinaBase` y una lista `dias`, cada
+    uno con `nombre`, `orden` y `ejercicios`. No hace commit: la transacción
+    queda a cargo del llamador. Devuelve los IDs de rutina en el orden recibido.
+    """
+    if not cliente_ids:
+        return []
+
+    ahora = datetime.utcnow()
+    cabecera = {
+        "nombre": plantilla.nombre,
+        "descripcion": plantilla.descripcion,
+        "objetivo": plantilla.objetivo,
+        "nivel": plantilla.nivel,
+        "duracion_semanas": plantilla.duracion_semanas,
+        "entrenador_id": entrenador_id,
+        "activo": True,
+        "fecha_inicio": ahora,
+        "fecha_fin": None,
+    }
+    rutina_ids = _insertar_con_ids(
+        session, Rutina, [{**cabecera, "cliente_id": cliente_id} for cliente_id in cliente_ids]
+    )
+
+    if not plantilla.dias:
+        return rutina_ids
+
+    dia_ids = _insertar_con_ids(session, DiaRutina, [
+        {"rutina_id": rutina_id, "nombre": dia.nombre, "orden": dia.orden}
+        for rutina_id in rutina_ids
+        for dia in plantilla.dias
+    ])
+
+    # dia_ids sigue el orden (rutina, día), así que se recorre en el mismo orden
+    detalles = []
+    dia_iter = iter(dia_ids)
+    for _ in rutina_ids:
+        for dia in plantilla.dias:
+            dia_id = next(dia_iter)
+            for idx, ejer in enumerate(dia.ejercicios):
+                detalles.append({
+                    "dia_rutina_id": dia_id,
+                    "ejercicio_id": ejer.ejercicio_id,
+                    "orden": idx + 1,
+                    "series": ejer.series,
+                    "repeticiones": ejer.repeticiones,
+                    "peso_sugerido": ejer.peso_sugerido,
+                    "descanso_segundos": ejer.descanso_segundos,
+                    "notas": ejer.notas,
+                })
+    if detalles:
+        session.execute(insert(DetalleRutina), detalles)
+
+    return rutina_ids
+
+def eliminar_rutinas(session: Session, rutina_ids: List[int]) -> None:
+    """
+    Borra las rutinas con sus días y ejercicios: un DELETE por tabla.
+
+    El cascade del ORM cargaría primero los días y luego los ejercicios de
+    cada día (una consulta por día). No hace commit; los objetos ya cargados
+    en la sesión quedan obsoletos.
+    """
+    if not rutina_ids:
+        return
+    dias = select(DiaRutina.id).where(DiaRutina.rutina_id.in_(rutina_ids))
+    sin_sincronizar = {"synchronize_session": False}
+    session.execute(delete(DetalleRutina).where(DetalleRutina.dia_rutina_id.in_(dias)), execution_options=sin_sincronizar)
+    session.execute(delete(DiaRutina).where(DiaRutina.rutina_id.in_(rutina_ids)), execution_options=sin_sincronizar)
+    session.execute(delete(Rutina).where(Rutina.id.in_(rutina_ids)), execution_options=sin_sincronizar)
@@ -0,0 +1,157 @@
+"""
+Mantenimiento incremental de `ultima_valoracion_cliente`.
+
+Cada escritura de una valoración toca solo la fila de su cliente, con una o dos
+sentencias y dentro de la transacción del endpoint, así que el snapshot nunca
+queda desfasado respecto a `valoraciones_fisicas`. `reconstruir_snapshot`
+regenera la tabla completa (bases de datos existentes o datos cargados por
+fuera de la API).
+"""
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import DateTime, case, delete, func, insert, literal, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session
+
+from app.models.valoracion import UltimaValoracion, ValoracionFisica
+
+# Métricas copiadas al snapshot (columnas homónimas en ambas tablas)
+SNAPSHOT_METRICAS = [
+    "peso", "altura", "imc", "porcentaje_grasa",
+    "masa_muscular", "grasa_visceral", "perimetro_cintura",
+]
+
+def _valores(valoracion: ValoracionFisica) -> dict:
+    return {
+        "valoracion_id": valoracion.id,
+        "fecha": valoracion.fecha,
+        **{m: getattr(valoracion, m) for m in SNAPSHOT_METRICAS},
+        "updated_at": datetime.utcnow(),
+    }
+
+def _upsert():
+    """
+    INSERT ... ON CONFLICT que suma `total_valoraciones` al conteo y reemplaza
+    las métricas solo si la valoración recibida es la más reciente (empates por
+    fecha los gana el id mayor, igual que `ORDER BY fecha DESC, id DESC`).
+    """
+    T = UltimaValoracion.__table__
+    stmt = sqlite_insert(T)
+    es_mas_reciente = stmt.excluded.fecha >= T.c.fecha
+    return stmt.on_conflict_do_update(
+        index_elements=[T.c.cliente_id],
+        set_={
+            **{
+                col: case((es_mas_reciente, stmt.excluded[col]), else_=T.c[col])
+                for col in ["valoracion_id", "fecha", *SNAPSHOT_METRICAS]
+            },
+            "total_valoraciones": T.c.total_valoraciones + stmt.excluded.total_valoraciones,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+def registrar_creacion(session: Session, valoracion: ValoracionFisica) -> None:
+    """Upsert en una sola sentencia: suma uno al conteo y toma la valoración si es la más reciente"""
+    session.execute(
+        _upsert().values(cliente_id=valoracion.cliente_id, total_valoraciones=1, **_valores(valoracion))
+    )
+
+def registrar_lote(session: Session, insertadas: Dict[int, int], desde: datetime, hasta: datetime) -> None:
+    """
+    `registrar_creacion` para una carga masiva ya insertada (sin commit):
+    `insertadas` es {cliente_id: valoraciones nuevas} y [desde, hasta] el rango
+    de fechas del lote. Una consulta busca la más reciente de cada cliente en
+    ese rango (índice cliente_id, fecha, id) y un executemany hace el upsert.
+    """
+    if not insertadas:
+        return
+    V = ValoracionFisica.__table__
+    ranking = select(
+        V.c.cliente_id, V.c.id, V.c.fecha, *[V.c[m] for m in SNAPSHOT_METRICAS],
+        func.row_number().over(
+            partition_by=V.c.cliente_id, order_by=(V.c.fecha.desc(), V.c.id.desc())
+        ).label("rn"),
+    ).where(V.c.cliente_id.in_(list(insertadas)), V.c.fecha.between(desde, hasta)).subquery()
+    ahora = datetime.utcnow()
+    parametros = [
+        {
+            "cliente_id": fila["cliente_id"],
+            "total_valoraciones": insertadas[fila["cliente_id"]],
+            "valoracion_id": fila["id"],
+            "fecha": fila["fecha"],
+            **{m: fila[m] for m in SNAPSHOT_METRICAS},
+            "updated_at": ahora,
+        }
+        for fila in session.execute(select(ranking).where(ranking.c.rn == 1)).mappings()
+    ]
+    session.execute(_upsert(), parametros)
+
+def registrar_actualizacion(session: Session, valoracion: ValoracionFisica) -> None:
+    """Refresca las métricas solo si la valoración editada es la que está en el snapshot"""
+    session.execute(
+        update(UltimaValoracion)
+        .where(
+            UltimaValoracion.cliente_id == valoracion.cliente_id,
+            UltimaValoracion.valoracion_id == valoracion.id,
+        )
+        .values(**_valores(valoracion))
+    )
+
+def registrar_eliminacion(session: Session, valoracion: ValoracionFisica) -> None:
+    """
+    Descuenta la valoración eliminada (llamar después de `session.delete` y
+    antes del commit). Solo si era la más reciente se busca la siguiente, con
+    el índice (cliente_id, fecha, id).
+    """
+    snapshot = session.get(UltimaValoracion, valoracion.cliente_id)
+    if snapshot is None:
+        return
+    if snapshot.valoracion_id == valoracion.id or snapshot.total_valoraciones <= 1:
+        session.flush()
+        recalcular_cliente(session, valoracion.cliente_id)
+        return
+    snapshot.total_valoraciones -= 1
+    snapshot.updated_at = datetime.utcnow()
+    session.add(snapshot)
+
+def recalcular_cliente(session: Session, cliente_id: int) -> None:
+    """Recalcula desde cero la fila de un cliente (o la borra si ya no tiene valoraciones)"""
+    V = ValoracionFisica
+    ultima = session.execute(
+        select(V).where(V.cliente_id == cliente_id).order_by(V.fecha.desc(), V.id.desc()).limit(1)
+    ).scalar_one_or_none()
+    if ultima is None:
+        session.execute(delete(UltimaValoracion).where(UltimaValoracion.cliente_id == cliente_id))
+        return
+    total = session.execute(select(func.count()).where(V.cliente_id == cliente_id)).scalar_one()
+    snapshot = session.get(UltimaValoracion, cliente_id) or UltimaValoracion(cliente_id=cliente_id, **_valores(ultima))
+    for campo, valor in _valores(ultima).items():
+        setattr(snapshot, campo, valor)
+    snapshot.total_valoraciones = total
+    session.add(snapshot)
+
+def reconstruir_snapshot(session: Session) -> int:
+    """
+    Regenera toda la tabla con un único INSERT ... SELECT sobre una ventana
+    por cliente. No hace commit. Devuelve el número de clientes con snapshot.
+    """
+    V = ValoracionFisica.__table__
+    ranking = select(
+        V.c.cliente_id,
+        V.c.id.label("valoracion_id"),
+        V.c.fecha,
+        *[V.c[m] for m in SNAPSHOT_METRICAS],
+        func.row_number().over(
+            partition_by=V.c.cliente_id, order_by=(V.c.fecha.desc(), V.c.id.desc())
+        ).label("rn"),
+        func.count().over(partition_by=V.c.cliente_id).label("total_valoraciones"),
+    ).subquery()
+    columnas = ["cliente_id", "valoracion_id", "fecha", *SNAPSHOT_METRICAS, "total_valoraciones"]
+    origen = select(
+        *[ranking.c[c] for c in columnas], literal(datetime.utcnow(), DateTime()).label("updated_at")
+    ).where(ranking.c.rn == 1)
+
+    session.execute(delete(UltimaValoracion))
+    session.execute(insert(UltimaValoracion.__table__).from_select([*columnas, "updated_at"], origen))
+    return session.execute(select(func.count()).select_from(UltimaValoracion)).scalar_one()
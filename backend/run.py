@@ -1,10 +1,14 @@
-import uvicorn
+import argparse
 import os
 import sys
+import time
 
 # Ensure backend directory is in path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# First app import: starts the startup clock (cheap, stdlib only)
+from app.core.startup import startup_timer
+
 # Determine if we are running in a bundle or live and set APP_BASE_DIR BEFORE importing
 if getattr(sys, 'frozen', False):
     # Running in a bundle
@@ -16,9 +20,22 @@ else:
 # Set environment variable to help main.py find static files if needed
 os.environ["APP_BASE_DIR"] = base_dir
 
+parser = argparse.ArgumentParser(description="Gym Management App")
+parser.add_argument(
+    "--profile-startup", action="store_true",
+    help="Start the app, print a per-phase startup timing report and exit"
+)
+args, _ = parser.parse_known_args()
+
 # Debugging import issue
 try:
-    from app.main import app
+    with startup_timer.phase("import uvicorn"):
+        import uvicorn
+    with startup_timer.phase("import fastapi + sqlmodel"):
+        import fastapi
+        import sqlmodel
+    with startup_timer.phase("import app.main"):
+        from app.main import app
 except ImportError as e:
     import traceback
     traceback.print_exc()
@@ -36,6 +53,25 @@ except ImportError as e:
     input("Press Enter to exit...")
     sys.exit(1)
 
+def profile_startup(host: str, port: int):
+    """Boot the server like a normal run, report each phase once warm-up is done, then stop"""
+    import threading
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run)
+    thread.start()
+    while not server.started and thread.is_alive():
+        time.sleep(0.005)
+    if not server.started:
+        sys.exit(1)
+    startup_timer.mark("ready (accepting requests)")
+    startup_timer.warmed_up.wait(timeout=120)
+    server.should_exit = True
+    thread.join()
+    print(startup_timer.report())
+
 if __name__ == "__main__":
     # Listen on localhost, port 8000
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    if args.profile_startup:
+        profile_startup(host="127.0.0.1", port=8000)
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,244 @@
+"""
+Benchmark del modo async (DB_ASYNC) contra el modo sync de la API
+
+Carga una base temporal (clientes, valoraciones y rutinas), levanta uvicorn en
+un proceso aparte una vez por modo (DB_ASYNC=0 y DB_ASYNC=1) sobre esa misma
+base y la golpea con N clientes concurrentes, cada uno con su conexión
+keep-alive, alternando los endpoints calientes: listado y detalle de clientes,
+listado de valoraciones y rutinas por cliente. Informa requests/s y latencia
+p50/p99 por modo y concurrencia. Requiere aiosqlite para el modo async.
+
+Uso:
+    python scripts/bench_async_db.py
+    python scripts/bench_async_db.py --concurrency 50 200 --seconds 10 --clientes 1000
+    python scripts/bench_async_db.py --modos async --rutas clientes valoraciones login
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# Base temporal: debe configurarse antes de importar la app
+os.environ.setdefault("DB_FILE", os.path.join(tempfile.mkdtemp(prefix="bench_async_"), "bench.db"))
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Agregar el directorio backend al path
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app.core.db import ASYNC_DRIVER_AVAILABLE, create_db_and_tables, engine
+from app.core.security import get_password_hash
+from app.models.client import ClienteGym
+from app.models.entrenamiento import Ejercicio
+from app.models.user import Role, Usuario
+from app.models.valoracion import ValoracionFisica
+from app.services.rutinas import insertar_rutinas
+
+def cargar_datos(clientes: int, valoraciones: int, rutinas: int):
+    """Clientes con su historial de valoraciones y rutinas de 3 días x 5 ejercicios"""
+    rnd = random.Random(42)
+    create_db_and_tables()
+    with Session(engine) as session:
+        admin = Usuario(
+            email="admin@gym.com", full_name="Admin Entrenador",
+            hashed_password=get_password_hash("admin123"), role=Role.ADMIN
+        )
+        session.add(admin)
+        session.commit()
+
+        ahora = datetime.utcnow()
+        session.execute(insert(ClienteGym.__table__), [
+            {"nombre": f"Cliente{i}", "apellido": f"Bench{i % 50}", "email": f"bench{i}@example.com",
+             "created_at": ahora, "updated_at": ahora}
+            for i in range(clientes)
+        ])
+        ejercicios = [Ejercicio(nombre=f"Ejercicio {i}", grupo_muscular="Pecho") for i in range(20)]
+        session.add_all(ejercicios)
+        session.commit()
+
+        inicio = ahora - timedelta(days=valoraciones * 7)
+        filas = []
+        for cliente_id in range(1, clientes + 1):
+            for k in range(valoraciones):
+                peso = round(rnd.uniform(60, 95), 1)
+                fecha = inicio + timedelta(days=k * 7)
+                filas.append({
+                    "cliente_id": cliente_id, "fecha": fecha, "tipo": "SEGUIMIENTO",
+                    "peso": peso, "altura": 175.0, "imc": round(peso / 1.75 ** 2, 2),
+                    "porcentaje_grasa": round(rnd.uniform(12, 25), 1),
+                    "created_at": fecha, "updated_at": fecha,
+                })
+        session.execute(insert(ValoracionFisica.__table__), filas)
+
+        plantilla = SimpleNamespace(
+            nombre="Hipertrofia", descripcion=None, objetivo=None, nivel="Intermedio", duracion_semanas=4,
+            dias=[
+                SimpleNamespace(nombre=f"Día {d}", orden=d, ejercicios=[
+                    SimpleNamespace(ejercicio_id=ejercicios[(d * 5 + e) % 20].id, series=4, repeticiones="8-12",
+                                    peso_sugerido=None, descanso_segundos=90, notas=None)
+                    for e in range(5)
+                ])
+                for d in range(1, 4)
+            ],
+        )
+        for _ in range(rutinas):
+            insertar_rutinas(session, plantilla, list(range(1, clientes + 1)), entrenador_id=admin.id)
+        session.commit()
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(port: int, modo: str, log) -> subprocess.Popen:
+    """uvicorn en su propio proceso para que los hilos del generador no le roben el GIL"""
+    env = {**os.environ, "DB_ASYNC": "1" if modo == "async" else "0"}
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    limite = time.perf_counter() + 30
+    while time.perf_counter() < limite:
+        try:
+            conexion = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conexion.request("GET", "/health")
+            if conexion.getresponse().status == 200:
+                return proceso
+        except OSError:
+            time.sleep(0.1)
+    proceso.kill()
+    raise RuntimeError(f"El servidor en modo {modo} no arrancó")
+
+def login(port: int) -> str:
+    conexion = http.client.HTTPConnection("127.0.0.1", port)
+    conexion.request(
+        "POST", "/api/auth/login",
+        body=urllib.parse.urlencode({"username": "admin@gym.com", "password": "admin123"}),
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    return json.loads(conexion.getresponse().read())["access_token"]
+
+RUTAS = {
+    "clientes": lambda rnd, n: ("GET", "/api/clients/?limit=50", None),
+    "cliente": lambda rnd, n: ("GET", f"/api/clients/{rnd.randint(1, n)}", None),
+    "valoraciones": lambda rnd, n: ("GET", f"/api/valoraciones/?cliente_id={rnd.randint(1, n)}&limit=50", None),
+    "rutinas": lambda rnd, n: ("GET", f"/api/entrenamientos/rutinas/cliente/{rnd.randint(1, n)}", None),
+    # bcrypt domina su latencia; solo se incluye si se pide con --rutas
+    "login": lambda rnd, n: (
+        "POST", "/api/auth/login", urllib.parse.urlencode({"username": "admin@gym.com", "password": "admin123"})
+    ),
+}
+RUTAS_POR_DEFECTO = ["clientes", "cliente", "valoraciones", "rutinas"]
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def run_level(port: int, token: str, rutas, clientes: int, concurrency: int, seconds: float) -> dict:
+    stop = time.perf_counter() + seconds
+    latencias, errores = [], [0]
+    lock = threading.Lock()
+
+    def worker(semilla: int):
+        rnd = random.Random(semilla)
+        conexion = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        propias, fallidas = [], 0
+        i = semilla
+        while time.perf_counter() < stop:
+            metodo, url, body = RUTAS[rutas[i % len(rutas)]](rnd, clientes)
+            i += 1
+            headers = {"Authorization": f"Bearer {token}"}
+            if body:
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+            inicio = time.perf_counter()
+            try:
+                conexion.request(metodo, url, body=body, headers=headers)
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                if respuesta.status >= 400:
+                    fallidas += 1
+                else:
+                    propias.append(time.perf_counter() - inicio)
+            except (OSError, http.client.HTTPException):
+                fallidas += 1
+                conexion.close()
+                conexion = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        conexion.close()
+        with lock:
+            latencias.extend(propias)
+            errores[0] += fallidas
+
+    inicio_total = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for f in [pool.submit(worker, n) for n in range(concurrency)]:
+            f.result()
+    # Incluye las requests que seguían en curso al vencer el tiempo
+    transcurrido = time.perf_counter() - inicio_total
+
+    return {
+        "requests_per_sec": len(latencias) / transcurrido,
+        "p50_ms": percentile(latencias, 50) * 1000,
+        "p99_ms": percentile(latencias, 99) * 1000,
+        "errores": errores[0],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--modos", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    parser.add_argument("--rutas", nargs="+", choices=list(RUTAS), default=RUTAS_POR_DEFECTO)
+    parser.add_argument("--clientes", type=int, default=500)
+    parser.add_argument("--valoraciones", type=int, default=20, help="Valoraciones por cliente")
+    parser.add_argument("--rutinas", type=int, default=2, help="Rutinas por cliente")
+    args = parser.parse_args()
+
+    if "async" in args.modos and not ASYNC_DRIVER_AVAILABLE:
+        print("❌ El modo async requiere aiosqlite y greenlet: pip install aiosqlite greenlet")
+        sys.exit(1)
+
+    print(f"📦 Cargando {args.clientes} clientes, {args.valoraciones} valoraciones y {args.rutinas} rutinas por cliente...")
+    cargar_datos(args.clientes, args.valoraciones, args.rutinas)
+    print(f"🚀 Rutas: {', '.join(args.rutas)} ({args.seconds:.0f}s por nivel)\n")
+
+    print(f"{'Modo':>6}{'Concurrencia':>14}{'Req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'Errores':>9}")
+    hubo_errores = False
+    for modo in args.modos:
+        port = free_port()
+        log_path = os.path.join(os.path.dirname(os.environ["DB_FILE"]), f"uvicorn_{modo}.log")
+        with open(log_path, "w") as log:
+            servidor = start_server(port, modo, log)
+            try:
+                token = login(port)
+                # Calentamiento: caché de principal, pools y páginas de SQLite
+                run_level(port, token, args.rutas, args.clientes, 8, 1)
+                for level in args.concurrency:
+                    r = run_level(port, token, args.rutas, args.clientes, level, args.seconds)
+                    hubo_errores = hubo_errores or r["errores"] > 0
+                    print(f"{modo:>6}{level:>14}{r['requests_per_sec']:>10.1f}{r['p50_ms']:>10.1f}"
+                          f"{r['p99_ms']:>10.1f}{r['errores']:>9}")
+            finally:
+                servidor.terminate()
+                servidor.wait()
+    if hubo_errores:
+        print(f"\n⚠️  Hubo errores; el log de cada servidor está en {os.path.dirname(os.environ['DB_FILE'])}")
+
+if __name__ == "__main__":
+    main()
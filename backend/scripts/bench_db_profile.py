@@ -0,0 +1,135 @@
+"""
+Benchmark del perfil de motor SQLite bajo carga mixta (lecturas + escrituras)
+
+Compara el perfil "legacy" (pysqlite por defecto, un solo pool) contra el
+perfil "production" (WAL + pragmas + pool de solo lectura para las consultas
+analíticas). Cada perfil corre sobre su propia base temporal con los mismos
+datos iniciales.
+
+Uso:
+    python scripts/bench_db_profile.py --seconds 10 --writers 4 --readers 8
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Agregar el directorio backend al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel, Session, select
+
+from app.core.db import build_engine
+from app.models.client import ClienteGym
+from app.models.user import Usuario
+from app.models.valoracion import ValoracionFisica
+
+def seed(engine, clientes: int, valoraciones_por_cliente: int):
+    SQLModel.metadata.create_all(engine)
+    rnd = random.Random(42)
+    base = datetime.utcnow() - timedelta(days=365)
+    with Session(engine) as session:
+        session.add_all(
+            ClienteGym(nombre=f"Cliente{i}", apellido="Bench", email=f"bench{i}@example.com")
+            for i in range(clientes)
+        )
+        session.commit()
+        rows = []
+        for cliente_id in range(1, clientes + 1):
+            for n in range(valoraciones_por_cliente):
+                rows.append(ValoracionFisica(
+                    cliente_id=cliente_id,
+                    fecha=base + timedelta(days=n * 30),
+                    peso=rnd.uniform(55, 110),
+                    altura=rnd.uniform(150, 195),
+                    porcentaje_grasa=rnd.uniform(10, 35),
+                ))
+        session.add_all(rows)
+        session.commit()
+
+def run_profile(profile: str, args) -> dict:
+    tmpdir = tempfile.mkdtemp(prefix=f"bench_{profile}_")
+    url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    writer = build_engine(url, profile=profile)
+    seed(writer, args.clientes, args.valoraciones)
+    # El perfil legacy no tiene pool de lectura: todo comparte el mismo motor
+    reader = build_engine(url, profile=profile, read_only=True) if profile == "production" else writer
+
+    stats = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + args.seconds
+
+    def write_loop(seed_value: int):
+        rnd = random.Random(seed_value)
+        while time.perf_counter() < stop:
+            try:
+                with Session(writer) as session:
+                    session.add(ValoracionFisica(
+                        cliente_id=rnd.randint(1, args.clientes),
+                        peso=rnd.uniform(55, 110),
+                        altura=rnd.uniform(150, 195),
+                    ))
+                    session.commit()
+                key = "writes"
+            except OperationalError:
+                key = "errors"
+            with lock:
+                stats[key] += 1
+
+    def read_loop():
+        while time.perf_counter() < stop:
+            try:
+                with Session(reader) as session:
+                    session.exec(
+                        select(
+                            ValoracionFisica.cliente_id,
+                            func.avg(ValoracionFisica.peso),
+                            func.max(ValoracionFisica.fecha),
+                        ).group_by(ValoracionFisica.cliente_id)
+                    ).all()
+                key = "reads"
+            except OperationalError:
+                key = "errors"
+            with lock:
+                stats[key] += 1
+
+    threads = [threading.Thread(target=write_loop, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=read_loop) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    writer.dispose()
+    reader.dispose()
+    return {
+        "profile": profile,
+        "writes_per_sec": round(stats["writes"] / args.seconds, 1),
+        "reads_per_sec": round(stats["reads"] / args.seconds, 1),
+        "locked_errors": stats["errors"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--clientes", type=int, default=500)
+    parser.add_argument("--valoraciones", type=int, default=20, help="Valoraciones iniciales por cliente")
+    args = parser.parse_args()
+
+    print(f"🚀 Carga mixta: {args.writers} escritores, {args.readers} lectores, {args.seconds}s por perfil\n")
+    results = [run_profile(profile, args) for profile in ("legacy", "production")]
+
+    print(f"{'Perfil':<12}{'Escrituras/s':>14}{'Lecturas/s':>12}{'Locked':>9}")
+    for r in results:
+        print(f"{r['profile']:<12}{r['writes_per_sec']:>14}{r['reads_per_sec']:>12}{r['locked_errors']:>9}")
+
+if __name__ == "__main__":
+    main()
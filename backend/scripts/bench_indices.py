@@ -0,0 +1,188 @@
+"""
+Benchmark de las migraciones de índices: consultas calientes antes y después
+
+Genera una base sintética grande con la forma de un gym.db desplegado antes
+de los índices compuestos (solo claves primarias y emails únicos, versión de
+esquema 0), mide las consultas de los endpoints calientes, aplica las
+migraciones (`app/core/schema.py`, con ANALYZE) y vuelve a medir. Muestra la
+mediana y el p95 por consulta y el plan de SQLite (SCAN = tabla completa,
+SEARCH = índice).
+
+Uso:
+    python scripts/bench_indices.py
+    python scripts/bench_indices.py --clientes 20000 --valoraciones 50 --rutinas 3 --repeticiones 300
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Base temporal: debe configurarse antes de importar la app
+os.environ.setdefault("DB_FILE", os.path.join(tempfile.mkdtemp(prefix="bench_indices_"), "bench.db"))
+
+# Agregar el directorio backend al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import func, insert, select as sa_select
+from sqlmodel import SQLModel, Session, select
+
+from app.api.clients import _client_criteria, _clients_page
+from app.api.entrenamientos import _consulta_dias_y_detalles, _consulta_rutinas
+from app.api.valoraciones import _criterios_valoraciones, _pagina_valoraciones
+from app.core.db import engine
+from app.core.schema import migrate
+from app.models.client import ClienteGym
+from app.models.entrenamiento import DetalleRutina, DiaRutina, Ejercicio, Rutina
+from app.models.user import Role, Usuario
+from app.models.valoracion import ValoracionFisica
+
+def crear_base_antigua():
+    """Tablas como en un gym.db sin versionar: se quitan los índices de __table_args__"""
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                # Los de Field(index=True) existían desde el principio
+                if not index._column_flag:
+                    connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+        connection.exec_driver_sql("PRAGMA user_version = 0")
+
+def cargar_datos(clientes: int, valoraciones: int, rutinas: int, entrenadores: int = 20):
+    rnd = random.Random(42)
+    ahora = datetime.utcnow()
+    with Session(engine) as session:
+        session.execute(insert(Usuario.__table__), [
+            {"email": f"entrenador{i}@gym.com", "full_name": f"Entrenador {i}", "hashed_password": "x",
+             "role": Role.ADMIN, "is_active": True}
+            for i in range(entrenadores)
+        ])
+        session.execute(insert(ClienteGym.__table__), [
+            {"nombre": f"Cliente{i}", "apellido": f"Bench{i % 500}", "email": f"bench{i}@example.com",
+             "tipo_usuario": "PRESENCIAL", "activo": i % 10 != 0, "fecha_inicio": ahora.date(),
+             "entrenador_id": rnd.randint(1, entrenadores), "created_at": ahora, "updated_at": ahora}
+            for i in range(clientes)
+        ])
+        session.execute(insert(Ejercicio.__table__), [
+            {"nombre": f"Ejercicio {i}", "grupo_muscular": "Pecho", "created_at": ahora} for i in range(100)
+        ])
+
+        # Valoraciones intercaladas entre clientes, como llegan en la vida real
+        inicio = ahora - timedelta(days=valoraciones * 7)
+        for k in range(valoraciones):
+            fecha = inicio + timedelta(days=k * 7)
+            filas = []
+            for cliente_id in range(1, clientes + 1):
+                peso = round(rnd.uniform(60, 95), 1)
+                filas.append({
+                    "cliente_id": cliente_id, "fecha": fecha, "tipo": "SEGUIMIENTO", "peso": peso,
+                    "altura": 175.0, "imc": round(peso / 1.75 ** 2, 2), "created_at": fecha, "updated_at": fecha,
+                })
+            session.execute(insert(ValoracionFisica.__table__), filas)
+
+        rutina_id = dia_id = 0
+        for r in range(rutinas):
+            filas_rutina, filas_dia, filas_detalle = [], [], []
+            for cliente_id in range(1, clientes + 1):
+                rutina_id += 1
+                filas_rutina.append({
+                    "id": rutina_id, "nombre": f"Rutina {r}", "nivel": "Intermedio", "duracion_semanas": 4,
+                    "cliente_id": cliente_id, "entrenador_id": 1, "activo": r == rutinas - 1,
+                    "fecha_inicio": ahora - timedelta(weeks=4 * (rutinas - r)),
+                })
+                for d in range(1, 5):
+                    dia_id += 1
+                    filas_dia.append({"id": dia_id, "rutina_id": rutina_id, "nombre": f"Día {d}", "orden": d})
+                    filas_detalle.extend(
+                        {"dia_rutina_id": dia_id, "ejercicio_id": rnd.randint(1, 100), "orden": e,
+                         "series": 4, "repeticiones": "8-12", "descanso_segundos": 90}
+                        for e in range(1, 7)
+                    )
+            session.execute(insert(Rutina.__table__), filas_rutina)
+            session.execute(insert(DiaRutina.__table__), filas_dia)
+            session.execute(insert(DetalleRutina.__table__), filas_detalle)
+        session.commit()
+
+def consultas(session: Session, cliente_id: int):
+    """Las consultas de los endpoints calientes, construidas con sus mismos helpers"""
+    rutina_ids = session.exec(select(Rutina.id).where(Rutina.cliente_id == cliente_id)).all()
+    entrenador_id = session.get(ClienteGym, cliente_id).entrenador_id
+    return {
+        "rutinas del cliente": _consulta_rutinas(cliente_id, None, None),
+        "validador de rutinas (COUNT/MAX)": sa_select(func.count(), func.max(Rutina.id)).where(Rutina.cliente_id == cliente_id),
+        "días y ejercicios de sus rutinas": _consulta_dias_y_detalles(rutina_ids),
+        "valoraciones del cliente (página)": _pagina_valoraciones(
+            select(ValoracionFisica), _criterios_valoraciones(cliente_id, None, None), None, 100
+        ),
+        "valoraciones del cliente (rango)": _pagina_valoraciones(
+            select(ValoracionFisica),
+            _criterios_valoraciones(cliente_id, datetime.utcnow() - timedelta(days=180), None), None, 100
+        ),
+        "clientes de un entrenador": _clients_page(
+            _client_criteria(None, None, entrenador_id), None, 0, 100, "id", "asc"
+        ),
+    }
+
+def plan(session: Session, statement) -> str:
+    compilado = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    filas = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compilado}").all()
+    return " | ".join(fila[-1] for fila in filas)
+
+def medir(clientes: int, repeticiones: int):
+    rnd = random.Random(7)
+    muestra = [rnd.randint(1, clientes) for _ in range(repeticiones)]
+    tiempos, planes = {}, {}
+    with Session(engine) as session:
+        for cliente_id in muestra[:5]:  # calentar la caché de páginas
+            for statement in consultas(session, cliente_id).values():
+                session.execute(statement).all()
+        for cliente_id in muestra:
+            for nombre, statement in consultas(session, cliente_id).items():
+                inicio = time.perf_counter()
+                session.execute(statement).all()
+                tiempos.setdefault(nombre, []).append(time.perf_counter() - inicio)
+        for nombre, statement in consultas(session, muestra[0]).items():
+            planes[nombre] = plan(session, statement)
+    return {
+        nombre: (statistics.median(t) * 1000, sorted(t)[int(len(t) * 0.95) - 1] * 1000)
+        for nombre, t in tiempos.items()
+    }, planes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clientes", type=int, default=10000)
+    parser.add_argument("--valoraciones", type=int, default=30, help="Valoraciones por cliente")
+    parser.add_argument("--rutinas", type=int, default=2, help="Rutinas por cliente (4 días x 6 ejercicios)")
+    parser.add_argument("--repeticiones", type=int, default=100, help="Clientes al azar medidos por consulta")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    crear_base_antigua()
+    cargar_datos(args.clientes, args.valoraciones, args.rutinas)
+    print(f"📦 {args.clientes} clientes, {args.clientes * args.valoraciones} valoraciones, "
+          f"{args.clientes * args.rutinas} rutinas ({args.clientes * args.rutinas * 24} ejercicios) "
+          f"en {time.perf_counter() - inicio:.1f}s -> {os.environ['DB_FILE']}")
+
+    antes, planes_antes = medir(args.clientes, args.repeticiones)
+
+    print("\n🔧 Migrando:")
+    inicio = time.perf_counter()
+    migrate(engine, on_step=lambda m, s: print(f"   v{m.version} {m.description}: {s:.2f}s"))
+    print(f"   total con ANALYZE: {time.perf_counter() - inicio:.2f}s")
+
+    despues, planes_despues = medir(args.clientes, args.repeticiones)
+
+    print(f"\n{'Consulta':<36}{'antes p50':>11}{'p95':>9}{'después p50':>13}{'p95':>9}{'mejora':>9}")
+    for nombre, (p50, p95) in antes.items():
+        d50, d95 = despues[nombre]
+        print(f"{nombre:<36}{p50:>9.2f}ms{p95:>7.2f}ms{d50:>11.3f}ms{d95:>7.3f}ms{p50 / d50 if d50 else 0:>8.0f}x")
+
+    print("\n📋 Planes de SQLite:")
+    for nombre in antes:
+        print(f"   {nombre}\n      antes:   {planes_antes[nombre]}\n      después: {planes_despues[nombre]}")
+
+if __name__ == "__main__":
+    main()
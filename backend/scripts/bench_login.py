@@ -0,0 +1,115 @@
+"""
+Benchmark de throughput de login a distintos niveles de concurrencia
+
+Levanta la app con uvicorn sobre una base temporal, dispara logins concurrentes
+y, en paralelo, mide la latencia de /health para comprobar que el resto de la
+API no se bloquea mientras bcrypt trabaja en su pool dedicado.
+
+Uso:
+    python scripts/bench_login.py --concurrency 1 4 16 64 --seconds 5
+    BCRYPT_ROUNDS=10 PASSWORD_HASH_WORKERS=4 python scripts/bench_login.py
+"""
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Base temporal: debe configurarse antes de importar la app
+os.environ.setdefault("DB_FILE", os.path.join(tempfile.mkdtemp(prefix="bench_login_"), "bench.db"))
+
+# Agregar el directorio backend al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import uvicorn
+from app.core.config import settings
+from app.main import app
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def run_level(base_url: str, concurrency: int, seconds: float) -> dict:
+    body = urllib.parse.urlencode({"username": "admin@gym.com", "password": "admin123"}).encode()
+    stop = time.perf_counter() + seconds
+    latencias, health, rechazos = [], [], [0]
+    lock = threading.Lock()
+
+    def login_loop():
+        while time.perf_counter() < stop:
+            inicio = time.perf_counter()
+            try:
+                urllib.request.urlopen(f"{base_url}/api/auth/login", data=body).read()
+                with lock:
+                    latencias.append(time.perf_counter() - inicio)
+            except urllib.error.HTTPError as e:
+                if e.code != 503:
+                    raise
+                with lock:
+                    rechazos[0] += 1
+
+    def health_loop():
+        while time.perf_counter() < stop:
+            inicio = time.perf_counter()
+            urllib.request.urlopen(f"{base_url}/health").read()
+            health.append(time.perf_counter() - inicio)
+            time.sleep(0.02)
+
+    inicio_total = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency + 1) as pool:
+        futures = [pool.submit(login_loop) for _ in range(concurrency)]
+        futures.append(pool.submit(health_loop))
+        for f in futures:
+            f.result()
+    # Incluye la cola de logins que seguían en curso al vencer el tiempo
+    transcurrido = time.perf_counter() - inicio_total
+
+    return {
+        "concurrency": concurrency,
+        "logins_per_sec": len(latencias) / transcurrido,
+        "p50_ms": percentile(latencias, 50) * 1000,
+        "p95_ms": percentile(latencias, 95) * 1000,
+        "rejected_503": rechazos[0],
+        "health_p95_ms": percentile(health, 95) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(port)
+    base_url = f"http://127.0.0.1:{port}"
+    print(f"🚀 bcrypt rounds={settings.BCRYPT_ROUNDS}, workers={settings.PASSWORD_HASH_WORKERS}, "
+          f"cola={settings.PASSWORD_HASH_QUEUE_SIZE}\n")
+    print(f"{'Concurrencia':>12}{'Logins/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'503':>6}{'/health p95 ms':>16}")
+    for level in args.concurrency:
+        r = run_level(base_url, level, args.seconds)
+        print(f"{r['concurrency']:>12}{r['logins_per_sec']:>10.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+              f"{r['rejected_503']:>6}{r['health_p95_ms']:>16.1f}")
+    server.should_exit = True
+
+if __name__ == "__main__":
+    main()
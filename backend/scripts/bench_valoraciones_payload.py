@@ -0,0 +1,156 @@
+"""
+Benchmark de tamaño de respuesta y latencia del historial de valoraciones
+
+Carga un cliente con un historial largo (10.000 valoraciones por defecto) en una
+base temporal y recorre el listado completo página por página, con y sin
+proyección `fields=` y con y sin compresión, midiendo bytes transferidos y
+latencia. También mide el progreso con y sin `fields=`.
+
+Uso:
+    python scripts/bench_valoraciones_payload.py
+    python scripts/bench_valoraciones_payload.py --rows 10000 --repeat 5 --fields fecha,peso,imc
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+
+# Base temporal: debe configurarse antes de importar la app
+os.environ.setdefault("DB_FILE", os.path.join(tempfile.mkdtemp(prefix="bench_payload_"), "bench.db"))
+
+# Agregar el directorio backend al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import uvicorn
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app.core.compression import brotli
+from app.core.db import engine
+from app.main import app
+from app.models.client import ClienteGym
+from app.models.valoracion import ValoracionFisica
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+def cargar_historial(filas: int) -> int:
+    """Un cliente con `filas` valoraciones diarias, insertadas en un solo executemany"""
+    random.seed(42)
+    with Session(engine) as session:
+        cliente = ClienteGym(nombre="Bench", apellido="Payload", email=f"bench{time.time_ns()}@gym.com")
+        session.add(cliente)
+        session.commit()
+        inicio = datetime(2000, 1, 1)
+        valoraciones = []
+        for i in range(filas):
+            peso = 80 + random.uniform(-5, 5)
+            valoraciones.append({
+                "cliente_id": cliente.id,
+                "fecha": inicio + timedelta(days=i),
+                "tipo": "SEGUIMIENTO",
+                "peso": round(peso, 1),
+                "altura": 175.0,
+                "imc": round(peso / 1.75 ** 2, 2),
+                "porcentaje_grasa": round(random.uniform(12, 25), 1),
+                "masa_muscular": round(random.uniform(30, 40), 1),
+                "perimetro_cintura": round(random.uniform(75, 95), 1),
+                "frecuencia_cardiaca_reposo": random.randint(55, 75),
+                "notas": "Valoración de seguimiento generada para el benchmark",
+                "created_at": inicio + timedelta(days=i),
+                "updated_at": inicio + timedelta(days=i),
+            })
+        session.execute(insert(ValoracionFisica.__table__), valoraciones)
+        session.commit()
+        return cliente.id
+
+def login(base_url: str) -> str:
+    body = urllib.parse.urlencode({"username": "admin@gym.com", "password": "admin123"}).encode()
+    with urllib.request.urlopen(f"{base_url}/api/auth/login", data=body) as r:
+        return json.loads(r.read())["access_token"]
+
+def get(url: str, token: str, encoding: str):
+    """Devuelve (bytes en el cable, encabezados); urllib no descomprime"""
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}", "Accept-Encoding": encoding})
+    with urllib.request.urlopen(request) as r:
+        return len(r.read()), r.headers
+
+def recorrer_historial(base_url: str, token: str, cliente_id: int, encoding: str, fields: str, limit: int):
+    """Todas las páginas del historial siguiendo X-Next-Cursor: (bytes, segundos)"""
+    params = {"cliente_id": cliente_id, "limit": limit}
+    if fields:
+        params["fields"] = fields
+    total, cursor = 0, None
+    inicio = time.perf_counter()
+    while True:
+        if cursor:
+            params["cursor"] = cursor
+        size, headers = get(f"{base_url}/api/valoraciones/?{urllib.parse.urlencode(params)}", token, encoding)
+        total += size
+        cursor = headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    return total, time.perf_counter() - inicio
+
+def medir(funcion, repeat: int):
+    resultados = [funcion() for _ in range(repeat)]
+    return resultados[0][0], statistics.median(r[1] for r in resultados)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=1000, help="Tamaño de página del listado")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fields", default="fecha,peso,imc,porcentaje_grasa,masa_muscular")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(port)
+    base_url = f"http://127.0.0.1:{port}"
+    print(f"📦 Cargando {args.rows} valoraciones...")
+    cliente_id = cargar_historial(args.rows)
+    token = login(base_url)
+
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    print(f"\n{'Endpoint':<28}{'Campos':<10}{'Encoding':<10}{'KB':>10}{'ms (mediana)':>15}")
+    for fields_label, fields in (("todos", ""), ("fields", args.fields)):
+        for encoding in encodings:
+            size, segundos = medir(
+                lambda: recorrer_historial(base_url, token, cliente_id, encoding, fields, args.limit), args.repeat
+            )
+            print(f"{'historial completo':<28}{fields_label:<10}{encoding:<10}{size / 1024:>10.1f}{segundos * 1000:>15.1f}")
+
+    # El progreso se cachea por cliente: la primera repetición es la que consulta la base
+    ruta = f"/api/valoraciones/cliente/{cliente_id}/progreso"
+    metricas = ",".join(f for f in args.fields.split(",") if f != "fecha")
+    for fields_label, query in (("todos", ""), ("fields", f"?fields={metricas}")):
+        for encoding in encodings:
+            def una():
+                inicio = time.perf_counter()
+                size, _ = get(f"{base_url}{ruta}{query}", token, encoding)
+                return size, time.perf_counter() - inicio
+            size, segundos = medir(una, args.repeat)
+            print(f"{'progreso':<28}{fields_label:<10}{encoding:<10}{size / 1024:>10.1f}{segundos * 1000:>15.1f}")
+
+    server.should_exit = True
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ from sqlmodel import Session, select
 from app.core.db import engine
 from app.models.client import ClienteGym
 from app.models.valoracion import ValoracionFisica, TipoValoracion
+from app.services.ultima_valoracion import recalcular_cliente
 
 def create_sample_data():
     with Session(engine) as session:
@@ -226,6 +227,9 @@ def create_sample_data():
             session.add(valoracion)
             print(f"  {i}. {data['tipo'].value} - {data['fecha'].strftime('%d/%m/%Y')} - Peso: {data['peso']}kg")
         
+        # Mantener el snapshot de última valoración (estas filas no pasan por la API)
+        session.flush()
+        recalcular_cliente(session, cliente.id)
         session.commit()
         print(f"\n✅ Datos de prueba creados exitosamente!")
         print(f"\n📈 Resumen del Progreso:")
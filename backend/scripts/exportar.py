@@ -0,0 +1,79 @@
+"""
+Exporta clientes, valoraciones o rutinas a CSV o Parquet
+
+Lee y escribe por lotes (igual que el endpoint /api/exportaciones), así que la
+memoria no depende del tamaño de la tabla. Al terminar informa filas, tamaño
+y throughput en filas/s, lo que sirve también como benchmark de exportación.
+
+Uso:
+    python scripts/exportar.py valoraciones -o valoraciones.csv
+    python scripts/exportar.py rutinas --formato parquet -o rutinas.parquet
+    python scripts/exportar.py valoraciones --desde 2024-01-01 --hasta 2025-01-01 --cliente-id 3 -o v.csv
+    python scripts/exportar.py valoraciones --formato parquet -o /dev/null --medir-memoria
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+# Agregar el directorio backend al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.db import create_db_and_tables
+from app.services.exportacion import (
+    ENTIDADES, EXPORT_CHUNK_SIZE, FORMATOS, PARQUET_DISPONIBLE,
+    columnas, consulta_exportacion, generar_csv, generar_parquet, iterar_lotes
+)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entidad", choices=ENTIDADES)
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("-o", "--salida", required=True, help="Archivo de destino")
+    parser.add_argument("--desde", type=datetime.fromisoformat, help="Fecha mínima (inclusive), ISO 8601")
+    parser.add_argument("--hasta", type=datetime.fromisoformat, help="Fecha máxima (exclusiva), ISO 8601")
+    parser.add_argument("--cliente-id", type=int)
+    parser.add_argument("--lote", type=int, default=EXPORT_CHUNK_SIZE, help="Filas por lote")
+    parser.add_argument("--medir-memoria", action="store_true", help="Reportar el pico de memoria (más lento)")
+    args = parser.parse_args()
+
+    if args.formato == "parquet" and not PARQUET_DISPONIBLE:
+        print("❌ Exportación Parquet no disponible: instale pyarrow")
+        sys.exit(1)
+
+    create_db_and_tables()
+    statement = consulta_exportacion(args.entidad, args.desde, args.hasta, args.cliente_id)
+
+    filas = 0
+    def contar(lotes):
+        nonlocal filas
+        for lote in lotes:
+            filas += len(lote)
+            yield lote
+
+    if args.medir_memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    lotes = contar(iterar_lotes(statement, args.lote))
+    if args.formato == "parquet":
+        with open(args.salida, "wb") as f:
+            for bloque in generar_parquet(statement, lotes):
+                f.write(bloque)
+    else:
+        # utf-8-sig: Excel abre el CSV con tildes correctas
+        with open(args.salida, "w", encoding="utf-8-sig", newline="") as f:
+            for bloque in generar_csv(columnas(statement), lotes):
+                f.write(bloque)
+    segundos = time.perf_counter() - inicio
+
+    tamano = os.path.getsize(args.salida) if os.path.isfile(args.salida) else 0
+    print(f"✅ {filas} filas de {args.entidad} -> {args.salida} ({tamano / 1024 / 1024:.1f} MB)")
+    print(f"⏱️  {segundos:.2f}s, {filas / segundos if segundos else 0:,.0f} filas/s (lotes de {args.lote})")
+    if args.medir_memoria:
+        _, pico = tracemalloc.get_traced_memory()
+        print(f"🧠 Pico de memoria: {pico / 1024 / 1024:.1f} MB")
+
+if __name__ == "__main__":
+    main()
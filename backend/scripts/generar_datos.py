@@ -0,0 +1,74 @@
+"""
+Genera un conjunto de datos sintético y reproducible con la escala de un gimnasio grande
+
+Entrenadores, clientes, series de valoraciones con deriva plausible y rutinas
+con días y ejercicios del catálogo (ver `app/services/datos_sinteticos.py`).
+La misma semilla, los mismos parámetros y la misma fecha `--hasta` producen
+exactamente los mismos datos. Aplica las migraciones y carga el catálogo si
+faltan; se puede generar sobre una base con datos (los ids continúan).
+
+Conviene apuntar a una base aparte con DB_FILE. Los entrenadores se llaman
+entrenador<id>@gym.test y comparten la contraseña de --password.
+
+Uso:
+    DB_FILE=grande.db python scripts/generar_datos.py --clientes 100000 --valoraciones 2000000 --rutinas 150000
+    DB_FILE=demo.db python scripts/generar_datos.py --clientes 500 --semilla 7 --hasta 2025-06-30
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+# Agregar el directorio backend al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import func, select
+from sqlmodel import Session
+
+from app.core.db import engine, sqlite_file_name
+from app.core.schema import migrate
+from app.models.entrenamiento import Ejercicio
+from app.services.datos_sinteticos import ParametrosGeneracion, generar
+from seed_ejercicios import seed_ejercicios
+
+def main():
+    defecto = ParametrosGeneracion()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clientes", type=int, default=defecto.clientes)
+    parser.add_argument("--entrenadores", type=int, default=defecto.entrenadores)
+    parser.add_argument("--valoraciones", type=int, default=defecto.valoraciones, help="Total, repartidas por antigüedad")
+    parser.add_argument("--rutinas", type=int, default=defecto.rutinas, help="Total, con 3 a 5 días cada una")
+    parser.add_argument("--semilla", type=int, default=defecto.semilla)
+    parser.add_argument("--hasta", type=date.fromisoformat, default=defecto.hasta,
+                        help="Fecha de referencia AAAA-MM-DD (por defecto hoy); fíjala para reproducir los datos")
+    parser.add_argument("--anios", type=int, default=defecto.anios, help="Antigüedad máxima de los clientes")
+    parser.add_argument("--lote", type=int, default=defecto.lote, help="Filas por transacción")
+    parser.add_argument("--password", default=defecto.password_entrenadores, help="Contraseña de los entrenadores")
+    args = parser.parse_args()
+
+    parametros = ParametrosGeneracion(
+        clientes=args.clientes, entrenadores=max(args.entrenadores, 1), valoraciones=args.valoraciones,
+        rutinas=args.rutinas, semilla=args.semilla, hasta=args.hasta, anios=args.anios, lote=args.lote,
+        password_entrenadores=args.password,
+    )
+
+    print(f"🚀 Generando datos en {sqlite_file_name} (semilla {parametros.semilla}, hasta {parametros.hasta})")
+    migrate(engine)
+    with Session(engine) as session:
+        catalogo_vacio = not session.execute(select(func.count()).select_from(Ejercicio)).scalar_one()
+    if catalogo_vacio:
+        seed_ejercicios()
+
+    inicio = time.perf_counter()
+    resumen = generar(
+        engine, parametros,
+        on_etapa=lambda nombre, filas, segundos: print(
+            f"   {nombre}: {filas} filas en {segundos:.1f}s ({filas / segundos if segundos else 0:,.0f} filas/s)"
+        ),
+    )
+    print(f"✅ {sum(resumen.values())} filas en {time.perf_counter() - inicio:.1f}s: "
+          + ", ".join(f"{tabla} {filas}" for tabla, filas in resumen.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Carga valoraciones desde la exportación CSV/XLSX de una báscula de bioimpedancia
+
+La disposición de columnas se elige por nombre (--disposicion) o se pasa en un
+JSON con la forma de `DisposicionBascula` (--mapeo), por ejemplo:
+
+    {"columnas": {"peso": "Peso", "porcentaje_grasa": "Grasa %"},
+     "columna_email": "Correo", "columna_fecha": "Fecha",
+     "formato_fecha": "%d/%m/%Y %H:%M", "separador_decimal": ","}
+
+Volver a cargar el mismo archivo no duplica valoraciones. Al terminar informa
+el throughput en filas/s.
+
+Uso:
+    python scripts/importar_bascula.py mediciones.csv
+    python scripts/importar_bascula.py export.csv --disposicion ingles
+    python scripts/importar_bascula.py export.xlsx --mapeo mi_bascula.json
+"""
+import argparse
+import os
+import sys
+import time
+
+# Agregar el directorio backend al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlmodel import Session
+from app.core.db import engine, create_db_and_tables
+from app.core.tabular import ImportFileError, read_rows
+from app.services.ingesta_bascula import DISPOSICIONES, INGESTA_LOTE, DisposicionBascula, ingerir_valoraciones
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("archivo", help="Archivo .csv o .xlsx")
+    parser.add_argument("--disposicion", choices=DISPOSICIONES, default="generica")
+    parser.add_argument("--mapeo", help="JSON con una DisposicionBascula (reemplaza --disposicion)")
+    parser.add_argument("--lote", type=int, default=INGESTA_LOTE, help="Filas por transacción")
+    args = parser.parse_args()
+
+    if args.mapeo:
+        with open(args.mapeo, encoding="utf-8") as f:
+            disposicion = DisposicionBascula.model_validate_json(f.read())
+    else:
+        disposicion = DISPOSICIONES[args.disposicion]
+
+    create_db_and_tables()
+    inicio = time.perf_counter()
+    with open(args.archivo, "rb") as f, Session(engine) as session:
+        try:
+            resultado = ingerir_valoraciones(session, read_rows(f, args.archivo), disposicion, args.lote)
+        except ImportFileError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    segundos = time.perf_counter() - inicio
+
+    print(f"✅ {resultado.total_filas} filas en {segundos:.2f}s "
+          f"({resultado.total_filas / segundos if segundos else 0:,.0f} filas/s)")
+    print(f"   Insertadas: {resultado.insertadas}, ya importadas: {resultado.ya_importadas}, "
+          f"con errores: {resultado.con_errores}")
+    for error in resultado.errores[:10]:
+        print(f"   fila {error.fila}: {'; '.join(error.errores)}")
+    if resultado.con_errores > 10:
+        print(f"   ... y {resultado.con_errores - 10} más")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Importa clientes desde un CSV o XLSX
+
+La primera fila debe tener los nombres de campo de `ClienteGymCreate` (nombre,
+apellido, email, telefono, fecha_nacimiento, tipo_usuario, ...). Se inserta por
+lotes con una sola consulta de emails duplicados por lote; las filas inválidas
+o repetidas se omiten y se listan en el reporte de errores.
+
+Uso:
+    python scripts/importar_clientes.py socios.csv
+    python scripts/importar_clientes.py socios.xlsx --entrenador-id 1 --errores errores.csv
+    python scripts/importar_clientes.py socios.csv --dry-run
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+# Agregar el directorio backend al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlmodel import Session
+from app.core.db import engine, create_db_and_tables
+from app.core.tabular import ImportFileError, read_rows
+from app.services.client_import import IMPORT_BATCH_SIZE, import_clients
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("archivo", help="Archivo .csv o .xlsx")
+    parser.add_argument("--entrenador-id", type=int, help="Entrenador asignado a los clientes importados")
+    parser.add_argument("--lote", type=int, default=IMPORT_BATCH_SIZE, help="Filas por transacción")
+    parser.add_argument("--dry-run", action="store_true", help="Validar sin insertar")
+    parser.add_argument("--errores", help="Guardar el reporte de errores en este CSV")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    inicio = time.perf_counter()
+    with open(args.archivo, "rb") as f, Session(engine) as session:
+        try:
+            resultado = import_clients(
+                session, read_rows(f, args.archivo),
+                entrenador_id=args.entrenador_id, batch_size=args.lote, dry_run=args.dry_run,
+            )
+        except ImportFileError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    segundos = time.perf_counter() - inicio
+
+    accion = "válidas (dry-run)" if args.dry_run else "importadas"
+    print(f"✅ {resultado.imported} de {resultado.total_rows} filas {accion} en {segundos:.2f}s "
+          f"({resultado.total_rows / segundos if segundos else 0:,.0f} filas/s)")
+    if resultado.failed:
+        print(f"⚠️  {resultado.failed} filas con errores")
+        for error in resultado.errors[:10]:
+            print(f"   fila {error.row} ({error.email or 'sin email'}): {'; '.join(error.errors)}")
+        if resultado.failed > 10 and not args.errores:
+            print("   ... use --errores archivo.csv para el reporte completo")
+    if args.errores:
+        with open(args.errores, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["fila", "email", "errores"])
+            for error in resultado.errors:
+                writer.writerow([error.row, error.email or "", "; ".join(error.errors)])
+        print(f"📄 Reporte de errores: {args.errores}")
+
+if __name__ == "__main__":
+    main()
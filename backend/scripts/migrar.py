@@ -0,0 +1,53 @@
+"""
+Aplica las migraciones de esquema pendientes sobre la base (DB_FILE)
+
+La app las aplica sola al arrancar; este script sirve para migrar antes de
+actualizar, ver en qué versión está una base o detenerse en una versión.
+Termina con ANALYZE para que el planificador use los índices nuevos.
+
+Uso:
+    python scripts/migrar.py
+    python scripts/migrar.py --estado
+    DB_FILE=copia.db python scripts/migrar.py --hasta 1
+"""
+import argparse
+import os
+import sys
+import time
+
+# Agregar el directorio backend al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.db import engine, sqlite_file_name
+from app.core.schema import MIGRATIONS, SCHEMA_VERSION, migrate, stored_version
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--estado", action="store_true", help="Mostrar versión actual y pendientes, sin migrar")
+    parser.add_argument("--hasta", type=int, default=SCHEMA_VERSION, help="Versión destino")
+    args = parser.parse_args()
+
+    with engine.connect() as connection:
+        actual = stored_version(connection)
+    pendientes = [m for m in MIGRATIONS if actual < m.version <= args.hasta]
+    print(f"📦 {sqlite_file_name}: versión {actual} (última {SCHEMA_VERSION})")
+
+    if args.estado:
+        for m in pendientes:
+            print(f"   pendiente v{m.version}: {m.description}")
+        if not pendientes:
+            print("✅ Al día")
+        return
+
+    inicio = time.perf_counter()
+    aplicadas = migrate(
+        engine, target=args.hasta,
+        on_step=lambda m, segundos: print(f"   v{m.version} {m.description}: {segundos * 1000:.0f} ms"),
+    )
+    if aplicadas:
+        print(f"✅ {len(aplicadas)} migraciones aplicadas en {time.perf_counter() - inicio:.2f}s")
+    else:
+        print("✅ Al día, nada que aplicar")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+Prueba de carga HTTP de la API con escenarios realistas y percentiles por ruta
+
+Genera una base sintética (scripts/generar_datos.py, con semilla y fecha fijas
+para que las corridas sean comparables) o usa una existente con --base,
+levanta `app.main:app` con uvicorn en un proceso aparte y la recorre con N
+usuarios virtuales. Cada uno inicia sesión como un entrenador y repite
+escenarios elegidos al azar según su peso:
+
+- navegar_clientes: primera página de sus clientes y, a veces, la siguiente
+- perfil_cliente: ficha, historial de valoraciones, progreso y rutinas
+- listar_valoraciones: últimas valoraciones de todo el gimnasio
+- rutinas: rutinas de un cliente
+- nueva_valoracion: registra una valoración
+- login: vuelve a iniciar sesión (bcrypt domina su latencia)
+
+Informa requests/s y latencia p50/p95/p99 por ruta en JSON. Con --baseline
+compara contra una corrida guardada y termina con código 1 si alguna ruta
+empeora más que --tolerancia (o si hubo errores HTTP). Todo corre en local.
+
+Uso:
+    python scripts/prueba_carga.py --usuarios 20 --segundos 30 --salida resultados.json
+    python scripts/prueba_carga.py --guardar-baseline baseline_carga.json
+    python scripts/prueba_carga.py --baseline baseline_carga.json --tolerancia 0.25
+    python scripts/prueba_carga.py --base grande.db --usuarios 50 --modo async
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+from typing import Dict, List
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+ESCENARIOS_PESOS = {
+    "navegar_clientes": 25,
+    "perfil_cliente": 30,
+    "listar_valoraciones": 15,
+    "rutinas": 15,
+    "nueva_valoracion": 10,
+    "login": 5,
+}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def generar_base(ruta: str, args) -> None:
+    subprocess.run(
+        [sys.executable, os.path.join(BACKEND_DIR, "scripts", "generar_datos.py"),
+         "--clientes", str(args.clientes), "--valoraciones", str(args.valoraciones),
+         "--rutinas", str(args.rutinas), "--semilla", str(args.semilla), "--hasta", args.hasta,
+         "--password", args.password],
+        env={**os.environ, "DB_FILE": ruta}, check=True, stdout=subprocess.DEVNULL,
+    )
+
+def datos_de_la_base(ruta: str) -> dict:
+    """Ids de clientes y (id, email) de los entrenadores para armar las peticiones"""
+    conexion = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+    try:
+        clientes = [fila[0] for fila in conexion.execute("SELECT id FROM clientegym")]
+        entrenadores = [
+            tuple(fila) for fila in conexion.execute(
+                "SELECT id, email FROM usuario WHERE email LIKE 'entrenador%@gym.test' AND is_active"
+            )
+        ]
+    finally:
+        conexion.close()
+    if not clientes or not entrenadores:
+        raise SystemExit(f"❌ {ruta} no tiene clientes o entrenadores generados con scripts/generar_datos.py")
+    return {"clientes": clientes, "entrenadores": entrenadores}
+
+def start_server(ruta: str, port: int, modo: str, log) -> subprocess.Popen:
+    """uvicorn en su propio proceso para que los hilos de la carga no le roben el GIL"""
+    env = {**os.environ, "DB_FILE": ruta, "DB_ASYNC": "1" if modo == "async" else "0"}
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    limite = time.perf_counter() + 60
+    while time.perf_counter() < limite and proceso.poll() is None:
+        try:
+            conexion = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conexion.request("GET", "/health")
+            if conexion.getresponse().status == 200:
+                return proceso
+        except OSError:
+            time.sleep(0.1)
+    proceso.kill()
+    raise RuntimeError("El servidor no arrancó; revisa su log")
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+class UsuarioVirtual:
+    """Un entrenador con su conexión keep-alive; registra latencias por ruta"""
+
+    def __init__(self, n: int, port: int, datos: dict, args, inicio_medicion: float):
+        self.rnd = random.Random(f"{args.semilla}:usuario:{n}")
+        self.port = port
+        self.datos = datos
+        self.args = args
+        self.inicio_medicion = inicio_medicion
+        self.entrenador_id, self.email = datos["entrenadores"][n % len(datos["entrenadores"])]
+        self.token = None
+        self.latencias: Dict[str, List[float]] = {}
+        self.errores: Dict[str, int] = {}
+        self.conexion = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+
+    def pedir(self, ruta: str, metodo: str, url: str, body=None, headers=None) -> http.client.HTTPResponse:
+        """Hace la petición y la anota bajo `ruta` (la plantilla, sin ids)"""
+        headers = dict(headers or {})
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        inicio = time.perf_counter()
+        try:
+            self.conexion.request(metodo, url, body=body, headers=headers)
+            respuesta = self.conexion.getresponse()
+            respuesta.contenido = respuesta.read()
+            fallo = respuesta.status >= 400
+        except (OSError, http.client.HTTPException):
+            self.conexion.close()
+            self.conexion = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+            respuesta, fallo = None, True
+        if inicio >= self.inicio_medicion:
+            if fallo:
+                self.errores[ruta] = self.errores.get(ruta, 0) + 1
+            else:
+                self.latencias.setdefault(ruta, []).append(time.perf_counter() - inicio)
+        return respuesta
+
+    def cliente_al_azar(self) -> int:
+        return self.rnd.choice(self.datos["clientes"])
+
+    def login(self):
+        self.token = None
+        respuesta = self.pedir(
+            "POST /api/auth/login", "POST", "/api/auth/login",
+            body=urllib.parse.urlencode({"username": self.email, "password": self.args.password}),
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        if respuesta is not None and respuesta.status == 200:
+            self.token = json.loads(respuesta.contenido)["access_token"]
+
+    def navegar_clientes(self):
+        url = f"/api/clients/?entrenador_id={self.entrenador_id}&activo=true&sort=apellido&limit=50"
+        respuesta = self.pedir("GET /api/clients/", "GET", url)
+        siguiente = respuesta.getheader("X-Next-Cursor") if respuesta is not None else None
+        if siguiente and self.rnd.random() < 0.4:
+            self.pedir("GET /api/clients/ (cursor)", "GET", f"{url}&cursor={urllib.parse.quote(siguiente)}")
+
+    def perfil_cliente(self):
+        cliente_id = self.cliente_al_azar()
+        self.pedir("GET /api/clients/{id}", "GET", f"/api/clients/{cliente_id}")
+        self.pedir("GET /api/valoraciones/?cliente_id", "GET", f"/api/valoraciones/?cliente_id={cliente_id}&limit=50")
+        self.pedir("GET /api/valoraciones/cliente/{id}/progreso", "GET", f"/api/valoraciones/cliente/{cliente_id}/progreso")
+        self.rutinas(cliente_id)
+
+    def listar_valoraciones(self):
+        self.pedir("GET /api/valoraciones/", "GET", "/api/valoraciones/?limit=50")
+
+    def rutinas(self, cliente_id: int = None):
+        cliente_id = cliente_id or self.cliente_al_azar()
+        self.pedir(
+            "GET /api/entrenamientos/rutinas/cliente/{id}", "GET", f"/api/entrenamientos/rutinas/cliente/{cliente_id}"
+        )
+
+    def nueva_valoracion(self):
+        peso = round(self.rnd.uniform(55, 105), 1)
+        cuerpo = {
+            "cliente_id": self.cliente_al_azar(),
+            "peso": peso,
+            "altura": round(self.rnd.uniform(150, 195), 1),
+            "porcentaje_grasa": round(self.rnd.uniform(10, 35), 1),
+            "perimetro_cintura": round(peso * 0.55 + 30, 1),
+            "notas": "Prueba de carga",
+        }
+        self.pedir(
+            "POST /api/valoraciones/", "POST", "/api/valoraciones/",
+            body=json.dumps(cuerpo), headers={"Content-Type": "application/json"},
+        )
+
+    def correr(self, fin: float, escenarios: List[str], pesos: List[int]):
+        self.login()
+        while time.perf_counter() < fin:
+            getattr(self, self.rnd.choices(escenarios, pesos)[0])()
+            if self.args.pausa_ms:
+                time.sleep(self.args.pausa_ms / 1000)
+        self.conexion.close()
+
+def ejecutar(port: int, datos: dict, args) -> dict:
+    escenarios = [e for e in ESCENARIOS_PESOS if e in args.escenarios]
+    pesos = [ESCENARIOS_PESOS[e] for e in escenarios]
+    inicio_medicion = time.perf_counter() + args.calentamiento
+    fin = inicio_medicion + args.segundos
+    usuarios = [UsuarioVirtual(n, port, datos, args, inicio_medicion) for n in range(args.usuarios)]
+    hilos = [threading.Thread(target=u.correr, args=(fin, escenarios, pesos)) for u in usuarios]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    # Incluye las peticiones que seguían en curso al vencer el tiempo
+    transcurrido = time.perf_counter() - inicio_medicion
+
+    rutas = {}
+    for ruta in sorted({r for u in usuarios for r in [*u.latencias, *u.errores]}):
+        latencias = sorted(l for u in usuarios for l in u.latencias.get(ruta, []))
+        rutas[ruta] = {
+            "requests": len(latencias),
+            "errores": sum(u.errores.get(ruta, 0) for u in usuarios),
+            "rps": round(len(latencias) / transcurrido, 2),
+            "p50_ms": round(percentile(latencias, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencias, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencias, 99) * 1000, 2),
+            "max_ms": round((latencias[-1] if latencias else 0) * 1000, 2),
+        }
+    total = sum(r["requests"] for r in rutas.values())
+    return {
+        "escenario": {
+            "usuarios": args.usuarios, "segundos": args.segundos, "modo": args.modo,
+            "escenarios": escenarios, "pausa_ms": args.pausa_ms, "base": args.base,
+            "clientes": len(datos["clientes"]), "semilla": args.semilla, "hasta": args.hasta,
+        },
+        "entorno": {
+            "python": platform.python_version(), "plataforma": platform.platform(),
+            "cpus": os.cpu_count(), "fecha": datetime.utcnow().isoformat(timespec="seconds"),
+        },
+        "total": {
+            "requests": total,
+            "errores": sum(r["errores"] for r in rutas.values()),
+            "rps": round(total / transcurrido, 2),
+        },
+        "rutas": rutas,
+    }
+
+def comparar(resultado: dict, baseline: dict, tolerancia: float, margen_ms: float) -> List[str]:
+    """Regresiones de cada ruta del baseline: latencia p95/p99, throughput y errores nuevos.
+
+    La tabla va a stderr para que stdout siga siendo solo el JSON.
+    """
+    regresiones = []
+    print(f"\n{'Ruta':<46}{'p95 base':>10}{'p95':>9}{'p99 base':>10}{'p99':>9}{'req/s base':>12}{'req/s':>9}", file=sys.stderr)
+    for ruta, base in baseline["rutas"].items():
+        actual = resultado["rutas"].get(ruta)
+        if actual is None:
+            regresiones.append(f"{ruta}: no se ejecutó")
+            continue
+        problemas = []
+        # Con menos de 100 muestras el p99 es casi el máximo: solo ruido
+        claves = ("p95_ms", "p99_ms") if base["requests"] >= 100 else ("p95_ms",)
+        for clave in claves:
+            if actual[clave] > base[clave] * (1 + tolerancia) and actual[clave] - base[clave] > margen_ms:
+                problemas.append(f"{clave} {base[clave]:.1f} -> {actual[clave]:.1f}")
+        if actual["rps"] < base["rps"] * (1 - tolerancia):
+            problemas.append(f"req/s {base['rps']:.1f} -> {actual['rps']:.1f}")
+        if actual["errores"] and not base["errores"]:
+            problemas.append(f"{actual['errores']} errores")
+        marca = "❌" if problemas else "✅"
+        print(f"{marca} {ruta:<44}{base['p95_ms']:>10.1f}{actual['p95_ms']:>9.1f}{base['p99_ms']:>10.1f}"
+              f"{actual['p99_ms']:>9.1f}{base['rps']:>12.1f}{actual['rps']:>9.1f}", file=sys.stderr)
+        regresiones.extend(f"{ruta}: {p}" for p in problemas)
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=20, help="Usuarios virtuales concurrentes")
+    parser.add_argument("--segundos", type=float, default=20, help="Duración de la medición")
+    parser.add_argument("--calentamiento", type=float, default=3, help="Segundos iniciales que no se miden")
+    parser.add_argument("--pausa-ms", type=float, default=0, help="Pausa entre escenarios de cada usuario")
+    parser.add_argument("--escenarios", nargs="+", choices=list(ESCENARIOS_PESOS), default=list(ESCENARIOS_PESOS))
+    parser.add_argument("--modo", choices=["sync", "async"], default="sync", help="DB_ASYNC del servidor")
+    parser.add_argument("--base", help="Base ya generada con scripts/generar_datos.py (por defecto, una temporal)")
+    parser.add_argument("--clientes", type=int, default=2000)
+    parser.add_argument("--valoraciones", type=int, default=40000)
+    parser.add_argument("--rutinas", type=int, default=3000)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--hasta", default="2025-06-30", help="Fecha de referencia de los datos generados")
+    parser.add_argument("--password", default="entrenador123", help="Contraseña de los entrenadores")
+    parser.add_argument("--salida", help="Archivo JSON para los resultados (por defecto, stdout)")
+    parser.add_argument("--baseline", help="Resultados previos contra los que comparar")
+    parser.add_argument("--guardar-baseline", help="Guardar estos resultados como baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Empeoramiento relativo admitido (0.25 = 25%%)")
+    parser.add_argument("--margen-ms", type=float, default=2.0, help="Diferencia absoluta mínima de latencia para fallar")
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix="prueba_carga_")
+    ruta = args.base
+    if not ruta:
+        ruta = os.path.join(directorio, "carga.db")
+        print(f"📦 Generando {args.clientes} clientes, {args.valoraciones} valoraciones y {args.rutinas} rutinas...",
+              file=sys.stderr)
+        generar_base(ruta, args)
+    elif "nueva_valoracion" in args.escenarios:
+        print(f"⚠️  El escenario nueva_valoracion agrega valoraciones a {ruta}", file=sys.stderr)
+    datos = datos_de_la_base(ruta)
+
+    log_path = os.path.join(directorio, "uvicorn.log")
+    port = free_port()
+    with open(log_path, "w") as log:
+        servidor = start_server(ruta, port, args.modo, log)
+        try:
+            print(f"🚀 {args.usuarios} usuarios, {args.segundos:.0f}s (+{args.calentamiento:.0f}s de calentamiento), "
+                  f"modo {args.modo}", file=sys.stderr)
+            resultado = ejecutar(port, datos, args)
+        finally:
+            servidor.terminate()
+            servidor.wait()
+
+    salida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(salida)
+    else:
+        print(salida)
+    if args.guardar_baseline:
+        with open(args.guardar_baseline, "w", encoding="utf-8") as f:
+            f.write(salida)
+        print(f"💾 Baseline guardado en {args.guardar_baseline}", file=sys.stderr)
+
+    fallos = []
+    if resultado["total"]["errores"]:
+        fallos.append(f"{resultado['total']['errores']} errores HTTP (log del servidor: {log_path})")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            fallos.extend(comparar(resultado, json.load(f), args.tolerancia, args.margen_ms))
+    if fallos:
+        print("\n❌ Regresiones:", file=sys.stderr)
+        for fallo in fallos:
+            print(f"   {fallo}", file=sys.stderr)
+        sys.exit(1)
+    print(f"\n✅ {resultado['total']['rps']:.1f} req/s sin regresiones", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Reconstruye la tabla `ultima_valoracion_cliente` (última valoración por cliente)
+
+Necesario una vez en bases de datos creadas antes de que existiera el snapshot,
+o después de cargar valoraciones por fuera de la API.
+
+Uso:
+    python scripts/rebuild_ultima_valoracion.py
+"""
+import os
+import sys
+import time
+
+# Agregar el directorio backend al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlmodel import Session
+from app.core.db import engine, create_db_and_tables
+from app.models.client import ClienteGym
+from app.models.user import Usuario
+from app.models.entrenamiento import Ejercicio
+from app.services.ultima_valoracion import reconstruir_snapshot
+
+def main():
+    create_db_and_tables()
+    inicio = time.perf_counter()
+    with Session(engine) as session:
+        clientes = reconstruir_snapshot(session)
+        session.commit()
+    print(f"✅ Snapshot reconstruido: {clientes} clientes en {time.perf_counter() - inicio:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Regresiones de consultas: atajo para correr `tests/test_consultas.py`
+
+Un caso por cada ruta de la API sobre una base sintética temporal: falla si
+un endpoint ejecuta más sentencias SQL que su máximo (un N+1) o si el plan
+de SQLite recorre entera una tabla grande que el caso no declara. Los casos
+viven en la suite de pytest; este script solo elige el modo y la salida.
+Necesita pytest y httpx.
+
+Uso:
+    python scripts/verificar_consultas.py
+    python scripts/verificar_consultas.py --modo async
+    python scripts/verificar_consultas.py --detalle -k clients
+"""
+import argparse
+import os
+import sys
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Cualquier otra opción se pasa a pytest."
+    )
+    parser.add_argument("--modo", choices=["sync", "async"], default="sync",
+                        help="async: handlers de aiosqlite (DB_ASYNC), requiere aiosqlite y greenlet")
+    parser.add_argument("--detalle", action="store_true",
+                        help="Mostrar las sentencias y planes también de los casos que pasan")
+    args, opciones_pytest = parser.parse_known_args()
+
+    # Antes de que la suite importe la app
+    os.environ["DB_ASYNC"] = "true" if args.modo == "async" else "false"
+
+    import pytest
+
+    opciones = ["-c", os.path.join(BACKEND, "pytest.ini"), os.path.join(BACKEND, "tests", "test_consultas.py")]
+    if args.detalle:
+        opciones.append("-rP")
+    sys.exit(pytest.main(opciones + opciones_pytest))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Fixtures compartidas: la app sobre una base SQLite temporal y un contador de
+sentencias SQL.
+
+La configuración (`app.core.config`) se lee al importar la app, así que el
+entorno se fija aquí, antes de cualquier import de `app`. Con `DB_ASYNC=true`
+en el entorno, la suite corre contra los handlers async (requiere aiosqlite).
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import List
+
+_directorio = tempfile.mkdtemp(prefix="gym_tests_")
+os.environ["DB_FILE"] = os.path.join(_directorio, "tests.db")
+os.environ.setdefault("DB_ASYNC", "false")
+os.environ["TRACE_SAMPLE_RATE"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_directorio, ignore_errors=True)
+
+class ContadorSQL:
+    """Sentencias ejecutadas por cualquiera de los motores de la app dentro de `contar()`"""
+
+    def __init__(self):
+        self.sentencias: List[str] = []
+        self.parametros: List[tuple] = []
+        self._activo = False
+
+    def registrar(self, conn, cursor, statement, parameters, context, executemany):
+        if self._activo:
+            self.sentencias.append(statement)
+            self.parametros.append((parameters, executemany))
+
+    @contextmanager
+    def contar(self):
+        self.sentencias.clear()
+        self.parametros.clear()
+        self._activo = True
+        try:
+            yield self.sentencias
+        finally:
+            self._activo = False
+
+@pytest.fixture(scope="session")
+def cliente_http():
+    from app.core.startup import startup_timer
+    from app.main import app
+
+    with TestClient(app) as cliente:  # el lifespan crea el esquema y el admin
+        # El índice del catálogo se arma en el warm-up: que no se cuele en una medición
+        startup_timer.warmed_up.wait(timeout=60)
+        yield cliente
+
+@pytest.fixture(scope="session")
+def cabeceras(cliente_http):
+    token = cliente_http.post(
+        "/api/auth/login", data={"username": "admin@gym.com", "password": "admin123"}
+    ).json()["access_token"]
+    cabeceras = {"Authorization": f"Bearer {token}"}
+    cliente_http.get("/api/users/me", headers=cabeceras)  # principal en caché, como en uso normal
+    return cabeceras
+
+@pytest.fixture(scope="session")
+def sql(cliente_http):
+    from app.core.db import async_engine, async_read_engine, engine, read_engine
+
+    contador = ContadorSQL()
+    motores = [
+        getattr(motor, "sync_engine", motor)
+        for motor in (engine, read_engine, async_engine, async_read_engine) if motor is not None
+    ]
+    for motor in motores:
+        event.listen(motor, "before_cursor_execute", contador.registrar)
+    yield contador
+    for motor in motores:
+        event.remove(motor, "before_cursor_execute", contador.registrar)
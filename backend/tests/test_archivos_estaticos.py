@@ -0,0 +1,51 @@
+"""Frontend servido desde memoria: cada codificación con su propio ETag"""
+import gzip
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.static_files import StaticBundle
+
+def _cliente(raiz) -> tuple:
+    (raiz / "assets").mkdir()
+    cuerpo = b"console.log('gym');\n" * 200
+    (raiz / "assets" / "index-abc123.js").write_bytes(cuerpo)
+    bundle = StaticBundle(str(raiz), compress_min_bytes=1024)
+    bundle.compress_pending()
+
+    app = FastAPI()
+
+    @app.get("/{ruta:path}")
+    def servir(ruta: str, request: Request):
+        return bundle.serve(request, bundle.get(ruta))
+
+    return TestClient(app), bundle.get("assets/index-abc123.js"), cuerpo
+
+def test_etag_por_codificacion(tmp_path):
+    cliente, archivo, cuerpo = _cliente(tmp_path)
+    ruta = "/assets/index-abc123.js"
+
+    identidad = cliente.get(ruta, headers={"Accept-Encoding": "identity"})
+    comprimido = cliente.get(ruta, headers={"Accept-Encoding": "gzip"})
+    assert identidad.content == cuerpo and "content-encoding" not in identidad.headers
+    assert comprimido.headers["content-encoding"] == "gzip"
+    assert identidad.headers["etag"] == archivo.etag
+    assert comprimido.headers["etag"] == archivo.etag[:-1] + '-gzip"'
+
+    # El 304 solo vale para la representación que el cliente tiene guardada
+    assert cliente.get(ruta, headers={"Accept-Encoding": "gzip",
+                                      "If-None-Match": comprimido.headers["etag"]}).status_code == 304
+    distinto = cliente.get(ruta, headers={"Accept-Encoding": "identity",
+                                          "If-None-Match": comprimido.headers["etag"]})
+    assert distinto.status_code == 200 and distinto.content == cuerpo
+    assert cliente.get(ruta, headers={"Accept-Encoding": "identity",
+                                      "If-None-Match": identidad.headers["etag"]}).status_code == 304
+
+def test_rangos_sobre_la_identidad(tmp_path):
+    cliente, archivo, cuerpo = _cliente(tmp_path)
+    parcial = cliente.get("/assets/index-abc123.js", headers={
+        "Accept-Encoding": "gzip", "Range": "bytes=0-9", "If-Range": archivo.etag,
+    })
+    assert parcial.status_code == 206 and parcial.content == cuerpo[:10]
+    assert parcial.headers["etag"] == archivo.etag
+    assert gzip.decompress(archivo.encoded["gzip"]) == cuerpo
@@ -0,0 +1,21 @@
+"""Arranque sobre una base ya migrada por fuera de la app"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+LOGIN = '''
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as cliente:
+    respuesta = cliente.post("/api/auth/login", data={"username": "admin@gym.com", "password": "admin123"})
+    assert respuesta.status_code == 200, respuesta.text
+'''
+
+def test_admin_en_base_migrada_antes_del_primer_arranque(tmp_path):
+    entorno = {**os.environ, "DB_FILE": str(tmp_path / "migrada.db"), "PYTHONPATH": str(BACKEND), "TRACE_SAMPLE_RATE": "0"}
+    for comando in (["scripts/migrar.py"], ["-c", LOGIN]):
+        proceso = subprocess.run([sys.executable, *comando], env=entorno, cwd=BACKEND, capture_output=True, text=True)
+        assert proceso.returncode == 0, proceso.stdout + proceso.stderr
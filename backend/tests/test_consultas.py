@@ -0,0 +1,278 @@
+"""
+Regresiones de consultas: cuántas sentencias SQL ejecuta cada endpoint y con qué plan
+
+Sobre una base sintética (`app/services/datos_sinteticos.py`, con semilla y
+fecha fijas) corre un caso por cada ruta de `app/api/`. En cada request:
+
+- cuenta las sentencias SQL y falla si pasan del máximo del caso; las
+  páginas son de 100 filas, así que un N+1 lo supera de lejos;
+- pide el `EXPLAIN QUERY PLAN` de cada sentencia y falla si alguna recorre
+  entera (SCAN) una tabla grande que el caso no declara como esperada.
+
+También falla si una ruta de la API no tiene caso, o si un caso no responde
+con el código o los campos esperados. Los casos de escritura crean lo que
+los siguientes leen, editan y borran, así que corren en el orden de CASOS.
+Las sentencias y planes de cada caso se imprimen (`pytest -rP` los muestra
+también cuando pasa).
+"""
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, List, Optional, Union
+
+import pytest
+
+from app.models.client import ClienteGym
+from app.models.entrenamiento import DetalleRutina, DiaRutina, Rutina
+from app.models.valoracion import UltimaValoracion, ValoracionFisica
+
+# Tablas que crecen con el gimnasio: recorrerlas enteras en un endpoint caliente es una regresión
+TABLAS_GRANDES = {
+    modelo.__tablename__
+    for modelo in (ClienteGym, ValoracionFisica, UltimaValoracion, Rutina, DiaRutina, DetalleRutina)
+}
+
+ESCANEO = re.compile(r"^SCAN (\w+)")
+
+# El validador de ETag de los listados (`table_version`) cuenta la tabla
+# entera a propósito: COUNT(*) es lineal con o sin índice, pero debe leer solo
+# el índice de updated_at (SCAN ... USING COVERING INDEX), no la tabla
+VALIDADOR_ETAG = re.compile(r"^SELECT count\(\*\) AS count_1, max\(\w+\.updated_at\) AS max_1\s+FROM \w+$")
+
+TODOS_LOS_CLIENTES = "listado sin filtro: orden por id con LIMIT"
+
+# Un valor fijo, o una función de los ids de la base (se resuelve al correr el caso)
+Valor = Union[object, Callable[[dict], object]]
+
+@dataclass
+class Caso:
+    metodo: str
+    ruta: str  # plantilla, como en OpenAPI; la URL se arma con los ids de la base
+    max_consultas: int
+    params: Valor = field(default_factory=dict)
+    json: Valor = None
+    data: Optional[dict] = None
+    archivo: Valor = None  # (nombre, contenido) para los endpoints de importación
+    estado: int = 200
+    escaneos: Dict[str, str] = field(default_factory=dict)  # tabla -> por qué se espera recorrerla
+    guardar: Optional[str] = None  # id de la respuesta para casos siguientes
+    respuesta: Dict[str, object] = field(default_factory=dict)  # campos esperados del JSON devuelto
+    nombre: str = ""
+
+    @property
+    def etiqueta(self) -> str:
+        return f"{self.metodo} {self.ruta}" + (f" ({self.nombre})" if self.nombre else "")
+
+def _resolver(valor: Valor, ids: dict):
+    return valor(ids) if callable(valor) else valor
+
+def _rutina(ejercicios: List[int]) -> dict:
+    """Plantilla de 4 días con 6 ejercicios cada uno"""
+    return {
+        "nombre": "Fuerza 4 días", "nivel": "Intermedio", "duracion_semanas": 4,
+        "dias": [
+            {"nombre": f"Día {d}", "orden": d, "ejercicios": [
+                {"ejercicio_id": ejercicios[(d * 6 + e) % len(ejercicios)], "series": 4, "repeticiones": "8-12"}
+                for e in range(6)
+            ]}
+            for d in range(1, 5)
+        ],
+    }
+
+def _csv(encabezado: List[str], filas: List[list]) -> bytes:
+    return "\n".join(",".join(str(v) for v in fila) for fila in [encabezado, *filas]).encode()
+
+def _bascula(ids: dict) -> tuple:
+    clientes = ids["clientes"]
+    return ("bascula.csv", _csv(
+        ["cliente_id", "fecha", "peso", "altura", "porcentaje_grasa"],
+        [[clientes[i % len(clientes)], f"2025-07-{1 + i // 20:02d}T08:{i % 20:02d}:00", 70.5, 172, 21.3]
+         for i in range(100)],
+    ))
+
+CASOS: List[Caso] = [
+    Caso("POST", "/api/auth/login", 2, data={"username": "admin@gym.com", "password": "admin123"}),
+
+    Caso("GET", "/api/users/me", 0),
+    Caso("GET", "/api/users/", 2, params={"limit": 100, "include_total": "true"}),
+    Caso("POST", "/api/users/", 3, json={"email": "nuevo@gym.test", "full_name": "Nuevo", "password": "x1"},
+         estado=201, guardar="usuario_nuevo"),
+    Caso("GET", "/api/users/{user_id}", 1),
+    Caso("PATCH", "/api/users/{user_id}", 3, json={"full_name": "Nuevo Editado"}),
+    Caso("DELETE", "/api/users/{user_id}", 3, estado=204),
+
+    Caso("GET", "/api/clients/", 3, params={"limit": 100, "include_total": "true"},
+         escaneos={"clientegym": TODOS_LOS_CLIENTES}, nombre="todos"),
+    Caso("GET", "/api/clients/", 3, params=lambda ids: {"entrenador_id": ids["entrenador_id"], "limit": 100},
+         nombre="de un entrenador"),
+    Caso("POST", "/api/clients/", 3, json={"nombre": "Nueva", "apellido": "Clienta", "email": "nueva@gym.test"},
+         guardar="cliente_nuevo"),
+    Caso("GET", "/api/clients/{client_id}", 2),
+    Caso("PATCH", "/api/clients/{client_id}", 3, json={"telefono": "3000000000"}),
+    Caso("POST", "/api/clients/import", 5, archivo=("socios.csv", _csv(
+        ["nombre", "apellido", "email", "tipo_usuario"],
+        [[f"Socio{i}", "Importado", f"socio{i}@gym.test", "presencial"] for i in range(100)],
+    )), respuesta={"imported": 100, "failed": 0}),
+
+    Caso("GET", "/api/valoraciones/", 3, params=lambda ids: {"cliente_id": ids["cliente_id"], "limit": 100},
+         nombre="de un cliente"),
+    Caso("GET", "/api/valoraciones/", 3, params=lambda ids: {"cliente_id": ids["cliente_id"], "formato": "ndjson"},
+         nombre="ndjson"),
+    Caso("GET", "/api/valoraciones/ultimas", 3, params={"limit": 100}, escaneos={"clientegym": TODOS_LOS_CLIENTES}),
+    Caso("POST", "/api/valoraciones/", 6, json=lambda ids: {"cliente_id": ids["cliente_id"], "peso": 80.5, "altura": 175},
+         estado=201, guardar="valoracion_nueva"),
+    Caso("GET", "/api/valoraciones/{valoracion_id}", 2),
+    Caso("PATCH", "/api/valoraciones/{valoracion_id}", 6, json={"peso": 80.1}),
+    Caso("DELETE", "/api/valoraciones/{valoracion_id}", 6, estado=204),
+    Caso("POST", "/api/valoraciones/importar-bascula", 8, archivo=_bascula, respuesta={"insertadas": 100}),
+    Caso("GET", "/api/valoraciones/cliente/{cliente_id}/progreso", 3),
+    Caso("GET", "/api/valoraciones/cliente/{cliente_id}/progreso/serie", 3,
+         params={"metricas": "peso,porcentaje_grasa", "bucket": "month"}),
+
+    Caso("GET", "/api/entrenamientos/ejercicios/", 1, params={"grupo_muscular": "Pecho"}),
+    Caso("GET", "/api/entrenamientos/ejercicios/facetas", 1),
+    Caso("POST", "/api/entrenamientos/ejercicios/", 3,
+         json={"nombre": "Press inclinado con pausa", "grupo_muscular": "Pecho"}, estado=201),
+    Caso("GET", "/api/entrenamientos/rutinas/cliente/{cliente_id}", 3),
+    Caso("POST", "/api/entrenamientos/rutinas/", 6,
+         json=lambda ids: {**_rutina(ids["ejercicios"]), "cliente_id": ids["cliente_id"]},
+         estado=201, guardar="rutina_nueva"),
+    Caso("POST", "/api/entrenamientos/rutinas/asignacion-masiva", 6,
+         json=lambda ids: {**_rutina(ids["ejercicios"]), "cliente_ids": ids["clientes"][:100]}, estado=201),
+    Caso("DELETE", "/api/entrenamientos/rutinas/{rutina_id}", 4),
+
+    Caso("GET", "/api/exportaciones/{entidad}", 2, params=lambda ids: {"cliente_id": ids["cliente_id"]},
+         nombre="valoraciones"),
+    Caso("GET", "/api/exportaciones/{entidad}", 2, escaneos={"clientegym": "exporta la tabla entera"},
+         nombre="clientes"),
+
+    Caso("GET", "/api/admin/traces", 0),
+    Caso("GET", "/api/admin/profile", 0, params={"seconds": 0.05}),
+
+    Caso("DELETE", "/api/clients/{client_id}", 6, estado=204),
+]
+
+def url(caso: Caso, ids: dict) -> str:
+    valores = {
+        "user_id": ids.get("usuario_nuevo"), "client_id": ids.get("cliente_nuevo"),
+        "valoracion_id": ids.get("valoracion_nueva"), "rutina_id": ids.get("rutina_nueva"),
+        "cliente_id": ids["cliente_id"], "entidad": caso.nombre,
+    }
+    return re.sub(r"\{(\w+)\}", lambda m: str(valores[m.group(1)]), caso.ruta)
+
+def plan(conexion: sqlite3.Connection, sentencia: str, parametros) -> List[str]:
+    try:
+        return [fila[3] for fila in conexion.execute(f"EXPLAIN QUERY PLAN {sentencia}", parametros)]
+    except sqlite3.Error as e:
+        return [f"(sin plan: {e})"]
+
+def escaneos(sentencia: str, detalles: List[str]) -> List[str]:
+    """Tablas grandes que la sentencia recorre enteras"""
+    validador = VALIDADOR_ETAG.match(sentencia) is not None
+    tablas = []
+    for detalle in detalles:
+        coincidencia = ESCANEO.match(detalle)
+        if coincidencia and not (validador and "USING COVERING INDEX" in detalle):
+            # Los alias de SQLAlchemy llevan sufijo: clientegym_1
+            tabla = re.sub(r"_\d+$", "", coincidencia.group(1))
+            if tabla in TABLAS_GRANDES:
+                tablas.append(tabla)
+    return tablas
+
+@pytest.fixture(scope="module")
+def ids(cliente_http) -> dict:
+    """Datos sintéticos y los ids que usan los casos (un cliente con historial y un entrenador con clientes)"""
+    from sqlalchemy import func, select
+    from sqlmodel import Session
+
+    from app.core.db import engine
+    from app.models.client import ClienteGym
+    from app.models.entrenamiento import Ejercicio, Rutina
+    from app.models.valoracion import ValoracionFisica
+    from app.services.datos_sinteticos import ParametrosGeneracion, generar
+    from scripts.seed_ejercicios import seed_ejercicios
+
+    with Session(engine) as session:
+        catalogo_vacio = not session.execute(select(func.count()).select_from(Ejercicio)).scalar_one()
+    if catalogo_vacio:
+        seed_ejercicios()
+    generar(engine, ParametrosGeneracion(clientes=2000, valoraciones=40000, rutinas=3000, hasta=date(2025, 6, 30)))
+
+    with Session(engine) as session:
+        cliente_id = session.execute(
+            select(ValoracionFisica.cliente_id).join(Rutina, Rutina.cliente_id == ValoracionFisica.cliente_id)
+            .group_by(ValoracionFisica.cliente_id).order_by(func.count().desc()).limit(1)
+        ).scalar_one()
+        entrenador_id = session.execute(
+            select(ClienteGym.entrenador_id).where(ClienteGym.entrenador_id.is_not(None))
+            .group_by(ClienteGym.entrenador_id).order_by(func.count().desc()).limit(1)
+        ).scalar_one()
+        clientes = list(session.execute(select(ClienteGym.id).order_by(ClienteGym.id).limit(200)).scalars())
+        ejercicios = list(session.execute(select(Ejercicio.id).order_by(Ejercicio.id)).scalars())
+    return {"cliente_id": cliente_id, "entrenador_id": entrenador_id, "clientes": clientes, "ejercicios": ejercicios}
+
+@pytest.fixture(scope="module")
+def explicador(ids):
+    from app.core.config import settings
+
+    conexion = sqlite3.connect(settings.DB_FILE)
+    yield conexion
+    conexion.close()
+
+@pytest.mark.parametrize("caso", CASOS, ids=[caso.etiqueta for caso in CASOS])
+def test_consultas(caso: Caso, ids, explicador, cliente_http, cabeceras, sql):
+    archivo = _resolver(caso.archivo, ids)
+    with sql.contar() as sentencias:
+        respuesta = cliente_http.request(
+            caso.metodo, url(caso, ids), params=_resolver(caso.params, ids), json=_resolver(caso.json, ids),
+            data=caso.data, files={"file": archivo} if archivo else None, headers=cabeceras,
+        )
+    if caso.guardar and respuesta.status_code < 300:
+        ids[caso.guardar] = respuesta.json()["id"]
+
+    problemas = []
+    if respuesta.status_code != caso.estado:
+        problemas.append(f"respondió {respuesta.status_code} (se esperaba {caso.estado}): {respuesta.text[:200]}")
+    elif caso.respuesta:
+        # Un 200 que no hizo nada (p. ej. todas las filas rechazadas) tampoco consulta nada
+        cuerpo = respuesta.json()
+        for clave, valor in caso.respuesta.items():
+            if cuerpo.get(clave) != valor:
+                problemas.append(f"{clave} = {cuerpo.get(clave)!r} (se esperaba {valor!r})")
+    if len(sentencias) > caso.max_consultas:
+        problemas.append(f"{len(sentencias)} sentencias SQL, máximo {caso.max_consultas}")
+
+    print(f"{caso.etiqueta}: {len(sentencias)}/{caso.max_consultas} sentencias")
+    for sentencia, (parametros, executemany) in zip(sentencias, sql.parametros):
+        detalles = [] if executemany else plan(explicador, sentencia, parametros)
+        print(f"  · {' '.join(sentencia.split())[:200]}")
+        for detalle in detalles:
+            print(f"      {detalle}")
+        for tabla in escaneos(sentencia, detalles):
+            if tabla not in caso.escaneos:
+                problemas.append(f"recorre toda la tabla {tabla}: {' '.join(sentencia.split())[:160]}")
+
+    assert not problemas, "\n".join(problemas)
+
+def test_todas_las_rutas_tienen_caso(cliente_http):
+    cubiertas = {(caso.metodo, caso.ruta) for caso in CASOS}
+    sin_caso = [
+        f"{metodo.upper()} {ruta}"
+        for ruta, operaciones in cliente_http.app.openapi()["paths"].items() if ruta.startswith("/api/")
+        for metodo in operaciones if (metodo.upper(), ruta) not in cubiertas
+    ]
+    assert not sin_caso, f"rutas sin caso en tests/test_consultas.py: {sin_caso}"
+
+def test_escaneos_de_tablas_grandes():
+    consulta = "SELECT valoraciones_fisicas.id FROM valoraciones_fisicas WHERE valoraciones_fisicas.peso > ?"
+    assert escaneos(consulta, ["SCAN valoraciones_fisicas"]) == ["valoraciones_fisicas"]
+    assert escaneos(consulta, ["SCAN valoraciones_fisicas_1"]) == ["valoraciones_fisicas"]
+    assert escaneos(consulta, ["SEARCH valoraciones_fisicas USING INDEX ix_valoraciones_fisicas_cliente_id_fecha_id (cliente_id=?)"]) == []
+    assert escaneos(consulta, ["SCAN ejercicio"]) == []
+
+    validador = "SELECT count(*) AS count_1, max(ultima_valoracion_cliente.updated_at) AS max_1 \nFROM ultima_valoracion_cliente"
+    assert escaneos(validador, ["SCAN ultima_valoracion_cliente"]) == ["ultima_valoracion_cliente"]
+    assert escaneos(validador, [
+        "SCAN ultima_valoracion_cliente USING COVERING INDEX ix_ultima_valoracion_cliente_updated_at"
+    ]) == []
@@ -0,0 +1,19 @@
+"""El modo sync no necesita la extensión asyncio de SQLAlchemy ni greenlet"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+BLOQUEAR = '''
+import sys
+for modulo in ("greenlet", "sqlalchemy.ext.asyncio", "sqlmodel.ext.asyncio", "sqlmodel.ext.asyncio.session"):
+    sys.modules[modulo] = None  # import -> ImportError, como en un entorno sin greenlet
+import app.main
+'''
+
+def test_app_importa_sin_asyncio(tmp_path):
+    entorno = {**os.environ, "DB_ASYNC": "false", "DB_FILE": str(tmp_path / "sync.db"), "PYTHONPATH": str(BACKEND)}
+    proceso = subprocess.run([sys.executable, "-c", BLOQUEAR], env=entorno, cwd=BACKEND, capture_output=True, text=True)
+    assert proceso.returncode == 0, proceso.stderr
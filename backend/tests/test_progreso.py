@@ -0,0 +1,56 @@
+"""Caché de progreso: un cálculo que se cruza con una escritura no queda cacheado"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.core.db import engine, read_engine
+from app.models.client import ClienteGym
+from app.models.valoracion import ValoracionFisica
+from app.services.progreso import calcular_progreso, invalidar_cliente, progreso_cache, serie_progreso
+
+@pytest.fixture
+def cliente_id(cliente_http) -> int:
+    with Session(engine) as session:
+        cliente = ClienteGym(nombre="Progreso", apellido="Carrera", email=f"progreso-{datetime.now().timestamp()}@gym.test")
+        session.add(cliente)
+        session.commit()
+        session.add_all([
+            ValoracionFisica(cliente_id=cliente.id, fecha=datetime(2024, 1, 1) + timedelta(days=30 * i), peso=90 - i, altura=180)
+            for i in range(3)
+        ])
+        session.commit()
+        return cliente.id
+
+@contextmanager
+def escritura_durante_la_consulta(cliente_id: int):
+    """Simula una escritura que hace commit (e invalida) mientras corre el cálculo"""
+    pendiente = [True]
+
+    def invalidar(conn, cursor, statement, parameters, context, executemany):
+        if pendiente:
+            pendiente.clear()
+            invalidar_cliente(cliente_id)
+
+    event.listen(read_engine, "before_cursor_execute", invalidar)
+    try:
+        yield
+    finally:
+        event.remove(read_engine, "before_cursor_execute", invalidar)
+
+@pytest.mark.parametrize("calcular", [
+    lambda session, cliente_id: calcular_progreso(session, cliente_id, ["peso"]),
+    lambda session, cliente_id: serie_progreso(session, cliente_id, ["peso"], "month"),
+], ids=["progreso", "serie"])
+def test_no_cachea_calculo_cruzado_con_escritura(cliente_id, calcular):
+    antes = progreso_cache.stats()["size"]
+    with Session(read_engine) as session:
+        with escritura_durante_la_consulta(cliente_id):
+            calcular(session, cliente_id)
+        assert progreso_cache.stats()["size"] == antes
+
+        # Sin escrituras de por medio sí se cachea
+        calcular(session, cliente_id)
+        assert progreso_cache.stats()["size"] == antes + 1
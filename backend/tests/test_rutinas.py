@@ -0,0 +1,52 @@
+"""Rutinas de un cliente: un número fijo de consultas sin importar el tamaño del historial"""
+import pytest
+from sqlmodel import Session, select
+
+from app.api.entrenamientos import DetalleRoutineInput, DiaRoutineInput, FullRutinaCreate
+from app.core.db import engine
+from app.models.client import ClienteGym
+from app.models.entrenamiento import Ejercicio
+from app.models.user import Usuario
+from app.services.rutinas import insertar_rutinas
+
+@pytest.fixture(scope="module")
+def ejercicio_ids(cliente_http):
+    with Session(engine) as session:
+        ejercicios = [Ejercicio(nombre=f"Ejercicio de prueba {i}", grupo_muscular="Pecho") for i in range(3)]
+        session.add_all(ejercicios)
+        session.commit()
+        return [e.id for e in ejercicios]
+
+def _cliente_con_rutinas(ejercicio_ids, rutinas: int, dias: int) -> int:
+    with Session(engine) as session:
+        entrenador_id = session.exec(select(Usuario.id).where(Usuario.email == "admin@gym.com")).one()
+        cliente = ClienteGym(nombre="Historial", apellido=f"{rutinas}x{dias}", email=f"rutinas-{rutinas}-{dias}@gym.test")
+        session.add(cliente)
+        session.commit()
+        plantilla = FullRutinaCreate(
+            nombre="Fuerza", cliente_id=cliente.id,
+            dias=[
+                DiaRoutineInput(nombre=f"Día {d}", orden=d, ejercicios=[
+                    DetalleRoutineInput(ejercicio_id=e, series=4, repeticiones="8-12") for e in ejercicio_ids
+                ])
+                for d in range(1, dias + 1)
+            ],
+        )
+        insertar_rutinas(session, plantilla, [cliente.id] * rutinas, entrenador_id=entrenador_id)
+        session.commit()
+        return cliente.id
+
+@pytest.mark.parametrize("rutinas,dias", [(1, 1), (5, 3), (40, 7)])
+def test_rutinas_cliente_sin_n_mas_1(cliente_http, cabeceras, sql, ejercicio_ids, rutinas, dias):
+    cliente_id = _cliente_con_rutinas(ejercicio_ids, rutinas, dias)
+
+    with sql.contar() as sentencias:
+        respuesta = cliente_http.get(f"/api/entrenamientos/rutinas/cliente/{cliente_id}", headers=cabeceras)
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert len(cuerpo) == rutinas
+    assert all(len(r["dias"]) == dias and len(r["dias"][0]["ejercicios"]) == len(ejercicio_ids) for r in cuerpo)
+    # Fuera de la cuenta: el validador del ETag (COUNT) y la autenticación
+    datos = [s for s in sentencias if not s.startswith("SELECT count(*)") and "FROM usuario" not in s]
+    assert len(datos) <= 2, "\n\n".join(datos)
@@ -0,0 +1,24 @@
+"""Log de requests lentos: dónde se escribe y qué queda fuera"""
+import os
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.tracing import SlowTraceLog, TracingMiddleware, log_path
+
+def test_log_junto_a_la_base():
+    assert log_path("slow_requests.jsonl") == os.path.join(
+        os.path.dirname(os.path.abspath(settings.DB_FILE)), "slow_requests.jsonl"
+    )
+    assert log_path(os.path.abspath("otro.jsonl")) == os.path.abspath("otro.jsonl")
+    assert log_path("") == ""
+
+def test_profile_no_cuenta_como_lento(cliente_http, cabeceras):
+    log = SlowTraceLog("", 0, 0, keep=10)
+    # Todo request trazado y todo "lento": solo queda fuera lo que se excluye a propósito
+    trazado = TestClient(TracingMiddleware(cliente_http.app, sample_rate=1, slow_ms=0, log=log))
+
+    assert trazado.get("/api/admin/profile", params={"seconds": 0.05}, headers=cabeceras).status_code == 200
+    assert trazado.get("/api/users/me", headers=cabeceras).status_code == 200
+
+    assert [r["route"] for r in log.slowest(10)] == ["/api/users/me"]
@@ -0,0 +1,49 @@
+"""Historial de valoraciones: las páginas con cursor y el NDJSON cubren todo el historial"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models.client import ClienteGym
+from app.models.valoracion import ValoracionFisica
+
+TOTAL = 250
+
+@pytest.fixture(scope="module")
+def cliente_con_historial(cliente_http) -> int:
+    with Session(engine) as session:
+        cliente = ClienteGym(nombre="Historial", apellido="Largo", email="historial-largo@gym.test")
+        session.add(cliente)
+        session.commit()
+        inicio = datetime(2020, 1, 1, 8)
+        session.add_all([
+            ValoracionFisica(cliente_id=cliente.id, fecha=inicio + timedelta(days=7 * i), peso=80 - i * 0.01, altura=175)
+            for i in range(TOTAL)
+        ])
+        session.commit()
+        return cliente.id
+
+def test_paginas_con_cursor(cliente_http, cabeceras, cliente_con_historial):
+    ids, cursor = [], None
+    while True:
+        params = {"cliente_id": cliente_con_historial, **({"cursor": cursor} if cursor else {})}
+        respuesta = cliente_http.get("/api/valoraciones/", params=params, headers=cabeceras)
+        assert respuesta.status_code == 200
+        ids += [v["id"] for v in respuesta.json()]
+        cursor = respuesta.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(ids) == len(set(ids)) == TOTAL
+
+def test_ndjson_historial_completo(cliente_http, cabeceras, cliente_con_historial):
+    # Lo que pide el modal de progreso del frontend
+    respuesta = cliente_http.get("/api/valoraciones/", headers=cabeceras, params={
+        "cliente_id": cliente_con_historial, "formato": "ndjson",
+        "fields": "fecha,peso,imc,porcentaje_grasa,masa_muscular,perimetro_cintura",
+    })
+    assert respuesta.status_code == 200
+    filas = [json.loads(linea) for linea in respuesta.text.splitlines() if linea.strip()]
+    assert len(filas) == TOTAL
+    assert {"id", "fecha", "peso", "imc"} <= set(filas[0])
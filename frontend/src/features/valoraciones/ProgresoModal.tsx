@@ -36,12 +36,19 @@ export function ProgresoModal({ clienteId, clienteNombre, onClose }: ProgresoMod
     try {
       const token = localStorage.getItem('token');
       
-      const resValoraciones = await fetch(`/api/valoraciones/?cliente_id=${clienteId}`, {
+      // Historial completo (el JSON paginado trae solo las 100 más recientes):
+      // NDJSON con las columnas del gráfico, una valoración por línea
+      const campos = 'fecha,peso,imc,porcentaje_grasa,masa_muscular,perimetro_cintura';
+      const resValoraciones = await fetch(`/api/valoraciones/?cliente_id=${clienteId}&formato=ndjson&fields=${campos}`, {
         headers: { 'Authorization': `Bearer ${token}` }
       });
       
       if (resValoraciones.ok) {
-        const dataValoraciones = await resValoraciones.json();
+        const texto = await resValoraciones.text();
+        const dataValoraciones: Valoracion[] = texto
+          .split('\n')
+          .filter(linea => linea.trim() !== '')
+          .map(linea => JSON.parse(linea));
         setValoraciones(dataValoraciones);
       }
 
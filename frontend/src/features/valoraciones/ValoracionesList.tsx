@@ -25,6 +25,7 @@ interface Cliente {
 
 export function ValoracionesList() {
   const [valoraciones, setValoraciones] = useState<Valoracion[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [clientes, setClientes] = useState<Cliente[]>([]);
   const [selectedCliente, setSelectedCliente] = useState<number | null>(null);
   const [showModal, setShowModal] = useState(false);
@@ -81,20 +82,24 @@ export function ValoracionesList() {
     }
   };
 
-  const fetchValoraciones = async () => {
+  // Páginas de 100, las más recientes primero; la siguiente se pide con el cursor de X-Next-Cursor
+  const fetchValoraciones = async (cursor: string | null = null) => {
     try {
       const token = localStorage.getItem('token');
-      const url = selectedCliente 
-        ? `/api/valoraciones/?cliente_id=${selectedCliente}`
-        : '/api/valoraciones/';
+      const params = new URLSearchParams();
+      if (selectedCliente) params.set('cliente_id', selectedCliente.toString());
+      if (cursor) params.set('cursor', cursor);
+      const query = params.toString();
+      const url = query ? `/api/valoraciones/?${query}` : '/api/valoraciones/';
       
       const res = await fetch(url, {
         headers: { 'Authorization': `Bearer ${token}` }
       });
       
       if (res.ok) {
-        const data = await res.json();
-        setValoraciones(data);
+        const data: Valoracion[] = await res.json();
+        setValoraciones(prev => (cursor ? [...prev, ...data] : data));
+        setNextCursor(res.headers.get('X-Next-Cursor'));
       }
     } catch (error) {
       console.error('Error fetching valoraciones:', error);
@@ -389,6 +394,14 @@ export function ValoracionesList() {
         </table>
       </div>
 
+      {nextCursor && (
+        <div style={{ display: 'flex', justifyContent: 'center', marginTop: '1rem' }}>
+          <button onClick={() => fetchValoraciones(nextCursor)} className="gym-button gym-button-secondary">
+            Cargar más
+          </button>
+        </div>
+      )}
+
       {/* Modal de Crear/Editar - Continuará en el siguiente archivo */}
       {showModal && (
         <div className="gym-modal-overlay" onClick={() => setShowModal(false)}>